@@ -0,0 +1,133 @@
+"""Benchmark language_id against the old word-list heuristic from translation_voice.
+
+Run with: python bench_language_id.py
+"""
+import re
+import time
+
+from language_id import classify, classify_many
+
+SAMPLES = [
+    ("hello everyone, are we still doing the dungeon tonight?", 'en'),
+    ("i can't make it today, my internet is down", 'en'),
+    ("who is online for the perceptor attack", 'en'),
+    ("gg well played, that was close", 'en'),
+    ("thanks for the invite, see you later", 'en'),
+    ("hola a todos, ¿seguimos con la mazmorra esta noche?", 'es'),
+    ("no puedo hoy, se me cayó el internet", 'es'),
+    ("¿quién está conectado para el ataque al recaudador?", 'es'),
+    ("buena partida, estuvo muy cerca", 'es'),
+    ("gracias por la invitación, nos vemos luego", 'es'),
+    ("salut tout le monde, on fait toujours le donjon ce soir ?", 'fr'),
+    ("je ne peux pas aujourd'hui, ma connexion est coupée", 'fr'),
+    ("qui est connecté pour l'attaque du percepteur", 'fr'),
+    ("bien joué, c'était serré", 'fr'),
+    ("merci pour l'invitation, à plus tard", 'fr'),
+    ("olá pessoal, ainda vamos fazer a masmorra hoje à noite?", 'pt'),
+    ("não consigo hoje, minha internet caiu", 'pt'),
+    ("quem está online para o ataque ao coletor", 'pt'),
+    ("boa partida, foi por pouco", 'pt'),
+    ("obrigado pelo convite, até mais tarde", 'pt'),
+    ("مرحبا بالجميع، هل سنذهب إلى الزنزانة الليلة؟", 'ar'),
+    ("لا أستطيع اليوم، الإنترنت مقطوع", 'ar'),
+    ("من متصل لهجوم الجابي", 'ar'),
+    ("مباراة جيدة، كانت قريبة", 'ar'),
+    ("شكرا على الدعوة، أراك لاحقا", 'ar'),
+]
+
+# Short chat messages: each must come back as its expected language or as unsure (None)
+SHORT_PROBES = [
+    ("no", 'en'), ("lol", 'en'), ("pls", 'en'), ("a", 'en'), ("ok", 'en'), ("gg", 'en'), ("brb", 'en'),
+    ("yes sir", 'en'), ("ty all", 'en'), ("thanks", 'en'), ("on my way", 'en'), ("see you soon", 'en'),
+    ("hola", 'es'), ("sí", 'es'), ("merci", 'fr'), ("oui", 'fr'),
+]
+SHORT_THRESHOLD = 0.6  # LANGUAGE_CONFIDENCE in cogs/translation_voice.py
+
+ROUNDS = 2000
+
+
+def legacy_detect(text: str) -> str:
+    """The pre-language_id heuristic, kept here only as the benchmark baseline"""
+    clean_text = re.sub(r'http\S+|@\S+|<@\S+>|[^\w\s]', '', text.lower())
+    if len(clean_text.strip()) < 3:
+        return 'en'
+    es_words = {
+        'el', 'la', 'los', 'las', 'un', 'una', 'y', 'o', 'pero', 'porque', 'como',
+        'qué', 'quién', 'cuándo', 'dónde', 'por qué', 'sí', 'no', 'muy', 'más',
+        'aquí', 'allí', 'con', 'sin', 'para', 'por', 'en', 'de', 'del', 'al',
+        'que', 'es', 'está', 'son', 'están', 'tiene', 'tengo', 'hacer', 'hago',
+        'puede', 'puedo', 'quiero', 'quiere', 'mi', 'tu', 'su', 'nos', 'les',
+        'me', 'te', 'se', 'le', 'lo', 'ya', 'también', 'bien', 'mal', 'todo',
+        'nada', 'algo', 'casa', 'tiempo', 'año', 'día', 'vez', 'hombre', 'mujer',
+        'niño', 'niña', 'agua', 'comida', 'trabajo', 'escuela', 'familia'
+    }
+    en_words = {
+        'the', 'and', 'or', 'but', 'because', 'how', 'what', 'who', 'when', 'where',
+        'why', 'yes', 'no', 'very', 'more', 'here', 'there', 'with', 'without',
+        'for', 'in', 'of', 'to', 'from', 'is', 'are', 'was', 'were', 'have',
+        'has', 'had', 'do', 'does', 'did', 'can', 'could', 'will', 'would',
+        'should', 'my', 'your', 'his', 'her', 'our', 'their', 'me', 'you',
+        'him', 'her', 'us', 'them', 'i', 'we', 'they', 'it', 'this', 'that',
+        'these', 'those', 'all', 'some', 'any', 'good', 'bad', 'big', 'small'
+    }
+    clean_text = re.sub(r'[^\w\s]', '', clean_text)
+    words = clean_text.split()
+    if not words:
+        return 'en'
+    spanish = sum(1 for word in words if word in es_words) / len(words)
+    english = sum(1 for word in words if word in en_words) / len(words)
+    if spanish > english and spanish >= 0.15:
+        return 'es'
+    if english > spanish and english >= 0.15:
+        return 'en'
+    for pattern in (r'\b(está|están|tengo|tiene|quiero|quiere|hago|hace)\b',
+                    r'\b(mi|tu|su|nos|les|del|al)\b',
+                    r'\b(porque|también|año|día|niño|niña)\b'):
+        if re.search(pattern, clean_text):
+            return 'es'
+    return 'en'
+
+
+def time_per_message(detect) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for text, _ in SAMPLES:
+            detect(text)
+    return (time.perf_counter() - start) / (ROUNDS * len(SAMPLES)) * 1e6
+
+
+def accuracy(predictions) -> float:
+    return sum(1 for guess, (_, expected) in zip(predictions, SAMPLES) if guess == expected) / len(SAMPLES) * 100
+
+
+def main():
+    texts = [text for text, _ in SAMPLES]
+
+    legacy_us = time_per_message(legacy_detect)
+    legacy_acc = accuracy([legacy_detect(text) for text in texts])
+
+    ngram_us = time_per_message(lambda text: classify(text)[0])
+    ngram_acc = accuracy([classify(text)[0] for text in texts])
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        classify_many(texts)
+    batch_us = (time.perf_counter() - start) / (ROUNDS * len(texts)) * 1e6
+
+    print(f"{'detector':<22}{'us/message':>12}{'accuracy':>12}")
+    print(f"{'legacy word lists':<22}{legacy_us:>12.1f}{legacy_acc:>11.0f}%")
+    print(f"{'n-gram classify':<22}{ngram_us:>12.1f}{ngram_acc:>11.0f}%")
+    print(f"{'n-gram classify_many':<22}{batch_us:>12.1f}{ngram_acc:>11.0f}%")
+
+    wrong = []
+    for text, expected in SHORT_PROBES:
+        guess, confidence = classify(text, SHORT_THRESHOLD)
+        if guess is not None and guess != expected:
+            wrong.append(f"{text!r} -> {guess} {confidence:.2f}")
+    print(f"short messages confidently misread: {len(wrong)}/{len(SHORT_PROBES)}")
+    for line in wrong:
+        print(f"  {line}")
+
+
+if __name__ == '__main__':
+    main()
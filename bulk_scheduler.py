@@ -0,0 +1,288 @@
+"""Rate-limit-aware scheduler for guild-wide bulk mutations.
+
+discord.py already waits on each route bucket before sending, but callers that
+loop with fixed sleeps either idle while a bucket has tokens left or pile up
+behind a drained bucket. The scheduler keeps exactly as many requests in flight
+per bucket as Discord's X-RateLimit-* headers allow and reports progress/ETA.
+
+Headers are read through an aiohttp TraceConfig passed to the bot as
+``http_trace=rate_limit_trace()``. Without it, buckets fall back to additive
+increase / multiplicative decrease driven by 429 responses.
+"""
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+import discord
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_MAX_IN_FLIGHT = 16  # Stay well under Discord's 50 requests/second global limit
+DEFAULT_CONCURRENCY = 1  # Until a bucket's first response tells us its size
+HEADROOM = 1  # Tokens per bucket left free for interactive commands
+MAX_RETRIES = 3
+
+_API_PREFIX = re.compile(r'^/api/v\d+')
+_SNOWFLAKE = re.compile(r'/\d{15,21}')
+_MAJOR = re.compile(r'^/(guilds|channels|webhooks)/(\d+)')
+
+
+def route_key(method: str, path: str) -> str:
+    """Collapse a request path to its bucket key, keeping only the major parameter"""
+    path = _API_PREFIX.sub('', path)
+    major = _MAJOR.match(path)
+    if major:
+        head = f"/{major.group(1)}/{major.group(2)}"
+        return f"{method} {head}{_SNOWFLAKE.sub('/{id}', path[len(head):])}"
+    return f"{method} {_SNOWFLAKE.sub('/{id}', path)}"
+
+
+class BucketState:
+    """What we know about one route bucket, mostly copied from response headers"""
+    __slots__ = ('limit', 'remaining', 'reset_at', 'concurrency', 'in_flight', 'successes', 'throttled', 'wakeup')
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.concurrency = DEFAULT_CONCURRENCY
+        self.in_flight = 0
+        self.successes = 0
+        self.throttled = 0
+        self.wakeup = asyncio.Event()
+
+    def observe(self, headers, status: int):
+        limit = headers.get('X-RateLimit-Limit')
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After') or headers.get('Retry-After')
+        if limit is not None:
+            self.limit = int(limit)
+            # Known bucket size: fill it, minus the headroom we keep for everyone else
+            self.concurrency = max(1, self.limit - HEADROOM)
+        if remaining is not None:
+            self.remaining = int(remaining)
+        if reset_after is not None:
+            self.reset_at = time.monotonic() + float(reset_after)
+        if status == 429:
+            self.record_throttle(float(reset_after or 1.0))
+
+    def record_success(self):
+        self.successes += 1
+        # Without header data, probe upward one slot per window of clean responses
+        if self.limit is None and self.successes % max(1, self.concurrency) == 0:
+            self.concurrency = min(self.concurrency + 1, GLOBAL_MAX_IN_FLIGHT)
+
+    def record_throttle(self, retry_after: float):
+        self.throttled += 1
+        self.concurrency = max(1, self.concurrency // 2)
+        self.remaining = 0
+        self.reset_at = max(self.reset_at, time.monotonic() + retry_after)
+
+    def delay(self) -> float:
+        """Seconds to wait before another request may start on this bucket"""
+        now = time.monotonic()
+        if self.remaining is None or now >= self.reset_at:
+            return 0.0
+        # Tiny buckets (e.g. 2 renames per channel) can't spare a token for headroom
+        reserve = HEADROOM if (self.limit or 0) > 2 else 0
+        if self.remaining - self.in_flight <= reserve:
+            return self.reset_at - now
+        return 0.0
+
+
+class BulkJob:
+    """A batch of mutations with live progress and ETA"""
+    def __init__(self, name: str, items: List[Any]):
+        self.name = name
+        self.items = items
+        self.total = len(items)
+        self.done = 0
+        self.failed: List[Tuple[Any, BaseException]] = []
+        self.results: List[Tuple[Any, Any]] = []
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def completed(self) -> int:
+        return self.done + len(self.failed)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def rate(self) -> float:
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds until completion at the current rate, None before the first result"""
+        if self.finished_at:
+            return 0.0
+        rate = self.rate
+        return (self.total - self.completed) / rate if rate else None
+
+    def progress_line(self) -> str:
+        percentage = self.completed / self.total * 100 if self.total else 100
+        eta = self.eta
+        eta_text = f"{eta:.0f}s" if eta is not None else "estimating"
+        return (
+            f"⏳ Progress: {self.completed}/{self.total} ({percentage:.1f}%) • "
+            f"{self.rate:.1f}/s • ETA {eta_text}"
+        )
+
+    def remaining(self) -> List[Any]:
+        """Items that neither succeeded nor failed, e.g. after the job was cancelled"""
+        finished = {id(item) for item, _ in self.results}
+        finished.update(id(item) for item, _ in self.failed)
+        return [item for item in self.items if id(item) not in finished]
+
+    async def wait(self) -> 'BulkJob':
+        if self.task:
+            await self.task
+        return self
+
+
+class BulkScheduler:
+    """Runs bulk jobs with per-bucket concurrency taken from Discord's rate-limit headers"""
+    def __init__(self, max_in_flight: int = GLOBAL_MAX_IN_FLIGHT):
+        self.buckets: Dict[str, BucketState] = {}
+        self.max_in_flight = max_in_flight
+        self.global_slots = asyncio.Semaphore(max_in_flight)
+        self.jobs: List[BulkJob] = []
+
+    def bucket(self, key: str) -> BucketState:
+        state = self.buckets.get(key)
+        if state is None:
+            state = self.buckets[key] = BucketState()
+        return state
+
+    def observe_response(self, method: str, path: str, status: int, headers):
+        if 'X-RateLimit-Limit' in headers or status == 429:
+            self.bucket(route_key(method, path)).observe(headers, status)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """TraceConfig that feeds every REST response's rate-limit headers into the scheduler"""
+        async def on_request_end(session, context, params):
+            self.observe_response(params.method, params.url.path, params.response.status, params.response.headers)
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_end.append(on_request_end)
+        return trace
+
+    async def acquire(self, state: BucketState):
+        while True:
+            delay = state.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            if state.in_flight < state.concurrency:
+                state.in_flight += 1
+                return
+            state.wakeup.clear()
+            await state.wakeup.wait()
+
+    def release(self, state: BucketState):
+        state.in_flight -= 1
+        state.wakeup.set()
+
+    async def run_one(self, job: BulkJob, item: Any, operation: Callable[[Any], Awaitable[Any]], key: str):
+        state = self.bucket(key)
+        for attempt in range(MAX_RETRIES):
+            await self.acquire(state)
+            try:
+                async with self.global_slots:
+                    result = await operation(item)
+            except discord.RateLimited as e:
+                # discord.py gave up waiting on an unusually long limit; back off and retry
+                self.release(state)
+                state.record_throttle(e.retry_after)
+                if attempt < MAX_RETRIES - 1:
+                    continue
+                job.failed.append((item, e))
+                return
+            except discord.HTTPException as e:
+                self.release(state)
+                if e.status == 429 and attempt < MAX_RETRIES - 1:
+                    state.record_throttle(2.0 ** attempt)
+                    continue
+                job.failed.append((item, e))
+                return
+            except Exception as e:
+                self.release(state)
+                job.failed.append((item, e))
+                return
+            self.release(state)
+            state.record_success()
+            job.done += 1
+            job.results.append((item, result))
+            return
+
+    def submit(self, name: str, items: Iterable[Any], operation: Callable[[Any], Awaitable[Any]],
+               route: Callable[[Any], str],
+               on_progress: Optional[Callable[[BulkJob], Awaitable[None]]] = None,
+               progress_interval: float = 5.0) -> BulkJob:
+        """Start a job; ``route(item)`` names the bucket each item's request lands in"""
+        job = BulkJob(name, list(items))
+        self.jobs = [existing for existing in self.jobs if not existing.finished_at] + [job]
+        job.task = asyncio.get_running_loop().create_task(
+            self._run(job, operation, route, on_progress, progress_interval)
+        )
+        return job
+
+    async def _run(self, job: BulkJob, operation, route, on_progress, progress_interval):
+        reporter = None
+        if on_progress:
+            reporter = asyncio.get_running_loop().create_task(self._report(job, on_progress, progress_interval))
+        pending = iter(job.items)
+
+        async def worker():
+            # Workers share one iterator, so memory stays flat however many items the job has
+            for item in pending:
+                await self.run_one(job, item, operation, route(item))
+
+        try:
+            workers = min(self.max_in_flight, job.total)
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            job.finished_at = time.monotonic()
+            if reporter:
+                reporter.cancel()
+            logger.info(f"Bulk job '{job.name}': {job.done} done, {len(job.failed)} failed in {job.elapsed:.1f}s")
+
+    async def _report(self, job: BulkJob, on_progress, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await on_progress(job)
+            except Exception as e:
+                logger.error(f"Error reporting progress for '{job.name}': {e}")
+
+
+_scheduler: Optional[BulkScheduler] = None
+
+
+def get_scheduler() -> BulkScheduler:
+    """Return the process-wide bulk scheduler, creating it on first use"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = BulkScheduler()
+    return _scheduler
+
+
+def rate_limit_trace() -> aiohttp.TraceConfig:
+    """TraceConfig for ``commands.Bot(http_trace=...)`` so the scheduler sees rate-limit headers"""
+    return get_scheduler().trace_config()
+
+
+def member_route(member: discord.Member) -> str:
+    return f"PATCH /guilds/{member.guild.id}/members/{{id}}"
+
+
+def channel_route(channel: discord.abc.GuildChannel) -> str:
+    return f"PATCH /channels/{channel.id}"
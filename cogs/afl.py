@@ -6,10 +6,73 @@ import asyncio
 from typing import Optional, Dict, List
 import random
 
+from panel_registry import get_panel_registry, payload_hash
+
+PANEL_NAME = "afl"
+PANEL_EDIT_WINDOW = 2.0  # Refresh requests within this many seconds share one edit
+
+# Static parts of the panel embed, built once
+AUTHOR_NAME = "AFL Attack System"
+AUTHOR_ICON = "https://i.imgur.com/qwJnpQr.png"  # Generic game icon
+FOOTER_ICON = "https://i.imgur.com/JrRBTVu.png"  # Generic system icon
+ADMIN_HEADER = (
+    "```ansi\n"
+    "[2;31m+=======================================+[0m\n"
+    "[2;31m|[0m [2;34mPERCEPTOR ATTACK SYSTEM[0m               [2;31m|[0m\n"
+    "[2;31m|[0m [2;37mVersion[0m: 2.0.0                        [2;31m|[0m\n"
+    "[2;31m|[0m [2;32mStatus[0m: [2;32mOPERATIONAL[0m                    [2;31m|[0m\n"
+    "[2;31m+=======================================+[0m\n```\n"
+    
+    "**📡 System Overview:**\n"
+    "• Real-time perceptor monitoring active\n"
+    "• Tactical AVA deployment ready\n"
+    "• Neural network prediction engine online\n"
+)
+TACTICAL_MAP = (
+    "```\n"
+    "      N       \n"
+    "      ^       \n"
+    "  +---+---+   \n"
+    "W <   *   > E \n"
+    "  +---+---+   \n"
+    "      v       \n"
+    "      S       \n"
+    "```"
+)
+RECENT_ACTIVITY = (
+    "```diff\n"
+    "+ [12:45] Target acquired: Eastern Perceptor\n"
+    "- [11:30] Defense alert: Western approach\n"
+    "+ [10:15] Attack successful: +25 territories\n"
+    "```"
+)
+PUBLIC_DESCRIPTION = (
+    "```ansi\n"
+    "[2;31m+=======================================+[0m\n"
+    "[2;31m|[0m [2;34mAFL ATTACK SYSTEM[0m                     [2;31m|[0m\n"
+    "[2;31m|[0m [2;37mSECURITY LEVEL[0m: [2;31mRED[0m                  [2;31m|[0m\n"
+    "[2;31m|[0m [2;31mACCESS DENIED - ADMIN PRIVILEGES REQUIRED[0m [2;31m|[0m\n"
+    "[2;31m+=======================================+[0m\n```\n"
+    
+    "**⚠️ RESTRICTED ACCESS ⚠️**\n\n"
+    "This terminal requires elevated permissions.\n"
+    "Please contact a guild officer for assistance.\n\n"
+    "```\nSYSTEM: LOCKED\nBIOSCAN: NEGATIVE\nIDENTITY: UNVERIFIED\n```"
+)
+
+
+def _encrypted_fields(seed: int) -> List[tuple]:
+    """The scrambled placeholder fields of the public panel, the same on every render and restart"""
+    rng = random.Random(seed)
+    return [
+        (f"📌 {'#' * rng.randint(5, 10)}", "```\n" + "\n".join(["=" * rng.randint(10, 20) for _ in range(3)]) + "\n```")
+        for _ in range(3)
+    ]
+
 class AFLPanel(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.panel_message: Optional[discord.Message] = None
+        self.panel_message: Optional[discord.PartialMessage] = None
         self.PANEL_CHANNEL_ID = 1247728759780413480
         
         # In-memory data for the panel
@@ -58,10 +121,20 @@ class AFLPanel(commands.Cog):
         
         # Task for auto-updating the panel
         self.update_task = None
+        self.registry = get_panel_registry()
+        self.refresh_task = None
+        self.encrypted_fields = _encrypted_fields(self.PANEL_CHANNEL_ID)
+        self.panel_view = self.AFLPanelView(self)  # One instance serves every edit
+
+    async def cog_load(self):
+        # Buttons on the recorded panel keep working from the first second, before on_ready
+        self.registry.attach(self.bot, PANEL_NAME, lambda: self.panel_view)
 
     def cog_unload(self):
         if self.update_task:
             self.update_task.cancel()
+        if self.refresh_task:
+            self.refresh_task.cancel()
 
     async def start_update_loop(self):
         self.update_task = self.bot.loop.create_task(self._update_loop())
@@ -113,6 +186,12 @@ class AFLPanel(commands.Cog):
                 self.attack_teams["cooldown_ends"] = datetime.now() + timedelta(minutes=random.randint(10, 30))
 
     async def create_panel_embed(self, is_admin: bool) -> discord.Embed:
+        embed = self.render_panel_body(is_admin)
+        self.set_panel_footer(embed)
+        return embed
+
+    def render_panel_body(self, is_admin: bool) -> discord.Embed:
+        """Everything but the volatile footer (latency, clock)"""
         theme = self.themes[self.current_theme]
         
         embed = discord.Embed(
@@ -121,10 +200,7 @@ class AFLPanel(commands.Cog):
             timestamp=datetime.now()
         )
 
-        embed.set_author(
-            name="AFL Attack System",
-            icon_url="https://i.imgur.com/qwJnpQr.png"  # Generic game icon
-        )
+        embed.set_author(name=AUTHOR_NAME, icon_url=AUTHOR_ICON)
 
         if is_admin:
             # Progress bar function
@@ -143,17 +219,7 @@ class AFLPanel(commands.Cog):
                     self.attack_teams["cooldown"] = False
 
             embed.description = (
-                "```ansi\n"
-                "[2;31m+=======================================+[0m\n"
-                "[2;31m|[0m [2;34mPERCEPTOR ATTACK SYSTEM[0m               [2;31m|[0m\n"
-                "[2;31m|[0m [2;37mVersion[0m: 2.0.0                        [2;31m|[0m\n"
-                "[2;31m|[0m [2;32mStatus[0m: [2;32mOPERATIONAL[0m                    [2;31m|[0m\n"
-                "[2;31m+=======================================+[0m\n```\n"
-                
-                "**📡 System Overview:**\n"
-                "• Real-time perceptor monitoring active\n"
-                "• Tactical AVA deployment ready\n"
-                "• Neural network prediction engine online\n"
+                ADMIN_HEADER +
                 f"• Last attack: {self.stats['last_attack'].strftime('%H:%M:%S')}\n"
             )
 
@@ -206,65 +272,28 @@ class AFLPanel(commands.Cog):
             )
 
             # Add a live map with pseudo-ASCII art
-            embed.add_field(
-                name="🗺️ Tactical Map",
-                value=(
-                    "```\n"
-                    "      N       \n"
-                    "      ^       \n"
-                    "  +---+---+   \n"
-                    "W <   *   > E \n"
-                    "  +---+---+   \n"
-                    "      v       \n"
-                    "      S       \n"
-                    "```"
-                ),
-                inline=False
-            )
+            embed.add_field(name="🗺️ Tactical Map", value=TACTICAL_MAP, inline=False)
 
             # Add recent activity log
-            embed.add_field(
-                name="📋 Recent Activity",
-                value=(
-                    "```diff\n"
-                    "+ [12:45] Target acquired: Eastern Perceptor\n"
-                    "- [11:30] Defense alert: Western approach\n"
-                    "+ [10:15] Attack successful: +25 territories\n"
-                    "```"
-                ),
-                inline=False
-            )
+            embed.add_field(name="📋 Recent Activity", value=RECENT_ACTIVITY, inline=False)
 
         else:
             # Non-admin view
-            embed.description = (
-                "```ansi\n"
-                "[2;31m+=======================================+[0m\n"
-                "[2;31m|[0m [2;34mAFL ATTACK SYSTEM[0m                     [2;31m|[0m\n"
-                "[2;31m|[0m [2;37mSECURITY LEVEL[0m: [2;31mRED[0m                  [2;31m|[0m\n"
-                "[2;31m|[0m [2;31mACCESS DENIED - ADMIN PRIVILEGES REQUIRED[0m [2;31m|[0m\n"
-                "[2;31m+=======================================+[0m\n```\n"
-                
-                "**⚠️ RESTRICTED ACCESS ⚠️**\n\n"
-                "This terminal requires elevated permissions.\n"
-                "Please contact a guild officer for assistance.\n\n"
-                "```\nSYSTEM: LOCKED\nBIOSCAN: NEGATIVE\nIDENTITY: UNVERIFIED\n```"
-            )
+            embed.description = PUBLIC_DESCRIPTION
 
             # Add encrypted fields
-            for i in range(3):
-                embed.add_field(
-                    name=f"📌 {'#' * random.randint(5, 10)}",
-                    value="```\n" + "\n".join(["=" * random.randint(10, 20) for _ in range(3)]) + "\n```",
-                    inline=True
-                )
+            for name, value in self.encrypted_fields:
+                embed.add_field(name=name, value=value, inline=True)
+
+        return embed
 
+    def set_panel_footer(self, embed: discord.Embed):
         # Add system info footer
         uptime = "98.7%"
         latency = f"{round(self.bot.latency * 1000)}ms"
         embed.set_footer(
             text=f"⚡ System Uptime: {uptime} • Latency: {latency} • Last updated: {datetime.now().strftime('%H:%M:%S')}",
-            icon_url="https://i.imgur.com/JrRBTVu.png"  # Generic system icon
+            icon_url=FOOTER_ICON
         )
 
         return embed
@@ -661,56 +690,46 @@ class AFLPanel(commands.Cog):
             )
 
     async def update_panel(self):
-        """Update the panel message with the latest data"""
-        if not self.panel_message:
-            await self.ensure_panel()
-            return
-            
+        """Ask for a panel refresh; requests within PANEL_EDIT_WINDOW are merged into one"""
+        if self.refresh_task is None or self.refresh_task.done():
+            self.refresh_task = self.bot.loop.create_task(self._refresh_later())
+
+    async def _refresh_later(self):
+        await asyncio.sleep(PANEL_EDIT_WINDOW)
         try:
-            channel = self.bot.get_channel(self.PANEL_CHANNEL_ID)
-            if not channel:
-                return
-                
-            # Update with default view (non-admin)
-            default_embed = await self.create_panel_embed(is_admin=False)
-            view = self.AFLPanelView(self)
-            
-            await self.panel_message.edit(embed=default_embed, view=view)
-        except discord.NotFound:
-            self.panel_message = None
             await self.ensure_panel()
         except Exception as e:
             print(f"Error updating panel: {e}")
 
-    async def ensure_panel(self):
-        """Make sure the panel exists in the channel"""
+    async def ensure_panel(self, force: bool = False, verify: bool = False):
+        """Make sure the panel exists in the channel; edits it only when the rendered body changed.
+
+        ``verify`` checks that an unchanged panel message still exists (used at startup).
+        """
         channel = self.bot.get_channel(self.PANEL_CHANNEL_ID)
         if not channel:
             print(f"❌ Channel {self.PANEL_CHANNEL_ID} not found.")
             return
 
-        if not self.panel_message:
-            async for msg in channel.history(limit=20):
-                if msg.author == self.bot.user and msg.pinned:
-                    self.panel_message = msg
-                    break
-
-        view = self.AFLPanelView(self)
-        default_embed = await self.create_panel_embed(is_admin=False)
+        # The footer's clock and latency change on every render, so they don't count as a change
+        default_embed = self.render_panel_body(is_admin=False)
+        signature = payload_hash(embed=default_embed, view=self.panel_view)
+        self.set_panel_footer(default_embed)
 
-        if self.panel_message:
-            try:
-                await self.panel_message.edit(embed=default_embed, view=view)
-            except discord.NotFound:
-                self.panel_message = None
-                await self.ensure_panel()
-        else:
-            self.panel_message = await channel.send(embed=default_embed, view=view)
-            await self.panel_message.pin(reason="AFL Panel System")
+        # Panels pinned before the registry existed are looked up once
+        await self.registry.adopt_pinned(PANEL_NAME, channel, self.panel_view)
+        self.panel_message = await self.registry.publish(
+            PANEL_NAME, channel, embed=default_embed, view=self.panel_view,
+            pin=True, force=force, verify=verify, content_hash=signature
+        )
 
     @commands.Cog.listener()
     async def on_ready(self):
-        await self.ensure_panel()
+        # on_ready fires again after reconnects; the panel and loop only need starting once
+        if self.update_task and not self.update_task.done():
+            return
+        # The panel may have been deleted while the bot was offline
+        await self.ensure_panel(verify=True)
         await self.start_update_loop()
         print(f"✅ AFL Panel System v2.0 operational • {datetime.now().strftime('%d/%m/%Y %H:%M')}")
 
@@ -719,7 +738,7 @@ class AFLPanel(commands.Cog):
     async def refreshpanel(self, ctx):
         """Admin command to force refresh the panel"""
         await ctx.message.delete()
-        await self.update_panel()
+        await self.ensure_panel(force=True)
         await ctx.send("🔄 AFL Panel refreshed!", delete_after=5)
 
 async def setup(bot: commands.Bot):
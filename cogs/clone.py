@@ -2,11 +2,21 @@ import discord
 from discord.ext import commands
 import logging
 import asyncio
+import time
+from collections import defaultdict, deque
+import aiohttp
 from discord import app_commands
+from bulk_scheduler import get_scheduler, channel_route
+from mirror_store import MirrorStore
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+WEBHOOK_NAME = "Mirror"
+MAX_MESSAGE_LENGTH = 2000
+MAX_PACKED_MESSAGES = 10  # Burst messages from one author folded into a single post
+MAX_DELIVERY_ATTEMPTS = 5
+
 class CloneFeature(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -19,55 +29,99 @@ class CloneFeature(commands.Cog):
             1348894829353897984: "alliance•counsel",
             1375693901809057912: "leaders"
         }
-        # Dictionary to store mappings between source and target channels
-        self.channel_mapping = {}
+        # Mirroring pipeline: durable queue, one in-memory queue + worker per target channel
+        self.store = MirrorStore()
+        # Dictionary to store mappings between source and target channels, restored from disk
+        self.channel_mapping = self.store.channel_mapping()
+        self.queues = {}
+        self.wakeups = {}
+        self.workers = {}
+        self.webhooks = {}
+        self.attempts = {}
+        self.stats = defaultdict(int)
         
     async def cog_load(self):
         logger.info("CloneFeature cog loaded successfully")
-        # Start a background task to handle setup after the bot is ready
+        # Resume whatever was still queued when the bot stopped
+        for queue_id, target_channel_id, kind, source_message_id, payload in self.store.pending():
+            self._queue_for(target_channel_id).append((queue_id, kind, source_message_id, payload))
+            self.wakeups[target_channel_id].set()
+        # Mirroring already works from the stored mapping; the clone job only reconciles drift
+        logger.info(f"Restored {len(self.channel_mapping)} channel mappings")
         self.bot.loop.create_task(self.delayed_setup())
         
     async def delayed_setup(self):
-        """Wait for bot to be ready, then run setup in background"""
+        """Wait for bot to be ready, then reconcile the clone in background"""
         try:
             # Wait for the bot to be fully ready
             await self.bot.wait_until_ready()
-            logger.info("Bot is ready, starting delayed setup...")
-            # Wait an additional 10 seconds to ensure everything is initialized
-            await asyncio.sleep(10)
             # Run the setup
             await self.auto_setup()
         except Exception as e:
             logger.exception(f"Error in delayed setup: {e}")
-        
-
     
-    async def rate_limited_create(self, target_guild, target_category, source_channel, ctx=None):
-        """Create a channel with rate limit handling"""
-        try:
-            # Create the channel in target guild
-            target_channel = await target_guild.create_text_channel(
-                name=source_channel.name,
+    async def create_channels(self, target_guild, target_category, source_channels):
+        """Create all missing channels as one job, as fast as the channel-create bucket allows"""
+        async def create(channel):
+            return await target_guild.create_text_channel(
+                name=channel.name,
                 category=target_category,
-                topic=source_channel.topic if hasattr(source_channel, 'topic') else None,
-                slowmode_delay=source_channel.slowmode_delay if hasattr(source_channel, 'slowmode_delay') else 0
+                topic=channel.topic if hasattr(channel, 'topic') else None,
+                slowmode_delay=channel.slowmode_delay if hasattr(channel, 'slowmode_delay') else 0
             )
-            
-            # Add delay to avoid rate limits
-            await asyncio.sleep(1.5)
-            
-            return target_channel
-        except discord.errors.HTTPException as e:
-            if e.status == 429:  # Rate limited
-                retry_after = e.retry_after
-                msg = f"Rate limited by Discord API. Waiting {retry_after:.2f} seconds before retrying..."
-                logger.warning(msg)
-                if ctx:
-                    await ctx.send(msg)
-                await asyncio.sleep(retry_after)
-                return await self.rate_limited_create(target_guild, target_category, source_channel, ctx)
+        
+        job = get_scheduler().submit(
+            f"clone {target_category.name}", source_channels, create,
+            route=lambda _: f"POST /guilds/{target_guild.id}/channels"
+        )
+        await job.wait()
+        for channel, error in job.failed:
+            logger.error(f"Failed to create channel '{channel.name}': {error}")
+        return job.results
+    
+    def map_overwrites(self, source_channel, target_guild):
+        """Translate a source channel's overwrites to the target guild's roles/members by name/ID"""
+        roles_by_name = {role.name: role for role in target_guild.roles}
+        overwrites = {}
+        for target, overwrite in source_channel.overwrites.items():
+            if isinstance(target, discord.Role):
+                mapped = target_guild.default_role if target.is_default() else roles_by_name.get(target.name)
             else:
-                raise
+                mapped = target_guild.get_member(target.id)
+            if mapped is not None:
+                overwrites[mapped] = overwrite
+        return overwrites
+    
+    async def sync_layout(self, pairs, target_guild, target_category):
+        """Apply source positions in one bulk request and overwrites only where they differ"""
+        # Reuse the slots the targets already occupy, ordered like the source channels
+        ordered = sorted(pairs, key=lambda pair: pair[0].position)
+        slots = sorted(target.position for _, target in pairs)
+        positions = [
+            {'id': target.id, 'position': slot, 'parent_id': target_category.id}
+            for (_, target), slot in zip(ordered, slots)
+            if target.position != slot or target.category_id != target_category.id
+        ]
+        if positions:
+            await self.bot.http.bulk_channel_update(target_guild.id, positions, reason="Category clone layout")
+        
+        edits = []
+        for source, target in pairs:
+            overwrites = self.map_overwrites(source, target_guild)
+            if overwrites != target.overwrites:
+                edits.append((target, overwrites))
+        if edits:
+            async def apply(edit):
+                channel, overwrites = edit
+                await channel.edit(overwrites=overwrites, reason="Category clone permissions")
+            
+            job = get_scheduler().submit(
+                "clone overwrites", edits, apply, route=lambda edit: channel_route(edit[0])
+            )
+            await job.wait()
+            for (channel, _), error in job.failed:
+                logger.error(f"Failed to copy permissions to '{channel.name}': {error}")
+        return len(positions), len(edits)
     
     async def auto_setup(self):
         """Automatically setup the category cloning without requiring a command"""
@@ -153,7 +207,6 @@ class CloneFeature(commands.Cog):
                 # Create the category in the target guild with rate limit handling
                 try:
                     target_category = await target_guild.create_category(source_category.name)
-                    await asyncio.sleep(1.5)  # Add delay to avoid rate limits
                     msg = f"Created category '{source_category.name}' in target guild."
                     logger.info(msg)
                     if ctx:
@@ -170,46 +223,46 @@ class CloneFeature(commands.Cog):
                     else:
                         raise
             
-            # Clone each channel in the category
+            # Diff source against target: keep live mappings, adopt same-named channels, create the rest
+            mapping = {}
+            pairs = []
+            missing = []
             for channel_id, channel_name in self.source_channels.items():
                 source_channel = source_guild.get_channel(channel_id)
-                
-                if source_channel:
-                    # Check if we already have a mapping for this channel
-                    if channel_id in self.channel_mapping:
-                        target_channel_id = self.channel_mapping[channel_id]
-                        target_channel = self.bot.get_channel(target_channel_id)
-                        
-                        if target_channel:
-                            msg = f"Channel mapping for '{source_channel.name}' already exists."
-                            logger.info(msg)
-                            if ctx:
-                                await ctx.send(msg)
-                            continue
-                    
-                    # Check if a channel with the same name already exists in the target category
-                    existing_channel = discord.utils.get(target_category.text_channels, name=source_channel.name)
-                    if existing_channel:
-                        target_channel = existing_channel
-                        msg = f"Using existing channel '{source_channel.name}' in target guild."
-                        logger.info(msg)
-                        if ctx:
-                            await ctx.send(msg)
-                    else:
-                        # Create the channel with rate limit handling
-                        target_channel = await self.rate_limited_create(target_guild, target_category, source_channel, ctx)
-                        msg = f"Created channel '{source_channel.name}' in target guild."
-                        logger.info(msg)
-                        if ctx:
-                            await ctx.send(msg)
-                    
-                    # Store the mapping between source and target channels
-                    self.channel_mapping[source_channel.id] = target_channel.id
-                else:
+                if not source_channel:
                     msg = f"Source channel with ID {channel_id} not found!"
                     logger.warning(msg)
                     if ctx:
                         await ctx.send(msg)
+                    continue
+                
+                target_channel = self.bot.get_channel(self.channel_mapping.get(channel_id, 0))
+                if not target_channel:
+                    # Check if a channel with the same name already exists in the target category
+                    target_channel = discord.utils.get(target_category.text_channels, name=source_channel.name)
+                if target_channel:
+                    mapping[channel_id] = target_channel.id
+                    pairs.append((source_channel, target_channel))
+                else:
+                    missing.append(source_channel)
+            
+            created = await self.create_channels(target_guild, target_category, missing) if missing else []
+            for source_channel, target_channel in created:
+                mapping[source_channel.id] = target_channel.id
+                pairs.append((source_channel, target_channel))
+            
+            # Store the mapping between source and target channels
+            self.channel_mapping = mapping
+            self.store.save_channel_mapping(mapping)
+            
+            moved, permissions = await self.sync_layout(pairs, target_guild, target_category)
+            msg = (
+                f"Clone plan applied: {len(pairs) - len(created)} existing, {len(created)}/{len(missing)} created, "
+                f"{moved} repositioned, {permissions} permission updates."
+            )
+            logger.info(msg)
+            if ctx:
+                await ctx.send(msg)
             
             msg = "Category cloning complete! Messages will now be mirrored between the channels."
             logger.info(msg)
@@ -221,58 +274,207 @@ class CloneFeature(commands.Cog):
             if ctx:
                 await ctx.send(f"An error occurred: {str(e)}")
     
+    def render_message(self, message):
+        """Mirrored text: the message content plus attachment links, which Discord previews itself"""
+        parts = [message.content] if message.content else []
+        parts += [attachment.url for attachment in message.attachments]
+        return "\n".join(parts)[:MAX_MESSAGE_LENGTH]
+    
     @commands.Cog.listener()
     async def on_message(self, message):
-        # Ignore messages from bots to prevent loops
-        if message.author.bot:
+        # Ignore messages from bots (and our own webhooks) to prevent loops
+        if message.author.bot or message.webhook_id:
             return
             
         # Check if the message is in one of our source channels
-        if message.channel.id in self.channel_mapping:
+        target_channel_id = self.channel_mapping.get(message.channel.id)
+        if target_channel_id is None:
+            return
+        
+        content = self.render_message(message)
+        if not content:
+            return
+        
+        self.enqueue(target_channel_id, 'send', message.id, {
+            'content': content,
+            'author_id': message.author.id,
+            'username': message.author.display_name,
+            'avatar_url': message.author.display_avatar.url,
+            'created_at': message.created_at.timestamp()
+        })
+    
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        target_channel_id = self.channel_mapping.get(payload.channel_id)
+        # Embed-only updates (link previews) carry no content and change nothing in the mirror
+        if target_channel_id is None or 'content' not in payload.data:
+            return
+        
+        parts = [payload.data['content']] if payload.data['content'] else []
+        parts += [attachment['url'] for attachment in payload.data.get('attachments', [])]
+        self.enqueue(target_channel_id, 'edit', payload.message_id, {'content': "\n".join(parts)[:MAX_MESSAGE_LENGTH]})
+    
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        target_channel_id = self.channel_mapping.get(payload.channel_id)
+        if target_channel_id is not None:
+            self.enqueue(target_channel_id, 'delete', payload.message_id, {})
+    
+    def enqueue(self, target_channel_id, kind, source_message_id, payload):
+        """Persist a mirror operation, then hand it to the target channel's worker"""
+        queue_id = self.store.enqueue(target_channel_id, kind, source_message_id, payload)
+        self._queue_for(target_channel_id).append((queue_id, kind, source_message_id, payload))
+        self.wakeups[target_channel_id].set()
+    
+    def _queue_for(self, target_channel_id):
+        queue = self.queues.get(target_channel_id)
+        if queue is None:
+            queue = self.queues[target_channel_id] = deque()
+            self.wakeups[target_channel_id] = asyncio.Event()
+            self.workers[target_channel_id] = self.bot.loop.create_task(self.mirror_worker(target_channel_id))
+        return queue
+    
+    def take_batch(self, queue):
+        """Pop the next operation; consecutive sends by one author are packed into a single message"""
+        first = queue.popleft()
+        batch = [first]
+        if first[1] != 'send':
+            return batch
+        
+        length = len(first[3]['content'])
+        while queue and len(batch) < MAX_PACKED_MESSAGES:
+            _, kind, _, payload = queue[0]
+            if kind != 'send' or payload['author_id'] != first[3]['author_id']:
+                break
+            if length + 1 + len(payload['content']) > MAX_MESSAGE_LENGTH:
+                break
+            length += 1 + len(payload['content'])
+            batch.append(queue.popleft())
+        return batch
+    
+    async def mirror_worker(self, target_channel_id):
+        """Deliver one target channel's operations in order"""
+        await self.bot.wait_until_ready()
+        queue = self.queues[target_channel_id]
+        wakeup = self.wakeups[target_channel_id]
+        
+        while True:
+            if not queue:
+                wakeup.clear()
+                await wakeup.wait()
+                continue
+            
+            batch = self.take_batch(queue)
+            queue_ids = [item[0] for item in batch]
             try:
-                # Get the target channel
-                target_channel_id = self.channel_mapping[message.channel.id]
-                target_channel = self.bot.get_channel(target_channel_id)
-                
-                if not target_channel:
-                    logger.error(f"Target channel with ID {target_channel_id} not found!")
-                    return
-                
-                # Create an embed for the mirrored message
-                embed = discord.Embed(
-                    description=message.content,
-                    color=discord.Color.blue(),
-                    timestamp=message.created_at
-                )
-                
-                # Add author information
-                embed.set_author(
-                    name=message.author.display_name,
-                    icon_url=message.author.avatar.url if message.author.avatar else None
-                )
-                
-                # Handle attachments
-                if message.attachments:
-                    attachment = message.attachments[0]
-                    if attachment.content_type and attachment.content_type.startswith('image/'):
-                        embed.set_image(url=attachment.url)
-                    else:
-                        embed.add_field(name="Attachment", value=f"[{attachment.filename}]({attachment.url})")
-                
-                # Send the mirrored message with rate limit handling
-                try:
-                    await target_channel.send(embed=embed)
-                except discord.errors.HTTPException as e:
-                    if e.status == 429:  # Rate limited
-                        retry_after = e.retry_after
-                        logger.warning(f"Rate limited when sending message. Waiting {retry_after:.2f} seconds")
-                        await asyncio.sleep(retry_after)
-                        await target_channel.send(embed=embed)
-                    else:
-                        raise
-                
-            except Exception as e:
+                await self.deliver(target_channel_id, batch)
+            except asyncio.CancelledError:
+                raise
+            except (discord.HTTPException, discord.RateLimited, aiohttp.ClientError) as e:
+                status = getattr(e, 'status', 500)
+                if isinstance(e, discord.NotFound):
+                    # Webhook removed by someone: fetch a new one on the next attempt
+                    self.webhooks.pop(target_channel_id, None)
+                attempts = self.attempts[queue_ids[0]] = self.attempts.get(queue_ids[0], 0) + 1
+                if (status >= 500 or status in (404, 429)) and attempts < MAX_DELIVERY_ATTEMPTS:
+                    logger.warning(f"Mirroring to {target_channel_id} failed ({e}), retrying")
+                    queue.extendleft(reversed(batch))
+                    await asyncio.sleep(2 ** attempts)
+                    continue
+                logger.error(f"Dropping {len(batch)} mirror operation(s) for {target_channel_id}: {e}")
+                self.stats['dropped'] += len(batch)
+            except Exception:
                 logger.exception("Error mirroring message")
+                self.stats['dropped'] += len(batch)
+            
+            for queue_id in queue_ids:
+                self.attempts.pop(queue_id, None)
+            self.store.ack(queue_ids)
+    
+    async def get_webhook(self, target_channel_id):
+        """Our webhook in the target channel, reused across restarts"""
+        webhook = self.webhooks.get(target_channel_id)
+        if webhook:
+            return webhook
+        
+        target_channel = self.bot.get_channel(target_channel_id)
+        if not target_channel:
+            raise LookupError(f"Target channel with ID {target_channel_id} not found!")
+        
+        for existing in await target_channel.webhooks():
+            if existing.user and existing.user.id == self.bot.user.id and existing.name == WEBHOOK_NAME:
+                webhook = existing
+                break
+        else:
+            webhook = await target_channel.create_webhook(name=WEBHOOK_NAME, reason="Channel mirroring")
+        
+        self.webhooks[target_channel_id] = webhook
+        return webhook
+    
+    async def deliver(self, target_channel_id, batch):
+        webhook = await self.get_webhook(target_channel_id)
+        _, kind, source_message_id, payload = batch[0]
+        
+        if kind == 'send':
+            # Webhooks can't be named after Discord itself
+            username = payload['username'].replace('discord', 'disc0rd').replace('Discord', 'Disc0rd')[:80] or 'Unknown'
+            sent = await webhook.send(
+                content="\n".join(item[3]['content'] for item in batch),
+                username=username,
+                avatar_url=payload['avatar_url'],
+                allowed_mentions=discord.AllowedMentions.none(),
+                wait=True
+            )
+            self.store.map_messages(
+                target_channel_id, sent.id, [(item[2], item[3]['content']) for item in batch]
+            )
+            # Lag is measured from the oldest message in the pack
+            lag = time.time() - payload['created_at']
+            self.stats['delivered'] += len(batch)
+            self.stats['sent'] += 1
+            self.stats['last_lag'] = lag
+            self.stats['max_lag'] = max(self.stats['max_lag'], lag)
+            return
+        
+        mapped = self.store.target_of(source_message_id)
+        if mapped is None:
+            # Never mirrored, or older than the message map keeps
+            return
+        target_message_id = mapped[1]
+        
+        if kind == 'edit':
+            content = payload['content']
+            parts = self.store.parts_of(target_message_id)
+            others = sum(len(part) + 1 for part_id, part in parts if part_id != source_message_id)
+            if others + len(content) > MAX_MESSAGE_LENGTH:
+                # The edit grew its part past what the pack can hold; trim it so the other parts stay intact
+                content = content[:max(0, MAX_MESSAGE_LENGTH - others)]
+            self.store.update_content(source_message_id, content)
+        else:
+            self.store.forget(source_message_id)
+        
+        parts = self.store.parts_of(target_message_id)
+        if parts:
+            # Packed message: re-render it from the parts that remain
+            await webhook.edit_message(
+                target_message_id,
+                content="\n".join(content for _, content in parts)[:MAX_MESSAGE_LENGTH],
+                allowed_mentions=discord.AllowedMentions.none()
+            )
+        else:
+            await webhook.delete_message(target_message_id)
+        self.stats[f"{kind}s"] += 1
+    
+    @commands.command(name="mirror_stats")
+    @commands.has_permissions(administrator=True)
+    async def mirror_stats(self, ctx):
+        """Show mirroring throughput, lag and queue depth"""
+        depth = sum(len(queue) for queue in self.queues.values())
+        await ctx.send(
+            f"📊 Mirrored: {self.stats['delivered']} messages in {self.stats['sent']} posts | "
+            f"Edits: {self.stats['edits']} | Deletes: {self.stats['deletes']} | Dropped: {self.stats['dropped']}\n"
+            f"⏱️ Lag: last {self.stats['last_lag']:.2f}s, max {self.stats['max_lag']:.2f}s | Queued: {depth}"
+        )
     
     @commands.command(name="clonesetup")
     @commands.has_permissions(administrator=True)
@@ -306,8 +508,14 @@ class CloneFeature(commands.Cog):
     async def clear_mappings(self, ctx):
         """Clear all channel mappings"""
         self.channel_mapping = {}
+        self.store.save_channel_mapping(self.channel_mapping)
         await ctx.send("All channel mappings have been cleared.")
 
+    def cog_unload(self):
+        for worker in self.workers.values():
+            worker.cancel()
+        self.store.close()
+
 async def setup(bot):
     try:
         await bot.add_cog(CloneFeature(bot))
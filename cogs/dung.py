@@ -9,6 +9,7 @@
 import re
 import asyncio
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Optional, Tuple
 
@@ -16,6 +17,10 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
+from dungeon_tickets import STATUS_ARCHIVED, STATUS_CLOSED, STATUS_OPEN, TicketIndex
+from game_constants import CHARACTER_CLASSES
+from panel_registry import get_panel_registry
+
 logger = logging.getLogger(__name__)
 
 # ===== Configuration =====
@@ -25,13 +30,6 @@ BANNER_URL = "https://github.com/Momonga-OP/spectra/blob/main/Life.png?raw=true"
 COOLDOWN_MINUTES = 10  # Global per-user cooldown across all dungeons
 AUTO_ARCHIVE_MINUTES = 1440  # 24 hours
 
-# Character classes for the dropdown
-CHARACTER_CLASSES = [
-    "Iop", "Cra", "Eniripsa", "Enutrof", "Sram", "Xelor", "Ecaflip", "Sacrier",
-    "Sadida", "Osamodas", "Pandawa", "Feca",
-    "Masqueraider", "Rogue"
-]
-
 # Custom emojis (IDs must exist in the guild)
 DUNGEONS = {
     "nileza": {
@@ -63,10 +61,17 @@ DUNGEONS = {
 
 # Requester marker persisted in thread message content (survives restarts)
 REQUESTER_MARKER_RE = re.compile(r"REQUESTER_ID:(\d+)")
+DUNGEON_MARKER_RE = re.compile(r"DUNGEON_KEY:(\w+)")
+# Ticket threads are named "[F3] <dungeon> — <name> (<class>)"
+THREAD_PREFIX = "[F3]"
+# Open tickets listed per dungeon on the dashboard
+DASHBOARD_TICKETS_PER_DUNGEON = 8
 # Allowed mentions: allow role + user pings, never @everyone
 ALLOWED_MENTIONS = discord.AllowedMentions(everyone=False, users=True, roles=True)
 # Fixed custom_id prefix for persistent buttons
 CUSTOM_ID_PREFIX = "f3_dung_btn"
+# Panel registry name (one panel per channel)
+PANEL_NAME = "dungeon"
 
 
 def utcnow() -> datetime:
@@ -144,7 +149,7 @@ class DungeonVerificationModal(discord.ui.Modal):
             )
         
         dungeon_name = self.dungeon_data["name"]
-        thread_name = f"[F3] {dungeon_name} — {self.ingame_name.value} ({valid_class})"
+        thread_name = f"{THREAD_PREFIX} {dungeon_name} — {self.ingame_name.value} ({valid_class})"
         thread_name = thread_name[:100]  # Discord limit
         
         try:
@@ -156,8 +161,16 @@ class DungeonVerificationModal(discord.ui.Modal):
                 reason=f"Dungeon help request by {interaction.user} for {dungeon_name}",
             )
 
-            # Persist requester mapping in memory and in a thread message marker
+            # Persist requester mapping in memory, in the ticket index and in a thread message marker
             self.cog.thread_requesters[thread.id] = interaction.user.id
+            self.cog.index.open_ticket(
+                thread.id,
+                interaction.guild.id,
+                interaction.user.id,
+                self.dungeon_key,
+                character_class=valid_class,
+                ingame_name=self.ingame_name.value,
+            )
 
             # Compose a single text message that includes actual pings + durable markers
             role_mention = f"<@&{HELPER_ROLE_ID}>"
@@ -374,14 +387,21 @@ class DungeonCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-        # Global per-user cooldowns (shared across all buttons)
-        self._cooldowns: Dict[int, datetime] = {}
+        # Persistent ticket index + cooldowns (survive restarts)
+        self.index = TicketIndex()
 
-        # Thread -> requester mapping (in-memory) + persisted via message marker
-        self.thread_requesters: Dict[int, int] = {}
+        # Global per-user cooldowns (shared across all buttons), cached from the index
+        self._cooldowns: Dict[int, datetime] = {
+            user_id: datetime.fromtimestamp(until, timezone.utc)
+            for user_id, until in self.index.cooldowns().items()
+        }
+
+        # Thread -> requester mapping, cached from the index (message markers are the fallback)
+        self.thread_requesters: Dict[int, int] = self.index.requesters()
 
         # Track if persistent view has been registered
         self._views_registered = False
+        self._index_warmed = False
 
     async def cog_load(self):
         """Register the persistent view at cog load."""
@@ -397,6 +417,79 @@ class DungeonCog(commands.Cog):
                 "Role checks and some user data may be unreliable."
             )
 
+    async def cog_unload(self):
+        self.index.close()
+
+    # ===== Ticket index =====
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Reconcile the index with the live threads once, one active_threads() call per guild."""
+        if self._index_warmed:
+            return
+        self._index_warmed = True
+        for guild in self.bot.guilds:
+            try:
+                await self.warm_index(guild)
+            except discord.HTTPException:
+                logger.exception("Failed to warm the ticket index for guild %s.", guild.id)
+
+    async def warm_index(self, guild: discord.Guild):
+        threads = await guild.active_threads()
+        active = {thread.id: thread for thread in threads if thread.name.startswith(THREAD_PREFIX)}
+
+        # Tickets created while the bot was offline or before the index existed
+        for thread in active.values():
+            ticket = self.index.get(thread.id)
+            if ticket is None:
+                await self.index_from_markers(thread)
+            elif ticket["status"] == STATUS_ARCHIVED:
+                self.index.set_status(thread.id, STATUS_OPEN)
+
+        # Tickets whose threads were archived or deleted in the meantime
+        for thread_id in self.index.unclosed_thread_ids(guild.id):
+            if thread_id not in active:
+                self.index.set_status(thread_id, STATUS_ARCHIVED)
+
+        logger.info("Ticket index warmed for %s: %d active ticket threads.", guild.name, len(active))
+
+    async def index_from_markers(self, thread: discord.Thread) -> Optional[int]:
+        """Index a ticket from its intro message markers; returns the requester ID."""
+        try:
+            async for msg in thread.history(limit=100, oldest_first=True):
+                if msg.author.id == self.bot.user.id and msg.content:
+                    m = REQUESTER_MARKER_RE.search(msg.content)
+                    if m:
+                        rid = int(m.group(1))
+                        key = DUNGEON_MARKER_RE.search(msg.content)
+                        self.index.open_ticket(
+                            thread.id,
+                            thread.guild.id,
+                            rid,
+                            key.group(1) if key else "unknown",
+                            created_at=msg.created_at.timestamp(),
+                        )
+                        if thread.archived:
+                            self.index.set_status(thread.id, STATUS_ARCHIVED)
+                        self.thread_requesters[thread.id] = rid
+                        return rid
+        except discord.HTTPException:
+            logger.exception("Failed to scan thread history to resolve requester.")
+        return None
+
+    @commands.Cog.listener()
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread):
+        if after.id not in self.thread_requesters or before.archived == after.archived:
+            return
+        # /close locks the thread and records the close itself
+        if after.locked:
+            return
+        self.index.set_status(after.id, STATUS_ARCHIVED if after.archived else STATUS_OPEN)
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        if self.thread_requesters.pop(payload.thread_id, None) is not None:
+            self.index.set_status(payload.thread_id, STATUS_CLOSED)
+
     # ===== Cooldown helpers =====
     def check_cooldown(self, user_id: int) -> Tuple[bool, float]:
         """Return (ok, seconds_remaining)."""
@@ -411,7 +504,9 @@ class DungeonCog(commands.Cog):
         return False, remaining
 
     def set_cooldown(self, user_id: int):
-        self._cooldowns[user_id] = utcnow() + timedelta(minutes=COOLDOWN_MINUTES)
+        until = utcnow() + timedelta(minutes=COOLDOWN_MINUTES)
+        self._cooldowns[user_id] = until
+        self.index.set_cooldown(user_id, until.timestamp())
 
     # ===== Logging =====
     async def log_request(
@@ -458,25 +553,19 @@ class DungeonCog(commands.Cog):
 
     # ===== Utilities =====
     async def resolve_requester_id_from_thread(self, thread: discord.Thread) -> Optional[int]:
-        """Resolve requester ID for a thread via in-memory map or by scanning messages."""
+        """Resolve requester ID for a thread via the in-memory map, the index, or by scanning messages."""
         # 1) In-memory first
         requester_id = self.thread_requesters.get(thread.id)
         if requester_id:
             return requester_id
 
-        # 2) Scan thread history for marker
-        try:
-            async for msg in thread.history(limit=100, oldest_first=True):
-                if msg.author.id == self.bot.user.id and msg.content:
-                    m = REQUESTER_MARKER_RE.search(msg.content)
-                    if m:
-                        rid = int(m.group(1))
-                        self.thread_requesters[thread.id] = rid
-                        return rid
-        except discord.HTTPException:
-            logger.exception("Failed to scan thread history to resolve requester.")
+        # 2) Ticket index (closed tickets are not cached in memory)
+        ticket = self.index.get(thread.id)
+        if ticket:
+            return ticket["requester_id"]
 
-        return None
+        # 3) Scan thread history for marker (tickets older than the index)
+        return await self.index_from_markers(thread)
 
     async def member_has_helper_role(self, member: discord.Member) -> bool:
         """Check helper role with fallbacks."""
@@ -544,14 +633,18 @@ class DungeonCog(commands.Cog):
 
         view = DungeonView(self)
 
+        # Re-running the command updates this channel's panel instead of posting a copy,
+        # and re-posts it if it was deleted
+        await interaction.response.defer(ephemeral=True)
         try:
-            await interaction.response.send_message(embed=embed, view=view)
+            await get_panel_registry().publish(PANEL_NAME, interaction.channel, embed=embed, view=view, verify=True)
+            await interaction.followup.send("✅ Dungeon panel is up to date.", ephemeral=True)
         except discord.Forbidden:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "❌ Error: I can't send the panel here (missing permissions).", ephemeral=True
             )
         except discord.HTTPException:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "❌ Error: Failed to send the panel. Please try again.", ephemeral=True
             )
 
@@ -598,6 +691,95 @@ class DungeonCog(commands.Cog):
                 ephemeral=True,
             )
 
+        self.index.set_status(thread.id, STATUS_CLOSED, closed_by=interaction.user.id)
+        self.thread_requesters.pop(thread.id, None)
+
+    async def can_view_dashboard(self, interaction: discord.Interaction) -> bool:
+        if not isinstance(interaction.user, discord.Member):
+            return False
+        if interaction.user.guild_permissions.manage_threads:
+            return True
+        return await self.member_has_helper_role(interaction.user)
+
+    @app_commands.command(name="dungtickets", description="Show open dungeon help tickets, longest waiting first.")
+    async def tickets_command(self, interaction: discord.Interaction):
+        if interaction.guild is None:
+            return await interaction.response.send_message(
+                "❌ Error: This command can only be used in a server.", ephemeral=True
+            )
+        if not await self.can_view_dashboard(interaction):
+            return await interaction.response.send_message(
+                "Only helpers or moderators can view the ticket dashboard.", ephemeral=True
+            )
+
+        by_dungeon = defaultdict(list)
+        for ticket in self.index.open_tickets(interaction.guild.id, limit=500):
+            by_dungeon[ticket["dungeon_key"]].append(ticket)
+
+        embed = discord.Embed(
+            title="🏰 Open Dungeon Tickets",
+            color=discord.Color.blue(),
+            timestamp=utcnow(),
+        )
+        if not by_dungeon:
+            embed.description = "No open tickets. 🎉"
+        for key, tickets in by_dungeon.items():
+            lines = [
+                f"• <#{t['thread_id']}> — <@{t['requester_id']}>"
+                f"{' (' + t['character_class'] + ')' if t['character_class'] else ''}"
+                f" · opened <t:{int(t['created_at'])}:R>"
+                for t in tickets[:DASHBOARD_TICKETS_PER_DUNGEON]
+            ]
+            if len(tickets) > DASHBOARD_TICKETS_PER_DUNGEON:
+                lines.append(f"…and {len(tickets) - DASHBOARD_TICKETS_PER_DUNGEON} more")
+            name = DUNGEONS.get(key, {}).get("name", key)
+            embed.add_field(name=f"{name} ({len(tickets)})", value="\n".join(lines)[:1024], inline=False)
+        embed.set_footer(text="Life Alliance • Dungeon Service")
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="dungstats", description="Show per-dungeon queue statistics.")
+    async def stats_command(self, interaction: discord.Interaction):
+        if interaction.guild is None:
+            return await interaction.response.send_message(
+                "❌ Error: This command can only be used in a server.", ephemeral=True
+            )
+        if not await self.can_view_dashboard(interaction):
+            return await interaction.response.send_message(
+                "Only helpers or moderators can view the queue statistics.", ephemeral=True
+            )
+
+        stats = self.index.dungeon_stats(interaction.guild.id)
+        embed = discord.Embed(
+            title="📊 Dungeon Queue Statistics",
+            color=discord.Color.blue(),
+            timestamp=utcnow(),
+        )
+        if not stats:
+            embed.description = "No tickets recorded yet."
+        for key, data in DUNGEONS.items():
+            entry = stats.get(key)
+            if not entry:
+                continue
+            oldest = f"<t:{int(entry['oldest_open'])}:R>" if entry["oldest_open"] else "—"
+            if entry["mean_close"] is not None:
+                hours, rest = divmod(int(entry["mean_close"]), 3600)
+                mean_close = f"{hours}h {rest // 60}m"
+            else:
+                mean_close = "—"
+            embed.add_field(
+                name=data["name"],
+                value=(
+                    f"**Open:** {entry[STATUS_OPEN]} · **Archived:** {entry[STATUS_ARCHIVED]}\n"
+                    f"**Oldest open:** {oldest}\n"
+                    f"**Closed (7d):** {entry[STATUS_CLOSED]} · **Avg. time to close:** {mean_close}"
+                ),
+                inline=False,
+            )
+        embed.set_footer(text="Life Alliance • Dungeon Service")
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 
 async def setup(bot: commands.Bot):
     """discord.py extension entrypoint."""
@@ -5,6 +5,10 @@ import random
 from typing import Dict, Any
 from datetime import datetime
 
+from panel_registry import get_panel_registry
+
+PANEL_NAME = "guild_alerts"
+
 # Server Configuration
 GUILD_CONFIG: Dict[str, Any] = {
     "id": 1213699457233985587,
@@ -259,6 +263,12 @@ class GuildAlertCog(commands.Cog):
     """Guild alert management system"""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.registry = get_panel_registry()
+        self.panel_deployed = False
+
+    async def cog_load(self):
+        """Re-attach the guild buttons to the recorded panel"""
+        self.registry.attach(self.bot, PANEL_NAME, lambda: GuildPingView(self.bot))
 
     async def deploy_panel(self):
         """Deploy the guild ping panel"""
@@ -302,20 +312,10 @@ class GuildAlertCog(commands.Cog):
                 text="Life Alliance Defense Network • Stay Strong, Fight Together"
             )
 
-            # Check if there's already a pinned message to edit
-            print("Checking for existing pinned messages...")
-            async for message in channel.history(limit=50):
-                if message.pinned and message.author == self.bot.user:
-                    print("Found existing pinned message, updating...")
-                    await message.edit(embed=panel_embed, view=view)
-                    print("✅ Panel updated successfully!")
-                    return
-
-            # Create new message if no pinned message found
-            print("No existing pinned message found, creating new one...")
-            new_message = await channel.send(embed=panel_embed, view=view)
-            await new_message.pin()
-            print("✅ New panel created and pinned successfully!")
+            # Edits only when the panel changed, creates and pins it if it's missing (checked once per startup)
+            await self.registry.adopt_pinned(PANEL_NAME, channel, view)
+            await self.registry.publish(PANEL_NAME, channel, embed=panel_embed, view=view, pin=True, verify=True)
+            print("✅ Panel is up to date!")
 
         except Exception as e:
             print(f"❌ Error deploying panel: {e}")
@@ -325,6 +325,10 @@ class GuildAlertCog(commands.Cog):
     @commands.Cog.listener()
     async def on_ready(self):
         """Initialize system on bot startup"""
+        # on_ready fires again after reconnects; the panel only needs checking once
+        if self.panel_deployed:
+            return
+        self.panel_deployed = True
         print("Bot is ready, deploying panel...")
         await self.deploy_panel()
         print("⚔️ Life Alliance Attack Alert System is ready for battle! ⚔️")
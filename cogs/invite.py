@@ -1,5 +1,10 @@
+import asyncio
 import discord
 from discord.ext import commands
+from invite_ledger import InviteLedger
+
+# Joins arriving within this window share one invite refresh
+JOIN_BATCH_WINDOW = 1.5
 
 class MultiServerInviteTracker(commands.Cog):
     def __init__(self, bot):
@@ -8,20 +13,27 @@ class MultiServerInviteTracker(commands.Cog):
         self.server_configs = {
             1214430768143671377: {  # Server 1
                 'notification_channel_id': 1214430770962239492,
-                'invites': {},
-                'member_inviter_map': {}  # Track who invited each member
+                'invites': {}
             },
             1213699457233985587: {  # Server 2
                 'notification_channel_id': 1376299601358885066,
-                'invites': {},
-                'member_inviter_map': {}  # Track who invited each member
+                'invites': {}
             },
             1363616633951748270: {  # Server 3
                 'notification_channel_id': 1390328355458383993,
-                'invites': {},
-                'member_inviter_map': {}  # Track who invited each member
+                'invites': {}
             }
         }
+        # guild_id -> members waiting for attribution, and the task draining them
+        self.pending_joins = {}
+        self.attribution_tasks = {}
+        # Who invited whom, kept on disk so attribution survives restarts
+        self.ledger = InviteLedger()
+
+    def cog_unload(self):
+        for task in self.attribution_tasks.values():
+            task.cancel()
+        self.ledger.close()
 
     async def fetch_invites_for_guild(self, guild_id):
         """Fetch invites for a specific guild"""
@@ -31,6 +43,11 @@ class MultiServerInviteTracker(commands.Cog):
                 invites = await guild.invites()
                 self.server_configs[guild_id]['invites'] = {invite.code: invite for invite in invites}
                 print(f"Fetched {len(invites)} invites for guild {guild_id}")
+                if guild.vanity_url_code:
+                    # Baseline for attributing joins through the vanity URL
+                    vanity = await guild.vanity_invite()
+                    if vanity:
+                        self.server_configs[guild_id]['vanity_uses'] = vanity.uses
             except Exception as e:
                 print(f"Error fetching invites for guild {guild_id}: {e}")
 
@@ -52,90 +69,163 @@ class MultiServerInviteTracker(commands.Cog):
         if guild_id not in self.server_configs:
             return
 
-        guild = member.guild
-        config = self.server_configs[guild_id]
+        # Joins are attributed in per-guild batches, so a join wave costs one invite fetch per batch
+        self.pending_joins.setdefault(guild_id, []).append(member)
+        task = self.attribution_tasks.get(guild_id)
+        if task is None or task.done():
+            self.attribution_tasks[guild_id] = self.bot.loop.create_task(self.attribute_joins(member.guild))
+
+    async def attribute_joins(self, guild):
+        """Drain a guild's pending joins, one invite refresh per batch; only one runs per guild"""
+        config = self.server_configs[guild.id]
         notification_channel = guild.get_channel(config['notification_channel_id'])
 
-        try:
-            new_invites = await guild.invites()
-            inviter_found = None
-            invite_code_used = None
-            
-            # Find which invite was used
-            for invite in new_invites:
-                if invite.code in config['invites']:
-                    if invite.uses > config['invites'][invite.code].uses:
-                        inviter_found = invite.inviter
-                        invite_code_used = invite.code
-                        # Store who invited this member
-                        config['member_inviter_map'][member.id] = {
-                            'inviter_id': inviter_found.id if inviter_found else None,
-                            'inviter_name': inviter_found.display_name if inviter_found else 'Unknown',
-                            'invite_code': invite_code_used,
-                            'joined_at': member.joined_at
-                        }
-                        break
-            
-            # Send organized join notification
-            if notification_channel:
-                if inviter_found and invite_code_used:
-                    embed = discord.Embed(
-                        title="Member Joined",
-                        color=0x00ff00,  # Green color
-                        timestamp=discord.utils.utcnow()
-                    )
-                    embed.add_field(
-                        name="New Member",
-                        value=f"**Name:** {member.display_name}\n**Tag:** {member.name}#{member.discriminator}\n**ID:** {member.id}",
-                        inline=True
-                    )
-                    embed.add_field(
-                        name="Invitation Details",
-                        value=f"**Invited by:** {inviter_found.display_name}\n**Inviter ID:** {inviter_found.id}\n**Invite Code:** {invite_code_used}",
-                        inline=True
-                    )
-                    embed.add_field(
-                        name="Account Information",
-                        value=f"**Account Created:** {member.created_at.strftime('%Y-%m-%d %H:%M:%S UTC')}\n**Account Age:** {(discord.utils.utcnow() - member.created_at).days} days",
-                        inline=False
-                    )
-                    await notification_channel.send(embed=embed)
-                else:
-                    # Fallback for unknown invite source
+        retrying = []
+        while self.pending_joins.get(guild.id) or retrying:
+            # Let near-simultaneous joins land in the same batch
+            await asyncio.sleep(JOIN_BATCH_WINDOW)
+            # A batch whose refresh failed is retried once together with the joins that arrived since
+            is_retry = bool(retrying)
+            batch = retrying + self.pending_joins.pop(guild.id, [])
+            retrying = []
+
+            try:
+                new_invites = await guild.invites()
+                cached_invites = {**config.pop('recently_deleted', {}), **config['invites']}
+                attributions = self.match_invites(cached_invites, new_invites, batch)
+
+                unmatched = [member for member in batch if member.id not in attributions]
+                if unmatched:
+                    vanity = await self.vanity_attribution(guild, config, len(unmatched))
+                    for member in unmatched[:vanity]:
+                        attributions[member.id] = {'source': 'vanity', 'inviter': None, 'invite_code': guild.vanity_url_code}
+
+                # Update stored invites for this guild
+                config['invites'] = {invite.code: invite for invite in new_invites}
+            except Exception as e:
+                if notification_channel:
                     embed = discord.Embed(
-                        title="Member Joined",
-                        color=0xffaa00,  # Orange color for unknown
+                        title="Invite Tracking Error",
+                        description=f"An error occurred while tracking invites: {str(e)}",
+                        color=0xff0000,  # Red color
                         timestamp=discord.utils.utcnow()
                     )
-                    embed.add_field(
-                        name="New Member",
-                        value=f"**Name:** {member.display_name}\n**Tag:** {member.name}#{member.discriminator}\n**ID:** {member.id}",
-                        inline=True
-                    )
-                    embed.add_field(
-                        name="Invitation Details",
-                        value="**Source:** Unknown (possibly vanity URL, widget, or other)",
-                        inline=True
-                    )
-                    embed.add_field(
-                        name="Account Information",
-                        value=f"**Account Created:** {member.created_at.strftime('%Y-%m-%d %H:%M:%S UTC')}\n**Account Age:** {(discord.utils.utcnow() - member.created_at).days} days",
-                        inline=False
-                    )
-                    await notification_channel.send(embed=embed)
-            
-            # Update stored invites for this guild
-            config['invites'] = {invite.code: invite for invite in new_invites}
-            
-        except Exception as e:
-            if notification_channel:
-                embed = discord.Embed(
-                    title="Invite Tracking Error",
-                    description=f"An error occurred while tracking invites: {str(e)}",
-                    color=0xff0000,  # Red color
-                    timestamp=discord.utils.utcnow()
+                    try:
+                        await notification_channel.send(embed=embed)
+                    except Exception as send_error:
+                        print(f"Error sending invite tracking error for guild {guild.id}: {send_error}")
+                if not is_retry:
+                    retrying = batch
+                    continue
+                # Second failure: still record and announce the joins, with an unknown source
+                attributions = {}
+
+            for member in batch:
+                attribution = attributions.get(member.id)
+                inviter_found = attribution['inviter'] if attribution else None
+                # Store who invited this member
+                self.ledger.record_join(
+                    guild.id, member.id, str(member),
+                    source=attribution['source'] if attribution else 'unknown',
+                    inviter_id=inviter_found.id if inviter_found else None,
+                    inviter_name=inviter_found.display_name if inviter_found else None,
+                    invite_code=attribution['invite_code'] if attribution else None,
+                    joined_at=member.joined_at
                 )
-                await notification_channel.send(embed=embed)
+                try:
+                    await self.send_join_notification(notification_channel, member, attribution)
+                except Exception as e:
+                    print(f"Error sending join notification for {member.id}: {e}")
+
+    def match_invites(self, cached_invites, new_invites, batch):
+        """Attribute a batch of joiners from invite use-count deltas, in join order"""
+        used = []
+        seen = set()
+        for invite in new_invites:
+            seen.add(invite.code)
+            old = cached_invites.get(invite.code)
+            delta = invite.uses - (old.uses if old else 0)
+            used.extend([invite] * max(0, delta))
+
+        # A limited invite used up by this batch disappears from the list instead of counting up.
+        # Deleted or expired invites vanish too, so only credit one whose remaining uses fit
+        # within the joins still unexplained
+        now = discord.utils.utcnow()
+        for code, old in cached_invites.items():
+            if code in seen or not old.max_uses or old.uses >= old.max_uses:
+                continue
+            if old.expires_at and old.expires_at <= now:
+                continue
+            remaining = old.max_uses - old.uses
+            if remaining <= len(batch) - len(used):
+                used.extend([old] * remaining)
+
+        # With several codes used in one batch the exact pairing is a guess, so keep join order
+        ordered = sorted(batch, key=lambda member: member.joined_at or discord.utils.utcnow())
+        return {
+            member.id: {'source': 'invite', 'inviter': invite.inviter, 'invite_code': invite.code}
+            for member, invite in zip(ordered, used)
+        }
+
+    async def vanity_attribution(self, guild, config, unmatched):
+        """How many unmatched joins the vanity URL accounts for (one extra call, only when needed)"""
+        if not guild.vanity_url_code:
+            return 0
+        try:
+            vanity = await guild.vanity_invite()
+        except Exception as e:
+            print(f"Error fetching vanity invite for guild {guild.id}: {e}")
+            return 0
+        if vanity is None:
+            return 0
+        previous = config.get('vanity_uses')
+        config['vanity_uses'] = vanity.uses
+        if previous is None:
+            # No baseline yet: vanity is still the only remaining explanation
+            return unmatched
+        return min(unmatched, max(0, vanity.uses - previous))
+
+    async def send_join_notification(self, notification_channel, member, attribution):
+        """Send organized join notification"""
+        if not notification_channel:
+            return
+        inviter_found = attribution['inviter'] if attribution else None
+
+        embed = discord.Embed(
+            title="Member Joined",
+            color=0x00ff00 if attribution else 0xffaa00,  # Green, or orange for unknown
+            timestamp=discord.utils.utcnow()
+        )
+        embed.add_field(
+            name="New Member",
+            value=f"**Name:** {member.display_name}\n**Tag:** {member.name}#{member.discriminator}\n**ID:** {member.id}",
+            inline=True
+        )
+        if attribution and attribution['source'] == 'invite':
+            embed.add_field(
+                name="Invitation Details",
+                value=f"**Invited by:** {inviter_found.display_name if inviter_found else 'Unknown'}\n**Inviter ID:** {inviter_found.id if inviter_found else 'Unknown'}\n**Invite Code:** {attribution['invite_code']}",
+                inline=True
+            )
+        elif attribution:
+            embed.add_field(
+                name="Invitation Details",
+                value=f"**Source:** Vanity URL ({attribution['invite_code']})",
+                inline=True
+            )
+        else:
+            # Fallback for unknown invite source
+            embed.add_field(
+                name="Invitation Details",
+                value="**Source:** Unknown (possibly vanity URL, widget, or other)",
+                inline=True
+            )
+        embed.add_field(
+            name="Account Information",
+            value=f"**Account Created:** {member.created_at.strftime('%Y-%m-%d %H:%M:%S UTC')}\n**Account Age:** {(discord.utils.utcnow() - member.created_at).days} days",
+            inline=False
+        )
+        await notification_channel.send(embed=embed)
 
     @commands.Cog.listener()
     async def on_member_remove(self, member):
@@ -148,10 +238,10 @@ class MultiServerInviteTracker(commands.Cog):
         config = self.server_configs[guild_id]
         notification_channel = member.guild.get_channel(config['notification_channel_id'])
         
+        # Get inviter information if available, closing the join in the ledger either way
+        inviter_info = self.ledger.record_leave(guild_id, member.id)
+        
         if notification_channel:
-            # Get inviter information if available
-            inviter_info = config['member_inviter_map'].get(member.id)
-            
             embed = discord.Embed(
                 title="Member Left",
                 color=0xff4444,  # Red color
@@ -164,7 +254,7 @@ class MultiServerInviteTracker(commands.Cog):
                 inline=True
             )
             
-            if inviter_info:
+            if inviter_info and inviter_info['source'] == 'invite':
                 # Calculate how long they stayed
                 time_in_server = discord.utils.utcnow() - inviter_info['joined_at'] if inviter_info['joined_at'] else None
                 time_stayed = f"{time_in_server.days} days, {time_in_server.seconds // 3600} hours" if time_in_server else "Unknown"
@@ -179,6 +269,12 @@ class MultiServerInviteTracker(commands.Cog):
                     value=f"**Duration:** {time_stayed}",
                     inline=False
                 )
+            elif inviter_info and inviter_info['source'] == 'vanity':
+                embed.add_field(
+                    name="Original Invitation",
+                    value=f"**Source:** Vanity URL ({inviter_info['invite_code']})",
+                    inline=True
+                )
             else:
                 embed.add_field(
                     name="Original Invitation",
@@ -187,10 +283,6 @@ class MultiServerInviteTracker(commands.Cog):
                 )
             
             await notification_channel.send(embed=embed)
-            
-            # Clean up the inviter mapping
-            if member.id in config['member_inviter_map']:
-                del config['member_inviter_map'][member.id]
 
     @commands.Cog.listener()
     async def on_invite_create(self, invite):
@@ -236,7 +328,8 @@ class MultiServerInviteTracker(commands.Cog):
         config = self.server_configs[guild_id]
         
         if invite.code in config['invites']:
-            del config['invites'][invite.code]
+            # Kept until the next attribution batch: a used-up invite is deleted as its last use joins
+            config.setdefault('recently_deleted', {})[invite.code] = config['invites'].pop(invite.code)
 
         notification_channel = invite.guild.get_channel(config['notification_channel_id'])
         if notification_channel:
@@ -288,10 +381,23 @@ class MultiServerInviteTracker(commands.Cog):
                 inline=True
             )
         
+        # Ledger counters are maintained on every join/leave, nothing to aggregate here
+        top_inviters = self.ledger.top_inviters(guild_id, limit=5)
+        if top_inviters:
+            embed.add_field(
+                name="Top Inviters",
+                value="\n".join(
+                    f"**{row['inviter_name'] or row['inviter_id']}:** {row['joins']} joins, {row['current']} still here, {row['left']} left"
+                    for row in top_inviters
+                ),
+                inline=False
+            )
+        
+        totals = self.ledger.guild_totals(guild_id)
         total_uses = sum(invite.uses for invite in invites.values())
         embed.add_field(
             name="Summary",
-            value=f"**Total Invites:** {len(invites)}\n**Total Uses:** {total_uses}\n**Active Members Tracked:** {len(config['member_inviter_map'])}",
+            value=f"**Total Invites:** {len(invites)}\n**Total Uses:** {total_uses}\n**Active Members Tracked:** {totals['current']}\n**Tracked Joins / Leaves:** {totals['joins']} / {totals['left']}",
             inline=False
         )
         
@@ -310,8 +416,7 @@ class MultiServerInviteTracker(commands.Cog):
             await ctx.send("This server is not being tracked for invites.")
             return
         
-        config = self.server_configs[guild_id]
-        inviter_info = config['member_inviter_map'].get(member.id)
+        inviter_info = self.ledger.who_invited(guild_id, member.id)
         
         embed = discord.Embed(
             title=f"Invitation Information - {member.display_name}",
@@ -325,7 +430,7 @@ class MultiServerInviteTracker(commands.Cog):
             inline=True
         )
         
-        if inviter_info:
+        if inviter_info and inviter_info['source'] != 'unknown':
             time_in_server = discord.utils.utcnow() - inviter_info['joined_at'] if inviter_info['joined_at'] else None
             time_stayed = f"{time_in_server.days} days, {time_in_server.seconds // 3600} hours" if time_in_server else "Unknown"
             
@@ -334,6 +439,14 @@ class MultiServerInviteTracker(commands.Cog):
                 value=f"**Invited by:** {inviter_info['inviter_name']}\n**Inviter ID:** {inviter_info['inviter_id']}\n**Invite Code:** {inviter_info['invite_code']}\n**Time in Server:** {time_stayed}",
                 inline=True
             )
+            
+            counters = self.ledger.inviter_counters(guild_id, inviter_info['inviter_id']) if inviter_info['inviter_id'] else None
+            if counters:
+                embed.add_field(
+                    name="Inviter Record",
+                    value=f"**Joins:** {counters['joins']}\n**Still Here:** {counters['current']}\n**Left:** {counters['left']}",
+                    inline=True
+                )
         else:
             embed.add_field(
                 name="Invitation Details",
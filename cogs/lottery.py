@@ -1,22 +1,91 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import asyncio
 import random
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
 
+from dm_dispatcher import get_dm_dispatcher
+from job_scheduler import get_job_scheduler
+from state_store import StateStore
+
 logger = logging.getLogger(__name__)
 
+LOTTERY_EMOJI = "✅"
+DRAW_JOB = 'lottery_draw'
+DRAW_DELAY = timedelta(hours=4)
+
 class LotteryCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.active_lottery = None
-        self.participants = set()
+        self.participants = set()  # Live view from reaction events; the draw re-reads the reactions
         self.lottery_message = None
+        self.channel_id = None
+        self.message_id = None
         self.draw_time = None
         self.prize_amount = "1 MK"
+        self.store = StateStore('lottery', self.state_snapshot)
+
+    async def cog_load(self):
+        data = self.store.load()
+        if data.get('active'):
+            self.active_lottery = True
+            self.prize_amount = data.get('prize_amount', self.prize_amount)
+            self.channel_id = data.get('channel_id')
+            self.message_id = data.get('message_id')
+            self.participants = set(data.get('participants', []))
+            self.draw_time = datetime.fromtimestamp(data['draw_time'], timezone.utc)
+            logger.info(f"Restored lottery drawing at {self.draw_time.isoformat()} with {len(self.participants)} entries")
+        # Registering fires a drawing that came due while the bot was offline
+        get_job_scheduler().register(DRAW_JOB, self.on_draw_due)
+
+    async def cog_unload(self):
+        get_job_scheduler().unregister(DRAW_JOB)
+        self.store.close()
+
+    def state_snapshot(self):
+        return {
+            'active': bool(self.active_lottery),
+            'prize_amount': self.prize_amount,
+            'channel_id': self.channel_id,
+            'message_id': self.message_id,
+            'participants': sorted(self.participants),
+            'draw_time': self.draw_time.timestamp() if self.draw_time else None,
+        }
+
+    async def on_draw_due(self, payload):
+        await self.bot.wait_until_ready()
+        if self.active_lottery and payload.get('message_id') == self.message_id:
+            await self.conduct_drawing()
+
+    async def fetch_lottery_message(self):
+        """The announcement message, from cache or by id after a restart"""
+        if self.lottery_message is None and self.channel_id and self.message_id:
+            try:
+                channel = self.bot.get_channel(self.channel_id) or await self.bot.fetch_channel(self.channel_id)
+                self.lottery_message = await channel.fetch_message(self.message_id)
+            except discord.HTTPException as e:
+                logger.error(f"Could not fetch lottery message {self.message_id}: {e}")
+        return self.lottery_message
+
+    async def collect_participants(self):
+        """Everyone currently reacting, read in one paged pass over the reaction"""
+        try:
+            message = await self.fetch_lottery_message()
+            if message is None:
+                return None
+            # The cached copy may predate the reactions, so read them fresh
+            message = await message.channel.fetch_message(message.id)
+            self.lottery_message = message
+            reaction = discord.utils.get(message.reactions, emoji=LOTTERY_EMOJI)
+            if reaction is None:
+                return set()
+            return {user.id async for user in reaction.users(limit=None) if not user.bot}
+        except discord.HTTPException as e:
+            logger.error(f"Could not read lottery reactions: {e}")
+            return None
         
     @app_commands.command(name="lottery", description="Start a weekly lottery event")
     @app_commands.describe(prize="Prize amount (default: 1 MK)")
@@ -36,7 +105,7 @@ class LotteryCog(commands.Cog):
         # Set lottery details
         self.prize_amount = prize
         self.participants = set()
-        self.draw_time = datetime.utcnow() + timedelta(hours=4)  # Changed from 1 hour to 4 hours
+        self.draw_time = datetime.now(timezone.utc) + DRAW_DELAY
         self.active_lottery = True
         
         # Create announcement embed
@@ -78,21 +147,27 @@ class LotteryCog(commands.Cog):
         message = await interaction.original_response()
         
         # Add reaction for participation
-        await message.add_reaction("✅")
+        await message.add_reaction(LOTTERY_EMOJI)
         
         # Store message reference
         self.lottery_message = message
+        self.channel_id = message.channel.id
+        self.message_id = message.id
+        self.store.mark_dirty()
         
-        # Schedule the drawing
-        asyncio.create_task(self.schedule_drawing())
-        
-    async def schedule_drawing(self):
-        """Schedule the lottery drawing after 4 hours"""
-        await asyncio.sleep(14400)  # Wait 4 hours (14400 seconds) - Changed from 3600
-        await self.conduct_drawing()
+        # Schedule the drawing; the job survives restarts
+        get_job_scheduler().schedule(DRAW_JOB, self.draw_time.timestamp(), {'message_id': message.id})
         
     async def conduct_drawing(self):
         """Conduct the lottery drawing and announce winner"""
+        # Guards against the timer and /end_lottery both drawing
+        self.active_lottery = None
+        get_job_scheduler().cancel(DRAW_JOB)
+        
+        participants = await self.collect_participants()
+        if participants is not None:
+            self.participants = participants
+        
         if not self.participants:
             # No participants
             embed = discord.Embed(
@@ -195,9 +270,7 @@ class LotteryCog(commands.Cog):
         voucher_embed.set_footer(text="Life Alliance Lottery System")
         voucher_embed.timestamp = datetime.utcnow()
         
-        try:
-            await winner.send(embed=voucher_embed)
-        except discord.Forbidden:
+        if not get_dm_dispatcher().send(winner, key='lottery-voucher', embed=voucher_embed):
             logger.warning(f"Could not send DM to winner {winner.id}")
             
     def reset_lottery(self):
@@ -205,27 +278,36 @@ class LotteryCog(commands.Cog):
         self.active_lottery = None
         self.participants = set()
         self.lottery_message = None
-        self.lottery_channel = None
+        self.channel_id = None
+        self.message_id = None
         self.draw_time = None
+        self.store.mark_dirty()
+
+    def is_lottery_reaction(self, payload):
+        return (self.active_lottery and
+                payload.message_id == self.message_id and
+                str(payload.emoji) == LOTTERY_EMOJI and
+                payload.user_id != self.bot.user.id)
+
+    async def get_user(self, user_id):
+        return self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
         
     @commands.Cog.listener()
-    async def on_reaction_add(self, reaction, user):
-        """Handle lottery participation via reactions"""
+    async def on_raw_reaction_add(self, payload):
+        """Handle lottery participation via reactions (raw, so it works for uncached messages after a restart)"""
+        if not self.is_lottery_reaction(payload) or payload.user_id in self.participants:
+            return
+        
+        user = payload.member or await self.get_user(payload.user_id)
         if user.bot:
             return
-            
-        # Check if this is the lottery message and correct reaction
-        if (self.lottery_message and 
-            reaction.message.id == self.lottery_message.id and 
-            str(reaction.emoji) == "✅" and
-            self.active_lottery):
-            
-            # Add user to participants
-            if user.id not in self.participants:
-                self.participants.add(user.id)
-                
-                # Send participation ticket via DM
-                await self.send_participation_ticket(user)
+        
+        # Add user to participants
+        self.participants.add(user.id)
+        self.store.mark_dirty()
+        
+        # Send participation ticket via DM
+        await self.send_participation_ticket(user)
                 
     async def send_participation_ticket(self, user):
         """Send participation confirmation ticket to user"""
@@ -268,32 +350,29 @@ class LotteryCog(commands.Cog):
         ticket_embed.set_footer(text="Life Alliance Lottery System - Keep this ticket for your records")
         ticket_embed.timestamp = datetime.utcnow()
         
-        try:
-            await user.send(embed=ticket_embed)
-        except discord.Forbidden:
-            logger.warning(f"Could not send participation ticket to {user.id}")
+        # Shares a key with the removal notice, so a quick react/unreact only sends the latest
+        get_dm_dispatcher().send(user, key=('lottery-ticket', self.message_id), embed=ticket_embed)
             
     @commands.Cog.listener()
-    async def on_reaction_remove(self, reaction, user):
+    async def on_raw_reaction_remove(self, payload):
         """Handle lottery participation removal"""
-        if user.bot:
+        if not self.is_lottery_reaction(payload) or payload.user_id not in self.participants:
             return
-            
-        # Check if this is the lottery message and correct reaction
-        if (self.lottery_message and 
-            reaction.message.id == self.lottery_message.id and 
-            str(reaction.emoji) == "✅" and
-            self.active_lottery):
-            
-            # Remove user from participants
-            if user.id in self.participants:
-                self.participants.discard(user.id)
-                
-                # Send removal confirmation
-                try:
-                    await user.send(f"Hello **{user.display_name}**, you have been removed from the current lottery. You can react again if you want to participate.")
-                except discord.Forbidden:
-                    pass
+        
+        # Remove user from participants
+        self.participants.discard(payload.user_id)
+        self.store.mark_dirty()
+        
+        # Send removal confirmation
+        try:
+            user = await self.get_user(payload.user_id)
+        except discord.NotFound:
+            return
+        get_dm_dispatcher().send(
+            user,
+            key=('lottery-ticket', self.message_id),
+            content=f"Hello **{user.display_name}**, you have been removed from the current lottery. You can react again if you want to participate."
+        )
                     
     @app_commands.command(name="lottery_status", description="Check current lottery status")
     async def lottery_status(self, interaction: discord.Interaction):
@@ -2,12 +2,27 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import random
-import asyncio
 import datetime
+import json
 import re
+from bulk_scheduler import get_scheduler, channel_route
+from state_store import StateStore
 
 OWNER_ID = 486652069831376943  # Only this user can use the command
 
+# Keyword rules for sorting channels into theme categories
+CHANNEL_TYPES = {
+    "welcome": ["welcome", "rules", "info", "announcement", "intro"],
+    "community": ["general", "chat", "talk", "discuss", "lounge"],
+    "gaming": ["game", "play", "valorant", "minecraft", "league", "fortnite"],
+    "media": ["media", "art", "music", "meme", "clip", "video", "stream"],
+    "activity": ["event", "tournament", "night", "activity"]
+}
+
+def order_changed(channels, target_order):
+    """True if channels, sorted by their live position, are not already in target_order"""
+    return [channel.id for channel in sorted(channels, key=lambda c: c.position)] != [channel.id for channel in target_order]
+
 # Theme options for server makeover
 THEMES = {
     "cosmic": {
@@ -91,11 +106,118 @@ FONTS = {
     }
 }
 
+# Translation tables compiled once: style tables, plus one reverse table that un-styles any style
+FONT_TABLES = {style: str.maketrans(font_map) for style, font_map in FONTS.items()}
+UNSTYLE_TABLE = str.maketrans({
+    styled: plain for font_map in FONTS.values() for plain, styled in font_map.items() if styled != plain
+})
+
+# Leading emoji/symbol kept as-is, split from the name by a space (categories) or hyphen (channels)
+EMOJI_PREFIX = r'^([\U00010000-\U0010ffff]|\ud83d[\udc00-\ude4f]|\ud83c[\udf00-\udfff]|[^\w\s-]+)'
+CATEGORY_PREFIX_PATTERN = re.compile(EMOJI_PREFIX + r'\s(.+)$')
+CHANNEL_PREFIX_PATTERN = re.compile(EMOJI_PREFIX + r'-(.+)$')
+
+# How many renames a /font preview lists
+FONT_PREVIEW_LIMIT = 20
+
+def render_font(channels, style):
+    """New name for each channel under a style ("normal" un-styles), in one translate pass
+
+    Names are split from their emoji prefix, joined into a single string, un-styled,
+    restyled and split again, so the per-character work happens inside str.translate.
+    """
+    prefixes = []
+    bodies = []
+    for channel in channels:
+        if isinstance(channel, discord.CategoryChannel):
+            match, separator = CATEGORY_PREFIX_PATTERN.match(channel.name), " "
+        else:
+            match, separator = CHANNEL_PREFIX_PATTERN.match(channel.name), "-"
+        if match:
+            prefixes.append(match.group(1) + separator)
+            bodies.append(match.group(2))
+        else:
+            prefixes.append("")
+            bodies.append(channel.name)
+    
+    # Channel names can't contain newlines, so they are safe as a separator
+    text = "\n".join(bodies).translate(UNSTYLE_TABLE)
+    if style in FONT_TABLES:
+        text = text.lower().translate(FONT_TABLES[style])
+    return [prefix + body for prefix, body in zip(prefixes, text.split("\n"))]
+
 class Makeup(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.backup = {}
-        self.font_backup = {}
+        # guild id (as a string, JSON keys) -> layout saved before the makeover,
+        # kept in data.db so /unmakeup survives restarts
+        self.store = StateStore('makeup', lambda: self.backups)
+        self.backups = self.store.load()
+    
+    async def cog_unload(self):
+        self.store.close()
+    
+    async def save_backups(self):
+        """Write the backups now rather than after the debounce, before any channel is touched"""
+        self.store.mark_dirty()
+        await self.store.flush()
+    
+    async def run_channel_edits(self, name, edits, progress_message=None, label="Applying changes"):
+        """Apply (channel, edit kwargs) pairs through the bulk scheduler instead of fixed sleeps"""
+        async def apply_edit(edit):
+            channel, changes = edit
+            await channel.edit(**changes)
+        
+        async def report(job):
+            await progress_message.edit(content=f"⏳ {label}... {job.progress_line()}")
+        
+        job = get_scheduler().submit(
+            name, edits, apply_edit,
+            route=lambda edit: channel_route(edit[0]),
+            on_progress=report if progress_message else None
+        )
+        await job.wait()
+        return job
+    
+    async def apply_layout(self, guild, layout, progress_message=None, label="Applying layout"):
+        """Diff a target layout against the live guild and send only what differs
+
+        layout maps channel IDs to wanted values under "names", "topics", "user_limits",
+        "parents" (category ID or None) and "positions". Moves go out as one bulk position
+        request; names/topics/limits as per-channel edits for the channels that change.
+        """
+        edits = []
+        positions = []
+        for channel in guild.channels:
+            changes = {}
+            name = layout.get("names", {}).get(channel.id)
+            if name is not None and name != channel.name:
+                changes["name"] = name
+            if isinstance(channel, discord.TextChannel) and channel.id in layout.get("topics", {}):
+                if layout["topics"][channel.id] != channel.topic:
+                    changes["topic"] = layout["topics"][channel.id]
+            if isinstance(channel, discord.VoiceChannel) and channel.id in layout.get("user_limits", {}):
+                if layout["user_limits"][channel.id] != channel.user_limit:
+                    changes["user_limit"] = layout["user_limits"][channel.id]
+            if changes:
+                edits.append((channel, changes))
+            
+            move = {}
+            if channel.id in layout.get("positions", {}) and layout["positions"][channel.id] != channel.position:
+                move["position"] = layout["positions"][channel.id]
+            if (not isinstance(channel, discord.CategoryChannel) and channel.id in layout.get("parents", {})
+                    and layout["parents"][channel.id] != channel.category_id):
+                move["parent_id"] = layout["parents"][channel.id]
+            if move:
+                positions.append({"id": channel.id, **move})
+        
+        if positions:
+            if progress_message:
+                await progress_message.edit(content=f"⏳ {label}: moving {len(positions)} channels...")
+            await self.bot.http.bulk_channel_update(guild.id, positions, reason=label)
+        if edits:
+            await self.run_channel_edits(label, edits, progress_message, label)
+        return len(edits), len(positions)
         
     @app_commands.command(name="makeup", description="Give your server a fantastic makeover!")
     @app_commands.describe(theme="Choose a theme for your server makeover")
@@ -114,7 +236,7 @@ class Makeup(commands.Cog):
         guild = interaction.guild
         progress_message = await interaction.followup.send("⏳ Creating backup of current server structure...", ephemeral=False)
         
-        # Backup current server structure
+        # Backup current server structure (the first backup is kept until /unmakeup)
         await self.backup_server(guild)
         
         # Update progress
@@ -149,27 +271,32 @@ class Makeup(commands.Cog):
         app_commands.Choice(name="Small Caps", value="small-caps"),
         app_commands.Choice(name="Normal", value="normal")
     ])
-    async def font(self, interaction: discord.Interaction, style: str):
+    @app_commands.describe(preview="Only show the new names, without renaming anything")
+    async def font(self, interaction: discord.Interaction, style: str, preview: bool = False):
         # Check if user is the bot owner
         if interaction.user.id != OWNER_ID:
             await interaction.response.send_message("❌ You are not allowed to use this command.", ephemeral=True)
             return
         
-        await interaction.response.send_message(f"🔤 Changing channel fonts to {style} style...", ephemeral=True)
         guild = interaction.guild
-        progress_message = await interaction.followup.send("⏳ Creating backup of current channel names...", ephemeral=False)
-        
-        # Backup current channel names
-        await self.backup_font(guild)
+        if preview:
+            channels = [*guild.categories, *guild.text_channels, *guild.voice_channels]
+            changes = [(channel.name, name) for channel, name in zip(channels, render_font(channels, style.lower()))
+                       if name != channel.name]
+            lines = [f"`{old}` → `{new}`" for old, new in changes[:FONT_PREVIEW_LIMIT]]
+            if len(changes) > FONT_PREVIEW_LIMIT:
+                lines.append(f"… and {len(changes) - FONT_PREVIEW_LIMIT} more")
+            await interaction.response.send_message(
+                f"🔍 **{style.title()} preview:** {len(changes)} of {len(channels)} names would change\n" + "\n".join(lines),
+                ephemeral=True
+            )
+            return
         
-        # Update progress
-        await progress_message.edit(content="⏳ Backup complete! Now applying font style...")
+        await interaction.response.send_message(f"🔤 Changing channel fonts to {style} style...", ephemeral=True)
+        progress_message = await interaction.followup.send("⏳ Applying font style...", ephemeral=False)
         
-        # Apply the selected font style
-        if style.lower() == "normal":
-            await self.restore_font(guild, progress_message)
-        else:
-            await self.apply_font(guild, style.lower(), progress_message)
+        # Apply the selected font style ("normal" un-styles through the reverse table, no backup needed)
+        await self.apply_font(guild, style.lower(), progress_message)
         
         # Send completion message
         embed = discord.Embed(
@@ -189,7 +316,7 @@ class Makeup(commands.Cog):
             await interaction.response.send_message("❌ You are not allowed to use this command.", ephemeral=True)
             return
             
-        if not self.backup:
+        if str(interaction.guild.id) not in self.backups:
             await interaction.response.send_message("❌ No backup found! Cannot revert the server.", ephemeral=True)
             return
             
@@ -212,21 +339,25 @@ class Makeup(commands.Cog):
         await progress_message.edit(content="", embed=embed)
     
     async def backup_server(self, guild):
-        """Create a backup of the current server structure"""
-        self.backup = {
+        """Create a backup of the current server structure, persisted to data.db"""
+        if str(guild.id) in self.backups:
+            # Already themed: keep the pre-makeover original, not an intermediate theme
+            return
+        
+        backup = {
             "categories": {},
             "channels": {},
             "voice_channels": {}
         }
         
         for category in guild.categories:
-            self.backup["categories"][category.id] = {
+            backup["categories"][category.id] = {
                 "name": category.name,
                 "position": category.position
             }
         
         for channel in guild.text_channels:
-            self.backup["channels"][channel.id] = {
+            backup["channels"][channel.id] = {
                 "name": channel.name,
                 "category_id": channel.category_id,
                 "position": channel.position,
@@ -234,255 +365,119 @@ class Makeup(commands.Cog):
             }
             
         for voice_channel in guild.voice_channels:
-            self.backup["voice_channels"][voice_channel.id] = {
+            backup["voice_channels"][voice_channel.id] = {
                 "name": voice_channel.name,
                 "category_id": voice_channel.category_id,
                 "position": voice_channel.position,
                 "user_limit": voice_channel.user_limit
             }
-    
-    async def backup_font(self, guild):
-        """Create a backup of current channel names for font styling"""
-        self.font_backup = {
-            "categories": {},
-            "text_channels": {},
-            "voice_channels": {}
-        }
         
-        for category in guild.categories:
-            self.font_backup["categories"][category.id] = category.name
-            
-        for channel in guild.text_channels:
-            self.font_backup["text_channels"][channel.id] = channel.name
-            
-        for voice_channel in guild.voice_channels:
-            self.font_backup["voice_channels"][voice_channel.id] = voice_channel.name
+        # Round-trip through JSON so in-memory and stored backups look the same (string keys)
+        self.backups[str(guild.id)] = json.loads(json.dumps(backup))
+        await self.save_backups()
     
     async def restore_server(self, guild, progress_message):
         """Restore the server to its original state"""
-        if not self.backup:
+        backup = self.backups.get(str(guild.id))
+        if not backup:
             return
         
-        # Step 1: Restore categories
-        await progress_message.edit(content="⏳ Restoring categories...")
-        for category_id, category_data in self.backup["categories"].items():
-            category = guild.get_channel(category_id)
-            if category:
-                try:
-                    await category.edit(name=category_data["name"], position=category_data["position"])
-                    await asyncio.sleep(0.5)  # Avoid rate limits
-                except discord.HTTPException:
-                    continue
-        
-        # Step 2: Restore text channels
-        await progress_message.edit(content="⏳ Restoring text channels...")
-        for channel_id, channel_data in self.backup["channels"].items():
-            channel = guild.get_channel(channel_id)
-            if channel:
-                try:
-                    await channel.edit(
-                        name=channel_data["name"],
-                        topic=channel_data["topic"],
-                        position=channel_data["position"],
-                        category=guild.get_channel(channel_data["category_id"])
-                    )
-                    await asyncio.sleep(0.5)  # Avoid rate limits
-                except discord.HTTPException:
-                    continue
-        
-        # Step 3: Restore voice channels
-        await progress_message.edit(content="⏳ Restoring voice channels...")
-        for vc_id, vc_data in self.backup["voice_channels"].items():
-            vc = guild.get_channel(vc_id)
-            if vc:
-                try:
-                    await vc.edit(
-                        name=vc_data["name"],
-                        position=vc_data["position"],
-                        category=guild.get_channel(vc_data["category_id"]),
-                        user_limit=vc_data["user_limit"]
-                    )
-                    await asyncio.sleep(0.5)  # Avoid rate limits
-                except discord.HTTPException:
-                    continue
+        await progress_message.edit(content="⏳ Restoring original layout...")
+        layout = {"names": {}, "topics": {}, "user_limits": {}, "parents": {}, "positions": {}}
+        for section in ("categories", "channels", "voice_channels"):
+            for channel_id, data in backup[section].items():
+                channel_id = int(channel_id)
+                layout["names"][channel_id] = data["name"]
+                layout["positions"][channel_id] = data["position"]
+                if "category_id" in data:
+                    layout["parents"][channel_id] = data["category_id"]
+                if "topic" in data:
+                    layout["topics"][channel_id] = data["topic"]
+                if "user_limit" in data:
+                    layout["user_limits"][channel_id] = data["user_limit"]
+        
+        await self.apply_layout(guild, layout, progress_message, "Restoring original layout")
         
         # Clear the backup after restoration
-        self.backup = {}
+        del self.backups[str(guild.id)]
+        await self.save_backups()
     
     async def apply_theme(self, guild, theme_data, progress_message):
         """Apply the selected theme to the server"""
-        # Step 1: Rename existing channels
-        await progress_message.edit(content="⏳ Renaming existing channels...")
-        await self.rename_channels(guild, theme_data)
-        
-        # Step 2: Create new category structure
+        # Step 1: Create whatever theme categories are missing
         await progress_message.edit(content="⏳ Creating new category structure...")
         created_categories = await self.setup_categories(guild, theme_data)
         
-        # Step 3: Organize existing channels into appropriate categories
-        await progress_message.edit(content="⏳ Organizing channels into categories...")
-        await self.organize_channels(guild, created_categories, theme_data)
+        # Step 2: Compute the whole target layout and apply only the differences
+        await progress_message.edit(content="⏳ Planning the new layout...")
+        layout = self.plan_theme(guild, theme_data, created_categories)
+        renamed, moved = await self.apply_layout(guild, layout, progress_message, "Applying theme")
         
-        # Step 4: Create any missing essential channels
-        await progress_message.edit(content="⏳ Adding essential channels...")
+        # Step 3: Create any missing essential channels
+        await progress_message.edit(content=f"⏳ {renamed} renamed, {moved} moved. Adding essential channels...")
         await self.create_essential_channels(guild, created_categories, theme_data)
     
-    async def apply_font(self, guild, font_style, progress_message):
-        """Apply the selected font style to channel names"""
-        if font_style not in FONTS:
-            return
-            
-        font_map = FONTS[font_style]
-        count = 0
-        total = len(guild.categories) + len(guild.text_channels) + len(guild.voice_channels)
-        
-        # Function to convert text to the selected font style
-        def convert_to_font(text):
-            # Preserve emojis and non-alphanumeric characters
-            emoji_pattern = re.compile(r'([\U00010000-\U0010ffff]|\ud83d[\udc00-\ude4f]|\ud83c[\udf00-\udfff]|[^\w\s-])')
-            parts = emoji_pattern.split(text)
-            
-            result = ""
-            for part in parts:
-                if emoji_pattern.match(part):
-                    # Keep emojis unchanged
-                    result += part
-                else:
-                    # Convert alphanumeric characters to the font style
-                    for char in part.lower():
-                        if char in font_map:
-                            result += font_map[char]
-                        else:
-                            result += char
-            return result
-        
-        # Step 1: Apply font to categories
-        for category in guild.categories:
-            try:
-                # Extract emojis and preserve them
-                match = re.match(r'^([\U00010000-\U0010ffff]|\ud83d[\udc00-\ude4f]|\ud83c[\udf00-\udfff]|[^\w\s-]+)\s(.+)$', category.name)
-                if match:
-                    emoji = match.group(1)
-                    name = match.group(2)
-                    new_name = f"{emoji} {convert_to_font(name)}"
-                else:
-                    new_name = convert_to_font(category.name)
-                
-                await category.edit(name=new_name)
-                await asyncio.sleep(0.5)  # Avoid rate limits
-                count += 1
-                if count % 5 == 0:
-                    await progress_message.edit(content=f"⏳ Applying font style... ({count}/{total})")
-            except discord.HTTPException:
-                continue
-        
-        # Step 2: Apply font to text channels
-        for channel in guild.text_channels:
-            try:
-                # Extract emojis and preserve them
-                match = re.match(r'^([\U00010000-\U0010ffff]|\ud83d[\udc00-\ude4f]|\ud83c[\udf00-\udfff]|[^\w\s-]+)-(.+)$', channel.name)
-                if match:
-                    emoji = match.group(1)
-                    name = match.group(2)
-                    new_name = f"{emoji}-{convert_to_font(name)}"
-                else:
-                    new_name = convert_to_font(channel.name)
-                
-                await channel.edit(name=new_name)
-                await asyncio.sleep(0.5)  # Avoid rate limits
-                count += 1
-                if count % 5 == 0:
-                    await progress_message.edit(content=f"⏳ Applying font style... ({count}/{total})")
-            except discord.HTTPException:
-                continue
-        
-        # Step 3: Apply font to voice channels
-        for vc in guild.voice_channels:
-            try:
-                # Extract emojis and preserve them
-                match = re.match(r'^([\U00010000-\U0010ffff]|\ud83d[\udc00-\ude4f]|\ud83c[\udf00-\udfff]|[^\w\s-]+)-(.+)$', vc.name)
-                if match:
-                    emoji = match.group(1)
-                    name = match.group(2)
-                    new_name = f"{emoji}-{convert_to_font(name)}"
-                else:
-                    new_name = convert_to_font(vc.name)
-                
-                await vc.edit(name=new_name)
-                await asyncio.sleep(0.5)  # Avoid rate limits
-                count += 1
-                if count % 5 == 0:
-                    await progress_message.edit(content=f"⏳ Applying font style... ({count}/{total})")
-            except discord.HTTPException:
-                continue
+    def plan_theme(self, guild, theme_data, categories):
+        """Target names, parents and positions for every channel under a theme"""
+        layout = {"names": self.theme_names(guild, theme_data), "parents": self.theme_parents(guild, categories), "positions": {}}
+        
+        # Theme categories first, in theme order, then every other category in its current order
+        theme_categories = list(categories.values())
+        other_categories = sorted(
+            (category for category in guild.categories if category not in theme_categories),
+            key=lambda c: c.position
+        )
+        ordered_categories = theme_categories + other_categories
+        if order_changed(guild.categories, ordered_categories):
+            for position, category in enumerate(ordered_categories):
+                layout["positions"][category.id] = position
+        
+        # Within each category keep the current relative order, text channels above voice
+        groups = {}
+        for channel in [*guild.text_channels, *guild.voice_channels]:
+            groups.setdefault(layout["parents"].get(channel.id, channel.category_id), []).append(channel)
+        for parent_id, channels in groups.items():
+            current = [channel for channel in channels if channel.category_id == parent_id]
+            target = sorted(channels, key=lambda c: (isinstance(c, discord.VoiceChannel), c.position))
+            if len(current) != len(channels) or order_changed(current, target):
+                for position, channel in enumerate(target):
+                    layout["positions"][channel.id] = position
+        
+        return layout
     
-    async def restore_font(self, guild, progress_message):
-        """Restore channel names to normal font"""
-        if not self.font_backup:
-            await progress_message.edit(content="❌ No font backup found! Cannot restore original names.")
+    async def apply_font(self, guild, font_style, progress_message):
+        """Apply the selected font style to channel names, renaming only the ones that change"""
+        if font_style not in FONT_TABLES and font_style != "normal":
             return
         
-        count = 0
-        total = len(self.font_backup["categories"]) + len(self.font_backup["text_channels"]) + len(self.font_backup["voice_channels"])
-        
-        # Step 1: Restore category names
-        for category_id, name in self.font_backup["categories"].items():
-            category = guild.get_channel(category_id)
-            if category:
-                try:
-                    await category.edit(name=name)
-                    await asyncio.sleep(0.5)  # Avoid rate limits
-                    count += 1
-                    if count % 5 == 0:
-                        await progress_message.edit(content=f"⏳ Restoring original names... ({count}/{total})")
-                except discord.HTTPException:
-                    continue
-        
-        # Step 2: Restore text channel names
-        for channel_id, name in self.font_backup["text_channels"].items():
-            channel = guild.get_channel(channel_id)
-            if channel:
-                try:
-                    await channel.edit(name=name)
-                    await asyncio.sleep(0.5)  # Avoid rate limits
-                    count += 1
-                    if count % 5 == 0:
-                        await progress_message.edit(content=f"⏳ Restoring original names... ({count}/{total})")
-                except discord.HTTPException:
-                    continue
-        
-        # Step 3: Restore voice channel names
-        for vc_id, name in self.font_backup["voice_channels"].items():
-            vc = guild.get_channel(vc_id)
-            if vc:
-                try:
-                    await vc.edit(name=name)
-                    await asyncio.sleep(0.5)  # Avoid rate limits
-                    count += 1
-                    if count % 5 == 0:
-                        await progress_message.edit(content=f"⏳ Restoring original names... ({count}/{total})")
-                except discord.HTTPException:
-                    continue
+        channels = [*guild.categories, *guild.text_channels, *guild.voice_channels]
+        edits = [
+            (channel, {"name": name})
+            for channel, name in zip(channels, render_font(channels, font_style))
+            if name != channel.name
+        ]
         
-        # Clear the font backup after restoration
-        self.font_backup = {}
+        await self.run_channel_edits("apply font", edits, progress_message, "Applying font style")
     
-    async def rename_channels(self, guild, theme_data):
-        """Rename existing channels with theme prefixes"""
+    def theme_names(self, guild, theme_data):
+        """Themed name for every channel that doesn't carry a prefix emoji yet"""
         general_emojis = theme_data["emoji_prefixes"]["general"]
         gaming_emojis = theme_data["emoji_prefixes"]["gaming"]
         voice_emojis = theme_data["emoji_prefixes"]["voice"]
         
+        names = {}
+        
         # Text channels
         for channel in guild.text_channels:
             # Skip renaming if it already has a prefix emoji
             if channel.name[0] in ["✨", "🌿", "💫", "📌", "🎮", "💬", "🔥", "⚡"]:
                 continue
                 
-            # Choose prefix based on channel name keywords
-            emoji = random.choice(general_emojis)
+            # Choose prefix based on channel name keywords (stable per channel, so reruns don't churn)
+            emojis = general_emojis
             if any(keyword in channel.name for keyword in ["game", "play", "gaming", "valorant", "minecraft"]):
-                emoji = random.choice(gaming_emojis)
+                emojis = gaming_emojis
+            emoji = emojis[channel.id % len(emojis)]
                 
             # Apply the new name - keep the original name without discord's auto-added hyphens
             original_name = channel.name.replace("-", " ")
@@ -491,12 +486,8 @@ class Makeup(commands.Cog):
             # Discord has a 100 character limit for channel names
             if len(new_name) > 100:
                 new_name = new_name[:97] + "..."
-                
-            try:
-                await channel.edit(name=new_name)
-                await asyncio.sleep(0.5)  # Avoid rate limits
-            except discord.HTTPException:
-                continue
+            
+            names[channel.id] = new_name
         
         # Voice channels        
         for vc in guild.voice_channels:
@@ -504,88 +495,69 @@ class Makeup(commands.Cog):
             if vc.name[0] in ["🔊", "🎵", "🎧", "🎤"]:
                 continue
                 
-            emoji = random.choice(voice_emojis)
+            emoji = voice_emojis[vc.id % len(voice_emojis)]
             original_name = vc.name.replace("-", " ")
             new_name = f"{emoji}-{original_name}"
             
             if len(new_name) > 100:
                 new_name = new_name[:97] + "..."
-                
-            try:
-                await vc.edit(name=new_name)
-                await asyncio.sleep(0.5)  # Avoid rate limits
-            except discord.HTTPException:
-                continue
+            
+            names[vc.id] = new_name
+        
+        return names
     
     async def setup_categories(self, guild, theme_data):
-        """Create the theme's category structure"""
+        """Find or create the theme's categories; ordering is left to the layout pass"""
         created_categories = {}
         
-        # Sort categories by their desired position
-        position = 0
         for category_name, channel_list in theme_data["categories"].items():
             # Check if a similar category already exists
             existing = discord.utils.get(guild.categories, name=category_name)
             
             if existing:
                 created_categories[category_name] = existing
-                await existing.edit(position=position)
             else:
                 try:
-                    new_category = await guild.create_category(name=category_name, position=position)
+                    new_category = await guild.create_category(name=category_name)
                     created_categories[category_name] = new_category
                 except discord.HTTPException:
                     continue
-            
-            position += 1
-            await asyncio.sleep(0.5)  # Avoid rate limits
         
         return created_categories
     
-    async def organize_channels(self, guild, categories, theme_data):
-        """Organize existing channels into theme categories"""
-        # Define channel type categorization rules
-        channel_types = {
-            "welcome": ["welcome", "rules", "info", "announcement", "intro"],
-            "community": ["general", "chat", "talk", "discuss", "lounge"],
-            "gaming": ["game", "play", "valorant", "minecraft", "league", "fortnite"],
-            "media": ["media", "art", "music", "meme", "clip", "video", "stream"],
-            "activity": ["event", "tournament", "night", "activity"]
-        }
-        
+    def theme_parents(self, guild, categories):
+        """Target category for every channel the theme's keyword rules place"""
         # Get the category objects
         welcome_category = next((cat for name, cat in categories.items() if "WELCOME" in name), None)
         community_category = next((cat for name, cat in categories.items() if "COMMUNITY" in name), None)
         activity_category = next((cat for name, cat in categories.items() if "ACTIV" in name or "GAMING" in name), None)
         voice_category = next((cat for name, cat in categories.items() if "VOICE" in name), None)
         
+        parents = {}
+        
         # Organize text channels
         for channel in guild.text_channels:
-            try:
-                if any(keyword in channel.name.lower() for keyword in channel_types["welcome"]):
-                    await channel.edit(category=welcome_category)
-                elif any(keyword in channel.name.lower() for keyword in channel_types["gaming"]):
-                    await channel.edit(category=activity_category)
-                elif any(keyword in channel.name.lower() for keyword in channel_types["media"]):
-                    await channel.edit(category=community_category)
-                elif any(keyword in channel.name.lower() for keyword in channel_types["activity"]):
-                    await channel.edit(category=activity_category)
-                elif channel.category is None:
-                    await channel.edit(category=community_category)
-                
-                await asyncio.sleep(0.5)  # Avoid rate limits
-            except discord.HTTPException:
+            name = channel.name.lower()
+            if any(keyword in name for keyword in CHANNEL_TYPES["welcome"]):
+                target = welcome_category
+            elif any(keyword in name for keyword in CHANNEL_TYPES["gaming"]):
+                target = activity_category
+            elif any(keyword in name for keyword in CHANNEL_TYPES["media"]):
+                target = community_category
+            elif any(keyword in name for keyword in CHANNEL_TYPES["activity"]):
+                target = activity_category
+            elif channel.category is None:
+                target = community_category
+            else:
                 continue
+            if target:
+                parents[channel.id] = target.id
         
         # Organize voice channels
-        for vc in guild.voice_channels:
-            try:
-                if voice_category:
-                    await vc.edit(category=voice_category)
-                
-                await asyncio.sleep(0.5)  # Avoid rate limits
-            except discord.HTTPException:
-                continue
+        if voice_category:
+            parents.update((vc.id, voice_category.id) for vc in guild.voice_channels)
+        
+        return parents
     
     async def create_essential_channels(self, guild, categories, theme_data):
         """Create essential channels that are missing"""
@@ -613,21 +585,19 @@ class Makeup(commands.Cog):
                 if not exists:
                     try:
                         await guild.create_text_channel(name=channel_name, category=welcome_category)
-                        await asyncio.sleep(0.5)  # Avoid rate limits
                     except discord.HTTPException:
                         continue
         
         # Define essential channels for the community category
         if community_category:
             community_channels = []
-            if not discord.utils.get(community_category.channels, name=lambda n: "general" in n.lower()):
+            if not any("general" in channel.name.lower() for channel in community_category.channels):
                 community_channels.append("💬-general")
             
             # Create missing channels
             for channel_name in community_channels:
                 try:
                     await guild.create_text_channel(name=channel_name, category=community_category)
-                    await asyncio.sleep(0.5)  # Avoid rate limits
                 except discord.HTTPException:
                     continue
         
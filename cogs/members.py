@@ -3,6 +3,8 @@ from discord.ext import commands
 from discord import app_commands, ui
 import logging
 import asyncio
+import re
+from bulk_scheduler import get_scheduler, member_route
 
 logger = logging.getLogger(__name__)
 
@@ -43,56 +45,67 @@ def get_clean_display_name(member):
     # member.global_name is the "display name" feature Discord introduced
     return member.global_name or member.name
 
+# Role lookups are done against a member's role-id set, in GUILD_ROLES order
+GUILD_ROLE_PRIORITY = {role_id: index for index, role_id in enumerate(GUILD_ROLES)}
+
+# Roles that change a nickname; updates touching anything else are ignored
+NICKNAME_ROLE_IDS = frozenset(GUILD_ROLES) | {GUILD_LEADER_ROLE_ID, SECOND_IN_COMMAND_ROLE_ID}
+
+# Role bots often add several roles in a row, so wait for the burst to settle
+ENFORCE_DEBOUNCE_SECONDS = 3.0
+
+# Every tag we may have added, stripped in one pass
+TAG_PATTERN = re.compile(
+    r"\{(?:GL|SIC|" + "|".join(re.escape(guild_name) for guild_name in GUILD_ROLES.values()) + r")\}"
+)
+
+# How many planned changes/conflicts a dry run lists by name
+DIFF_PREVIEW_LIMIT = 15
+
 def clean_name_from_tags(name):
     """Remove all existing tags from a name"""
     if not name:
         return ""
     
-    # Remove role prefixes
-    name = name.replace("{GL}", "").replace("{SIC}", "").strip()
-    
-    # Remove guild tags
-    for guild_name in GUILD_ROLES.values():
-        name = name.replace(f"{{{guild_name}}}", "").strip()
-    
-    # Clean up extra spaces
-    name = " ".join(name.split())
-    
-    return name
+    # Remove role prefixes and guild tags, then clean up extra spaces
+    return " ".join(TAG_PATTERN.sub("", name).split())
 
-def generate_proper_nickname(member, custom_name=None):
-    """Generate properly formatted nickname with no duplications"""
+def nickname_prefix(role_ids):
+    """Build the '{GL} {Guild} ' prefix for a set of role IDs"""
     # Get role prefix
     role_prefix = ""
-    if discord.utils.get(member.roles, id=GUILD_LEADER_ROLE_ID):
+    if GUILD_LEADER_ROLE_ID in role_ids:
         role_prefix = "{GL} "
-    elif discord.utils.get(member.roles, id=SECOND_IN_COMMAND_ROLE_ID):
+    elif SECOND_IN_COMMAND_ROLE_ID in role_ids:
         role_prefix = "{SIC} "
     
-    # Get guild tag
+    # Get guild tag (first match in GUILD_ROLES order)
     guild_tag = ""
-    for role_id, guild_name in GUILD_ROLES.items():
-        if discord.utils.get(member.roles, id=role_id):
-            guild_tag = f"{{{guild_name}}} "
-            break
+    guild_role_ids = GUILD_ROLE_PRIORITY.keys() & role_ids
+    if guild_role_ids:
+        guild_tag = f"{{{GUILD_ROLES[min(guild_role_ids, key=GUILD_ROLE_PRIORITY.__getitem__)]}}} "
+    
+    return role_prefix + guild_tag
+
+def generate_proper_nickname(member, custom_name=None, role_ids=None):
+    """Generate properly formatted nickname with no duplications"""
+    if role_ids is None:
+        role_ids = {role.id for role in member.roles}
+    prefix = nickname_prefix(role_ids)
+    
+    # If no relevant roles, return None (member shouldn't be renamed)
+    if not prefix:
+        return None
     
     # Get base name - priority: custom_name > clean display name > clean username
     if custom_name:
         base_name = clean_name_from_tags(custom_name.strip())
     else:
         # Use the member's actual display name (global_name) or username
-        display_name = get_clean_display_name(member)
-        base_name = clean_name_from_tags(display_name)
-    
-    # If no relevant roles, return None (member shouldn't be renamed)
-    if not role_prefix and not guild_tag:
-        return None
+        base_name = clean_name_from_tags(get_clean_display_name(member))
     
-    # Build final nickname
-    nickname = f"{role_prefix}{guild_tag}{base_name}".strip()
-    
-    # Clean up any extra spaces
-    nickname = " ".join(nickname.split())
+    # Build final nickname, cleaning up any extra spaces
+    nickname = " ".join(f"{prefix}{base_name}".split())
     
     # Truncate if too long (Discord limit is 32 characters)
     if len(nickname) > 32:
@@ -100,6 +113,79 @@ def generate_proper_nickname(member, custom_name=None):
     
     return nickname
 
+class NicknamePlan:
+    """Dry-run diff of a bulk nickname pass: what would change, what is skipped, what can't be done"""
+    def __init__(self, mode):
+        self.mode = mode
+        self.changes = []  # (member, new_nickname)
+        self.unchanged = 0
+        self.no_roles = 0
+        self.conflicts = []  # (member, new_nickname, reason)
+        self.blocked = 0  # Conflicts that are left out of changes entirely
+        self.total = 0
+    
+    def describe(self):
+        """Render the diff for a dry-run reply"""
+        lines = [
+            f"🧪 **Dry run ({self.mode})** — {self.total} members scanned",
+            f"✏️ **Changes:** {len(self.changes)} | ⏭️ **Already correct:** {self.unchanged} | "
+            f"🚫 **No roles:** {self.no_roles} | ⚠️ **Conflicts:** {len(self.conflicts)}"
+        ]
+        for member, new_nickname in self.changes[:DIFF_PREVIEW_LIMIT]:
+            lines.append(f"• `{member.nick or member.name}` → `{new_nickname or member.name}`")
+        if len(self.changes) > DIFF_PREVIEW_LIMIT:
+            lines.append(f"… and {len(self.changes) - DIFF_PREVIEW_LIMIT} more changes")
+        for member, new_nickname, reason in self.conflicts[:DIFF_PREVIEW_LIMIT]:
+            lines.append(f"⚠️ `{member.nick or member.name}` → `{new_nickname or member.name}` ({reason})")
+        if len(self.conflicts) > DIFF_PREVIEW_LIMIT:
+            lines.append(f"… and {len(self.conflicts) - DIFF_PREVIEW_LIMIT} more conflicts")
+        return "\n".join(lines)[:2000]
+
+def plan_nicknames(members, mode, bot_member=None):
+    """Compute the target nickname for every member in one pass and keep only real changes
+
+    mode is "roles" (tag from roles, used by /fixnames and /renameall) or "reset".
+    """
+    plan = NicknamePlan(mode)
+    claimed = {}
+    bot_top_role = bot_member.top_role if bot_member else None
+    
+    for member in members:
+        if member.bot:
+            continue
+        plan.total += 1
+        
+        if mode == "reset":
+            if not member.nick:
+                plan.unchanged += 1
+                continue
+            new_nickname = None
+        else:
+            new_nickname = generate_proper_nickname(member)
+            if new_nickname is None:
+                plan.no_roles += 1
+                continue
+            if member.nick == new_nickname:
+                plan.unchanged += 1
+                continue
+        
+        # Discord refuses nickname edits on the owner and on anyone at or above our top role
+        if bot_top_role is not None and (member.id == member.guild.owner_id or member.top_role >= bot_top_role):
+            plan.conflicts.append((member, new_nickname, "above bot role"))
+            plan.blocked += 1
+            continue
+        
+        if new_nickname is not None:
+            other = claimed.get(new_nickname)
+            if other is not None:
+                # Still applied, but flagged so an admin can tell the two apart
+                plan.conflicts.append((member, new_nickname, f"same nickname as {other.name}"))
+            claimed[new_nickname] = member
+        
+        plan.changes.append((member, new_nickname))
+    
+    return plan
+
 # Persistent view for the button
 class NameButtonView(ui.View):
     def __init__(self):
@@ -162,18 +248,169 @@ class Members(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.message_id = None
+        # guild_id -> (job name, reason, done label, [(member, nickname)]) left over by an interrupted pass
+        self.pending_edits = {}
+        # member_id -> debounced enforcement task
+        self.enforce_tasks = {}
         
         # Register the persistent view
         self.bot.add_view(NameButtonView())
     
+    def cog_unload(self):
+        for task in self.enforce_tasks.values():
+            task.cancel()
+        self.enforce_tasks.clear()
+    
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Re-tag a member when their guild, GL or SIC roles change"""
+        if after.guild.id != SERVER_ID or after.bot:
+            return
+        
+        before_ids = NICKNAME_ROLE_IDS.intersection(role.id for role in before.roles)
+        after_ids = NICKNAME_ROLE_IDS.intersection(role.id for role in after.roles)
+        # Nickname edits (including our own) and unrelated roles land here too
+        if before_ids == after_ids:
+            return
+        
+        self._schedule_enforce(after)
+    
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """Tag members who arrive with roles already applied (e.g. restored by another bot)"""
+        if member.guild.id != SERVER_ID or member.bot:
+            return
+        
+        if NICKNAME_ROLE_IDS.intersection(role.id for role in member.roles):
+            self._schedule_enforce(member)
+    
+    def _schedule_enforce(self, member):
+        """(Re)start the debounce timer for a member; only the last change in a burst is applied"""
+        task = self.enforce_tasks.get(member.id)
+        if task and not task.done():
+            task.cancel()
+        self.enforce_tasks[member.id] = self.bot.loop.create_task(self._enforce_nickname(member.guild, member.id))
+    
+    async def _enforce_nickname(self, guild, member_id):
+        """Bring one member's nickname in line with their current roles"""
+        try:
+            await asyncio.sleep(ENFORCE_DEBOUNCE_SECONDS)
+        except asyncio.CancelledError:
+            return
+        
+        # Drop our entry before any await, so a new burst schedules a fresh task
+        self.enforce_tasks.pop(member_id, None)
+        
+        # Re-read the member: the roles we were woken for may be stale
+        member = guild.get_member(member_id)
+        if member is None:
+            return
+        
+        if member.nick:
+            # Keep the in-game name they set, only the tags follow their roles
+            new_nickname = generate_proper_nickname(member, member.nick)
+            if new_nickname is None and TAG_PATTERN.search(member.nick):
+                # Lost every tagged role: strip the stale tags
+                new_nickname = clean_name_from_tags(member.nick) or None
+            elif new_nickname is None:
+                return
+        else:
+            new_nickname = generate_proper_nickname(member)
+            if new_nickname is None:
+                return
+        
+        if member.nick == new_nickname:
+            return
+        
+        try:
+            await member.edit(nick=new_nickname, reason="Guild roles changed")
+            logger.info(f"Enforced nickname for {member.name} -> {new_nickname}")
+        except discord.Forbidden:
+            logger.warning(f"No permission to rename {get_clean_display_name(member)}")
+        except Exception as e:
+            logger.error(f"Error enforcing nickname for {get_clean_display_name(member)}: {e}")
+    
+    async def _fetch_members(self, guild, public_msg=None):
+        """Return every guild member, fetching from the API when the cache is incomplete"""
+        members = guild.members
+        if len(members) < guild.member_count:
+            if public_msg:
+                await public_msg.edit(content=f"{public_msg.content}\n📥 Fetching all server members...")
+            members = [member async for member in guild.fetch_members(limit=None)]
+        return members
+    
+    async def _send_dry_run(self, interaction: discord.Interaction, mode):
+        """Reply with the planned nickname diff without editing anyone"""
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            members = await self._fetch_members(interaction.guild)
+            plan = plan_nicknames(members, mode, interaction.guild.me)
+            await interaction.followup.send(plan.describe(), ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error planning nicknames: {e}")
+            await interaction.followup.send(f"❌ Dry run failed: {str(e)}", ephemeral=True)
+    
+    async def _run_nickname_job(self, guild, name, edits, reason, public_msg, done_label):
+        """Apply (member, nickname) edits through the bulk scheduler, reporting progress in public_msg"""
+        header = public_msg.content
+        # Recorded up front so an interrupted pass can be picked up by /resumenames
+        self.pending_edits[guild.id] = (name, reason, done_label, list(edits))
+        
+        async def apply_edit(edit):
+            member, nickname = edit
+            await member.edit(nick=nickname, reason=reason)
+            logger.info(f"{done_label} nickname for {member.name} -> {nickname}")
+        
+        async def report(job):
+            await public_msg.edit(
+                content=f"{header}\n{job.progress_line()}\n"
+                f"✅ {done_label}: {job.done} | ⚠️ Failed: {len(job.failed)}"
+            )
+        
+        job = get_scheduler().submit(
+            name, edits, apply_edit,
+            route=lambda edit: member_route(edit[0]),
+            on_progress=report
+        )
+        try:
+            await job.wait()
+        finally:
+            # Keep only what didn't land: unstarted edits plus failures worth retrying
+            leftover = job.remaining() + [
+                edit for edit, error in job.failed if not isinstance(error, discord.Forbidden)
+            ]
+            if leftover:
+                self.pending_edits[guild.id] = (name, reason, done_label, leftover)
+            else:
+                self.pending_edits.pop(guild.id, None)
+        return job
+    
+    def _count_failures(self, job):
+        """Split a nickname job's failures into (permission skips, errors)"""
+        skipped_permissions = 0
+        errors = 0
+        for (member, _), error in job.failed:
+            if isinstance(error, discord.Forbidden):
+                skipped_permissions += 1
+                logger.warning(f"No permission to rename {get_clean_display_name(member)}")
+            else:
+                errors += 1
+                logger.error(f"Error renaming {get_clean_display_name(member)}: {error}")
+        return skipped_permissions, errors
+    
     @app_commands.command(name="fixnames", description="Fix all member nicknames using their proper display names")
-    async def fixnames(self, interaction: discord.Interaction):
+    @app_commands.describe(dry_run="Only show what would change, without renaming anyone")
+    async def fixnames(self, interaction: discord.Interaction, dry_run: bool = False):
         """Fix all member nicknames using their proper display names"""
         # Check if the user is the owner
         if interaction.user.id != OWNER_ID:
             await interaction.response.send_message("Only the server owner can use this command.", ephemeral=True)
             return
         
+        if dry_run:
+            await self._send_dry_run(interaction, "roles")
+            return
+        
         # Respond immediately to avoid timeout
         await interaction.response.send_message(
             "🔧 **Starting display name fix process...**\n"
@@ -203,73 +440,27 @@ class Members(commands.Cog):
             
             # Get all members
             try:
-                members = guild.members
-                if len(members) < guild.member_count:
-                    await public_msg.edit(content=f"{public_msg.content}\n📥 Fetching all server members...")
-                    members = [member async for member in guild.fetch_members(limit=None)]
+                members = await self._fetch_members(guild, public_msg)
             except Exception as e:
                 logger.error(f"Error fetching members: {e}")
                 await public_msg.edit(content=f"{public_msg.content}\n❌ Error fetching server members")
                 return
             
-            # Filter out bots
-            real_members = [member for member in members if not member.bot]
+            # Work out which members actually need a new nickname before touching the API
+            plan = plan_nicknames(members, "roles", guild.me)
+            skipped_no_roles = plan.no_roles
             
             await public_msg.edit(
                 content=f"{public_msg.content}\n"
-                f"🎯 **Processing {len(real_members)} members**\n"
-                f"Estimated time: ~{len(real_members) * 0.3 / 60:.1f} minutes"
+                f"🎯 **Processing {plan.total} members** ({len(plan.changes)} need changes)"
             )
             
-            # Process each member
-            for i, member in enumerate(real_members):
-                try:
-                    # Generate proper nickname using display name
-                    new_nickname = generate_proper_nickname(member)
-                    
-                    # Skip if no relevant roles
-                    if new_nickname is None:
-                        skipped_no_roles += 1
-                        logger.info(f"Skipped {get_clean_display_name(member)} - no relevant roles")
-                        continue
-                    
-                    # Skip if nickname is already correct
-                    if member.nick == new_nickname:
-                        logger.info(f"Skipped {get_clean_display_name(member)} - nickname already correct")
-                        continue
-                    
-                    # Try to update the nickname
-                    try:
-                        await member.edit(nick=new_nickname, reason="Fix display name formatting")
-                        fixed_count += 1
-                        logger.info(f"Fixed nickname for {member.name} to {new_nickname}")
-                        
-                    except discord.Forbidden:
-                        skipped_permissions += 1
-                        logger.warning(f"No permission to rename {get_clean_display_name(member)}")
-                        
-                    except discord.HTTPException as e:
-                        errors += 1
-                        logger.error(f"HTTP error renaming {get_clean_display_name(member)}: {e}")
-                        
-                except Exception as e:
-                    errors += 1
-                    logger.error(f"Unexpected error processing {get_clean_display_name(member)}: {e}")
-                
-                # Add delay to avoid rate limits
-                await asyncio.sleep(0.3)
-                
-                # Update progress every 25 members
-                if (i + 1) % 25 == 0:
-                    try:
-                        progress_percentage = ((i + 1) / len(real_members)) * 100
-                        await public_msg.edit(
-                            content=f"{public_msg.content.split('🎯')[0]}🎯 **Processing {len(real_members)} members**\n"
-                            f"⏳ Progress: {i + 1}/{len(real_members)} ({progress_percentage:.1f}%)\n"
-                            f"✅ Fixed: {fixed_count} | ⏭️ Skipped: {skipped_no_roles + skipped_permissions}"
-                        )
-                    except Exception as e:
-                        logger.error(f"Error updating progress: {e}")
+            job = await self._run_nickname_job(
+                guild, "fixnames", plan.changes, "Fix display name formatting", public_msg, "Fixed"
+            )
+            fixed_count = job.done
+            skipped_permissions, errors = self._count_failures(job)
+            skipped_permissions += plan.blocked
             
             # Send final summary
             summary = (
@@ -278,11 +469,13 @@ class Members(commands.Cog):
                 f"**Skipped (No Roles):** {skipped_no_roles}\n"
                 f"**Skipped (Permissions):** {skipped_permissions}\n"
                 f"**Errors:** {errors}\n"
-                f"**Total Processed:** {len(real_members)}"
+                f"**Total Processed:** {plan.total}"
             )
             
             if errors > 0:
                 summary += "\n\n⚠️ Some errors occurred. Check bot logs for details."
+            if guild.id in self.pending_edits:
+                summary += f"\n🔁 {len(self.pending_edits[guild.id][3])} edits can be retried with /resumenames."
             
             await public_msg.edit(content=f"{public_msg.content}\n\n{summary}")
             
@@ -291,13 +484,18 @@ class Members(commands.Cog):
             await public_msg.edit(content=f"{public_msg.content}\n❌ Process failed: {str(e)}")
     
     @app_commands.command(name="renameall", description="Automatically rename all members based on their roles")
-    async def renameall(self, interaction: discord.Interaction):
+    @app_commands.describe(dry_run="Only show what would change, without renaming anyone")
+    async def renameall(self, interaction: discord.Interaction, dry_run: bool = False):
         """Automatically rename all members in the server based on their roles"""
         # Check if the user is the owner
         if interaction.user.id != OWNER_ID:
             await interaction.response.send_message("Only the server owner can use this command.", ephemeral=True)
             return
         
+        if dry_run:
+            await self._send_dry_run(interaction, "roles")
+            return
+        
         # Respond immediately to avoid timeout
         await interaction.response.send_message(
             "🔄 **Starting automatic rename process...**\n"
@@ -327,73 +525,27 @@ class Members(commands.Cog):
             
             # Get all members
             try:
-                members = guild.members
-                if len(members) < guild.member_count:
-                    await public_msg.edit(content=f"{public_msg.content}\n📥 Fetching all server members...")
-                    members = [member async for member in guild.fetch_members(limit=None)]
+                members = await self._fetch_members(guild, public_msg)
             except Exception as e:
                 logger.error(f"Error fetching members: {e}")
                 await public_msg.edit(content=f"{public_msg.content}\n❌ Error fetching server members")
                 return
             
-            # Filter out bots
-            real_members = [member for member in members if not member.bot]
+            # Work out which members actually need a new nickname before touching the API
+            plan = plan_nicknames(members, "roles", guild.me)
+            skipped_no_roles = plan.no_roles
             
             await public_msg.edit(
                 content=f"{public_msg.content}\n"
-                f"🎯 **Processing {len(real_members)} members**\n"
-                f"Estimated time: ~{len(real_members) * 0.3 / 60:.1f} minutes"
+                f"🎯 **Processing {plan.total} members** ({len(plan.changes)} need changes)"
             )
             
-            # Process each member
-            for i, member in enumerate(real_members):
-                try:
-                    # Generate new nickname based on roles
-                    new_nickname = generate_proper_nickname(member)
-                    
-                    # Skip if no relevant roles found
-                    if new_nickname is None:
-                        skipped_no_roles += 1
-                        logger.info(f"Skipped {get_clean_display_name(member)} - no relevant roles")
-                        continue
-                    
-                    # Skip if nickname is already correct
-                    if member.nick == new_nickname:
-                        logger.info(f"Skipped {get_clean_display_name(member)} - nickname already correct")
-                        continue
-                    
-                    # Try to update the nickname
-                    try:
-                        await member.edit(nick=new_nickname, reason="Automatic role-based rename")
-                        renamed_count += 1
-                        logger.info(f"Renamed {member.name} to {new_nickname}")
-                        
-                    except discord.Forbidden:
-                        skipped_permissions += 1
-                        logger.warning(f"No permission to rename {get_clean_display_name(member)}")
-                        
-                    except discord.HTTPException as e:
-                        errors += 1
-                        logger.error(f"HTTP error renaming {get_clean_display_name(member)}: {e}")
-                        
-                except Exception as e:
-                    errors += 1
-                    logger.error(f"Unexpected error processing {get_clean_display_name(member)}: {e}")
-                
-                # Add delay to avoid rate limits
-                await asyncio.sleep(0.3)
-                
-                # Update progress every 25 members
-                if (i + 1) % 25 == 0:
-                    try:
-                        progress_percentage = ((i + 1) / len(real_members)) * 100
-                        await public_msg.edit(
-                            content=f"{public_msg.content.split('🎯')[0]}🎯 **Processing {len(real_members)} members**\n"
-                            f"⏳ Progress: {i + 1}/{len(real_members)} ({progress_percentage:.1f}%)\n"
-                            f"✅ Renamed: {renamed_count} | ⏭️ Skipped: {skipped_no_roles + skipped_permissions}"
-                        )
-                    except Exception as e:
-                        logger.error(f"Error updating progress: {e}")
+            job = await self._run_nickname_job(
+                guild, "renameall", plan.changes, "Automatic role-based rename", public_msg, "Renamed"
+            )
+            renamed_count = job.done
+            skipped_permissions, errors = self._count_failures(job)
+            skipped_permissions += plan.blocked
             
             # Send final summary
             summary = (
@@ -402,11 +554,13 @@ class Members(commands.Cog):
                 f"**Skipped (No Roles):** {skipped_no_roles}\n"
                 f"**Skipped (Permissions):** {skipped_permissions}\n"
                 f"**Errors:** {errors}\n"
-                f"**Total Processed:** {len(real_members)}"
+                f"**Total Processed:** {plan.total}"
             )
             
             if errors > 0:
                 summary += "\n\n⚠️ Some errors occurred. Check bot logs for details."
+            if guild.id in self.pending_edits:
+                summary += f"\n🔁 {len(self.pending_edits[guild.id][3])} edits can be retried with /resumenames."
             
             await public_msg.edit(content=f"{public_msg.content}\n\n{summary}")
             
@@ -502,13 +656,18 @@ class Members(commands.Cog):
         await interaction.response.send_message("Setup message has been reset. Use /setname to create a new one.", ephemeral=True)
 
     @app_commands.command(name="resetnames", description="Reset all members' nicknames to their usernames")
-    async def resetnames(self, interaction: discord.Interaction):
+    @app_commands.describe(dry_run="Only show what would change, without renaming anyone")
+    async def resetnames(self, interaction: discord.Interaction, dry_run: bool = False):
         """Reset all nicknames to usernames"""
         # Check if the user is the owner
         if interaction.user.id != OWNER_ID:
             await interaction.response.send_message("Only the server owner can use this command.", ephemeral=True)
             return
         
+        if dry_run:
+            await self._send_dry_run(interaction, "reset")
+            return
+        
         # Respond immediately to avoid timeout
         await interaction.response.send_message(
             "🔄 **Starting nickname reset process...**\n"
@@ -537,64 +696,25 @@ class Members(commands.Cog):
             
             # Get all members
             try:
-                members = guild.members
-                if len(members) < guild.member_count:
-                    await public_msg.edit(content=f"{public_msg.content}\n📥 Fetching all server members...")
-                    members = [member async for member in guild.fetch_members(limit=None)]
+                members = await self._fetch_members(guild, public_msg)
             except Exception as e:
                 logger.error(f"Error fetching members: {e}")
                 await public_msg.edit(content=f"{public_msg.content}\n❌ Error fetching server members")
                 return
             
-            # Filter out bots
-            real_members = [member for member in members if not member.bot]
+            # Members without a nickname need no request at all
+            plan = plan_nicknames(members, "reset", guild.me)
+            skipped_count = plan.unchanged + plan.blocked
             
             await public_msg.edit(
                 content=f"{public_msg.content}\n"
-                f"🎯 **Processing {len(real_members)} members**\n"
-                f"Estimated time: ~{len(real_members) * 0.3 / 60:.1f} minutes"
+                f"🎯 **Processing {plan.total} members** ({len(plan.changes)} have nicknames)"
             )
             
-            # Process each member
-            for i, member in enumerate(real_members):
-                try:
-                    # Skip if no nickname set
-                    if not member.nick:
-                        skipped_count += 1
-                        continue
-                        
-                    # Reset to username
-                    try:
-                        await member.edit(nick=None, reason="Reset nickname")
-                        reset_count += 1
-                        logger.info(f"Reset nickname for {member.name}")
-                        
-                    except discord.Forbidden:
-                        skipped_count += 1
-                        logger.warning(f"No permission to reset {get_clean_display_name(member)}")
-                        
-                    except discord.HTTPException as e:
-                        errors += 1
-                        logger.error(f"HTTP error resetting {get_clean_display_name(member)}: {e}")
-                        
-                except Exception as e:
-                    errors += 1
-                    logger.error(f"Unexpected error processing {get_clean_display_name(member)}: {e}")
-                
-                # Add delay to avoid rate limits
-                await asyncio.sleep(0.3)
-                
-                # Update progress every 25 members
-                if (i + 1) % 25 == 0:
-                    try:
-                        progress_percentage = ((i + 1) / len(real_members)) * 100
-                        await public_msg.edit(
-                            content=f"{public_msg.content.split('🎯')[0]}🎯 **Processing {len(real_members)} members**\n"
-                            f"⏳ Progress: {i + 1}/{len(real_members)} ({progress_percentage:.1f}%)\n"
-                            f"✅ Reset: {reset_count} | ⏭️ Skipped: {skipped_count}"
-                        )
-                    except Exception as e:
-                        logger.error(f"Error updating progress: {e}")
+            job = await self._run_nickname_job(guild, "resetnames", plan.changes, "Reset nickname", public_msg, "Reset")
+            reset_count = job.done
+            skipped_permissions, errors = self._count_failures(job)
+            skipped_count += skipped_permissions
             
             # Send final summary
             summary = (
@@ -602,11 +722,13 @@ class Members(commands.Cog):
                 f"**Successfully Reset:** {reset_count}\n"
                 f"**Skipped:** {skipped_count}\n"
                 f"**Errors:** {errors}\n"
-                f"**Total Processed:** {len(real_members)}"
+                f"**Total Processed:** {plan.total}"
             )
             
             if errors > 0:
                 summary += "\n\n⚠️ Some errors occurred. Check bot logs for details."
+            if guild.id in self.pending_edits:
+                summary += f"\n🔁 {len(self.pending_edits[guild.id][3])} edits can be retried with /resumenames."
             
             await public_msg.edit(content=f"{public_msg.content}\n\n{summary}")
             
@@ -614,5 +736,44 @@ class Members(commands.Cog):
             logger.error(f"Error in reset process: {e}")
             await public_msg.edit(content=f"{public_msg.content}\n❌ Process failed: {str(e)}")
 
+    @app_commands.command(name="resumenames", description="Retry the nickname edits left over by the last interrupted pass")
+    async def resumenames(self, interaction: discord.Interaction):
+        """Re-run only the unfinished edits of the last /fixnames, /renameall or /resetnames"""
+        # Check if the user is the owner
+        if interaction.user.id != OWNER_ID:
+            await interaction.response.send_message("Only the server owner can use this command.", ephemeral=True)
+            return
+        
+        pending = self.pending_edits.get(interaction.guild.id)
+        if not pending:
+            await interaction.response.send_message("✅ Nothing to resume: the last nickname pass finished.", ephemeral=True)
+            return
+        
+        name, reason, done_label, edits = pending
+        # Someone may have fixed a few by hand in the meantime
+        edits = [(member, nickname) for member, nickname in edits if member.nick != nickname]
+        
+        await interaction.response.send_message(f"🔁 Resuming **{name}** with {len(edits)} edits.", ephemeral=True)
+        public_msg = await interaction.channel.send(f"🔁 **Resuming {name}: {len(edits)} nickname edits left**")
+        self.bot.loop.create_task(self._process_resume(interaction.guild, name, reason, done_label, edits, public_msg))
+    
+    async def _process_resume(self, guild, name, reason, done_label, edits, public_msg):
+        """Background task for /resumenames"""
+        try:
+            job = await self._run_nickname_job(guild, name, edits, reason, public_msg, done_label)
+            skipped_permissions, errors = self._count_failures(job)
+            summary = (
+                f"✅ **{name} resumed and complete!**\n"
+                f"**{done_label}:** {job.done}\n"
+                f"**Skipped (Permissions):** {skipped_permissions}\n"
+                f"**Errors:** {errors}"
+            )
+            if guild.id in self.pending_edits:
+                summary += f"\n🔁 {len(self.pending_edits[guild.id][3])} edits can be retried with /resumenames."
+            await public_msg.edit(content=f"{public_msg.content}\n\n{summary}")
+        except Exception as e:
+            logger.error(f"Error resuming {name}: {e}")
+            await public_msg.edit(content=f"{public_msg.content}\n❌ Process failed: {str(e)}")
+
 async def setup(bot):
     await bot.add_cog(Members(bot))
@@ -1,67 +1,117 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-import pandas as pd
+
+from profession_directory import ProfessionDirectory, build_pages, send_pages
+
+METIERS_GUILD_ID = 1300093554064097400
+METIERS_CHANNEL_ID = 1300093555217268800
+RELOAD_SECONDS = 60  # How often the workbook is checked for edits
+FOOTER_TIP = "Astuce : Si un joueur n'est pas en ligne, ajoutez-le comme ami et vérifiez son statut en ligne."
+
+
+def format_player(entry):
+    return f"**Nom**: {entry.name} | **Serveur**: {entry.server} | **Niveau métier**: {entry.level} | **Classe**: {entry.character_class}"
+
 
 class Metiers(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.file_path = './metiers.xlsx'  # Ensure this matches the uploaded file name and location
-        self.professions = pd.ExcelFile(self.file_path).sheet_names
+        self.directory = ProfessionDirectory(self.file_path)
 
-    @app_commands.command(name="metiers", description="Afficher les professions disponibles")
-    async def metiers(self, interaction: discord.Interaction):
-        # Restrict command to specific server and channel
-        if interaction.guild.id != 1300093554064097400 or interaction.channel.id != 1300093555217268800:
+    async def cog_load(self):
+        await self.directory.refresh()
+        self.reload_directory.start()
+
+    async def cog_unload(self):
+        self.reload_directory.cancel()
+
+    @tasks.loop(seconds=RELOAD_SECONDS)
+    async def reload_directory(self):
+        await self.directory.refresh()
+
+    async def check_channel(self, interaction: discord.Interaction) -> bool:
+        # Restrict commands to specific server and channel
+        if interaction.guild is None or interaction.guild.id != METIERS_GUILD_ID or interaction.channel.id != METIERS_CHANNEL_ID:
             await interaction.response.send_message(
                 "Cette commande n'est disponible que dans le canal **#║╟➢👷metiers**.",
                 ephemeral=True
             )
+            return False
+        return True
+
+    @app_commands.command(name="metiers", description="Afficher les professions disponibles")
+    async def metiers(self, interaction: discord.Interaction):
+        if not await self.check_channel(interaction):
+            return
+
+        if not self.directory.professions:
+            await interaction.response.send_message("Aucune profession disponible pour le moment.", ephemeral=True)
             return
 
         # Create dropdown options from Excel sheet names
-        profession_options = [
-            discord.SelectOption(label=profession, value=profession) for profession in self.professions
-        ]
-        view = MetiersView(profession_options, self.file_path)
+        profession_options = []
+        for profession in self.directory.professions[:25]:
+            level_range = self.directory.level_ranges.get(profession)
+            description = f"{len(self.directory.players(profession))} joueurs"
+            if level_range:
+                description += f" • niveau {level_range[0]}-{level_range[1]}"
+            profession_options.append(discord.SelectOption(label=profession, value=profession, description=description))
+        view = MetiersView(profession_options, self.directory)
         await interaction.response.send_message("Choisissez une profession :", view=view)
 
+    @app_commands.command(name="metiers_recherche", description="Rechercher un joueur ou une profession")
+    @app_commands.describe(recherche="Nom du joueur ou de la profession (l'orthographe approximative est acceptée)")
+    async def metiers_recherche(self, interaction: discord.Interaction, recherche: str):
+        if not await self.check_channel(interaction):
+            return
+
+        professions, entries = self.directory.search(recherche)
+        if not professions and not entries:
+            await interaction.response.send_message(f"Aucun résultat pour **{recherche}**.", ephemeral=True)
+            return
+
+        lines = []
+        for profession in professions:
+            level_range = self.directory.level_ranges.get(profession)
+            line = f"👷 **{profession}** : {len(self.directory.players(profession))} joueurs"
+            if level_range:
+                line += f" (niveau {level_range[0]}-{level_range[1]})"
+            lines.append(line)
+        for entry in entries:
+            lines.append(f"**{entry.profession}** | {format_player(entry)}")
+
+        pages = build_pages(f"Résultats pour {recherche}", lines, color=discord.Color.blue(), footer=FOOTER_TIP)
+        await send_pages(interaction, pages)
+
 class MetiersView(discord.ui.View):
-    def __init__(self, profession_options, file_path):
+    def __init__(self, profession_options, directory):
         super().__init__()
-        self.add_item(MetiersSelect(profession_options, file_path))
+        self.add_item(MetiersSelect(profession_options, directory))
 
 class MetiersSelect(discord.ui.Select):
-    def __init__(self, profession_options, file_path):
+    def __init__(self, profession_options, directory):
         super().__init__(placeholder="Sélectionnez une profession", min_values=1, max_values=1, options=profession_options)
-        self.file_path = file_path
+        self.directory = directory
 
     async def callback(self, interaction: discord.Interaction):
         selected_profession = self.values[0]
-        try:
-            # Load data from the selected sheet
-            df = pd.read_excel(self.file_path, sheet_name=selected_profession)
-            # Convert data to a presentable format
-            formatted_data = "\n".join(
-                f"**Nom**: {row['Nom']} | **Serveur**: {row['Serveur']} | **Niveau métier**: {row['Niveau métier']} | **Classe**: {row['Classe']}"
-                for _, row in df.iterrows()
-            )
-
-            embed = discord.Embed(
-                title=f"Joueurs avec la profession {selected_profession}",
-                description=formatted_data,
-                color=discord.Color.blue()
-            )
-            embed.set_footer(
-                text="Astuce : Si un joueur n'est pas en ligne, ajoutez-le comme ami et vérifiez son statut en ligne."
-            )
-            
-            # Send the result publicly in the channel
-            await interaction.response.send_message(embed=embed)
-        except Exception as e:
+        players = self.directory.players(selected_profession)
+        if players is None:
             await interaction.response.send_message(
-                f"Erreur lors du chargement des données pour {selected_profession}: {e}"
+                f"Erreur lors du chargement des données pour {selected_profession}: profession introuvable"
             )
+            return
+
+        pages = build_pages(
+            f"Joueurs avec la profession {selected_profession}",
+            [format_player(entry) for entry in players] or ["Aucun joueur."],
+            color=discord.Color.blue(),
+            footer=FOOTER_TIP
+        )
+        # Send the result publicly in the channel
+        await send_pages(interaction, pages)
 
 async def setup(bot):
     await bot.add_cog(Metiers(bot))
@@ -1,38 +1,100 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-import pandas as pd
+
+from profession_directory import ProfessionDirectory, build_pages, send_pages
+
+RELOAD_SECONDS = 60  # How often the workbook is checked for edits
+
+
+def format_table(headers, entries):
+    """Header line and right-aligned rows, like the old DataFrame.to_string output"""
+    rows = [[str(value) if value is not None else '' for value in entry.values()] for entry in entries]
+    widths = [max([len(header)] + [len(row[index]) for row in rows]) for index, header in enumerate(headers)]
+    header_line = ' '.join(header.rjust(width) for header, width in zip(headers, widths))
+    return header_line, [' '.join(value.rjust(width) for value, width in zip(row, widths)) for row in rows]
+
 
 class Profession(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.file_path = './Professions.xlsx'  # Correct relative path
-        self.professions = pd.ExcelFile(self.file_path).sheet_names
+        self.directory = ProfessionDirectory(self.file_path)
+
+    async def cog_load(self):
+        await self.directory.refresh()
+        self.reload_directory.start()
+
+    async def cog_unload(self):
+        self.reload_directory.cancel()
+
+    @tasks.loop(seconds=RELOAD_SECONDS)
+    async def reload_directory(self):
+        await self.directory.refresh()
 
     @app_commands.command(name="profession", description="Get players by profession")
     async def profession(self, interaction: discord.Interaction):
-        profession_options = [
-            discord.SelectOption(label=profession, value=profession) for profession in self.professions
-        ]
-        view = ProfessionView(profession_options, self.file_path)
+        if not self.directory.professions:
+            await interaction.response.send_message("No professions are available right now.", ephemeral=True)
+            return
+
+        profession_options = []
+        for profession in self.directory.professions[:25]:
+            level_range = self.directory.level_ranges.get(profession)
+            description = f"{len(self.directory.players(profession))} players"
+            if level_range:
+                description += f" • level {level_range[0]}-{level_range[1]}"
+            profession_options.append(discord.SelectOption(label=profession, value=profession, description=description))
+        view = ProfessionView(profession_options, self.directory)
         await interaction.response.send_message("Select a profession:", view=view, ephemeral=True)
 
+    @app_commands.command(name="profession_search", description="Find a player or a profession")
+    @app_commands.describe(query="Player or profession name (close spellings are fine)")
+    async def profession_search(self, interaction: discord.Interaction, query: str):
+        professions, entries = self.directory.search(query)
+        if not professions and not entries:
+            await interaction.response.send_message(f"No results for **{query}**.", ephemeral=True)
+            return
+
+        lines = []
+        for profession in professions:
+            level_range = self.directory.level_ranges.get(profession)
+            line = f"**{profession}**: {len(self.directory.players(profession))} players"
+            if level_range:
+                line += f" (level {level_range[0]}-{level_range[1]})"
+            lines.append(line)
+        for entry in entries:
+            lines.append(f"**{entry.name}** ({entry.server}) | {entry.profession} {entry.level} | {entry.character_class}")
+
+        pages = build_pages(f"Results for {query}", lines, color=discord.Color.blue())
+        await send_pages(interaction, pages, ephemeral=True)
+
 class ProfessionView(discord.ui.View):
-    def __init__(self, profession_options, file_path):
+    def __init__(self, profession_options, directory):
         super().__init__()
-        self.file_path = file_path
-        self.add_item(ProfessionSelect(profession_options, file_path))
+        self.directory = directory
+        self.add_item(ProfessionSelect(profession_options, directory))
 
 class ProfessionSelect(discord.ui.Select):
-    def __init__(self, profession_options, file_path):
+    def __init__(self, profession_options, directory):
         super().__init__(placeholder="Choose a profession", min_values=1, max_values=1, options=profession_options)
-        self.file_path = file_path
+        self.directory = directory
 
     async def callback(self, interaction: discord.Interaction):
         selected_profession = self.values[0]
-        df = pd.read_excel(self.file_path, sheet_name=selected_profession)
-        player_info = df.to_string(index=False)
-        await interaction.response.send_message(f"Players with profession {selected_profession}:\n```{player_info}```", ephemeral=True)
+        players = self.directory.players(selected_profession)
+        if not players:
+            await interaction.response.send_message(f"No players found for {selected_profession}.", ephemeral=True)
+            return
+
+        header_line, rows = format_table(self.directory.headers, players)
+        pages = build_pages(
+            f"Players with profession {selected_profession}",
+            rows,
+            color=discord.Color.blue(),
+            wrap=lambda body: f"```\n{header_line}\n{body}```"
+        )
+        await send_pages(interaction, pages, ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(Profession(bot))
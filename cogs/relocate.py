@@ -3,9 +3,19 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 import asyncio
+import tempfile
 from asyncio import Lock
 from datetime import datetime, timedelta
 import re
+import aiohttp
+from bulk_scheduler import get_scheduler
+
+WEBHOOK_NAME = "Relocate"
+MAX_CONTENT = 2000
+ATTACHMENT_CONCURRENCY = 4  # Attachments downloaded in parallel while earlier posts go out
+SPOOL_MAX_BYTES = 1024 * 1024  # Larger attachments spill to disk instead of memory
+CHUNK_SIZE = 64 * 1024
+BULK_DELETE_MAX_AGE = timedelta(days=14)  # Discord refuses bulk deletes of older messages
 
 class Relocate(commands.Cog):
     def __init__(self, bot):
@@ -14,6 +24,7 @@ class Relocate(commands.Cog):
         self.locks = {}  # Locks to prevent race conditions
         self.reaction_relocate = {}  # Track messages marked for relocation via reaction
         self.AUTHORIZED_USER_ID = 486652069831376943  # Latif's user ID
+        self.webhooks = {}  # target channel id -> relocation webhook
 
     def is_authorized(self, user_id):
         """Check if the user is authorized to use relocate commands"""
@@ -30,94 +41,175 @@ class Relocate(commands.Cog):
             return False
         return True
 
-    async def create_embed_message(self, message, source_channel):
-        """Create an embedded message with author info and content"""
-        embed = discord.Embed(
-            description=message.content if message.content else "*No text content*",
-            color=message.author.color if hasattr(message.author, 'color') else discord.Color.default(),
-            timestamp=message.created_at
-        )
-        
-        # Set author with profile picture
-        embed.set_author(
-            name=message.author.display_name,
-            icon_url=message.author.display_avatar.url
-        )
-        
-        # Add source channel info
-        embed.set_footer(text=f"Originally from #{source_channel.name}")
-        
-        # Handle message replies
-        if message.reference and message.reference.message_id:
+    async def get_webhook(self, target_channel):
+        """Our relocation webhook in the target channel, created on first use"""
+        webhook = self.webhooks.get(target_channel.id)
+        if webhook:
+            return webhook
+        for existing in await target_channel.webhooks():
+            if existing.user and existing.user.id == self.bot.user.id and existing.name == WEBHOOK_NAME:
+                webhook = existing
+                break
+        else:
+            webhook = await target_channel.create_webhook(name=WEBHOOK_NAME, reason="Message relocation")
+        self.webhooks[target_channel.id] = webhook
+        return webhook
+
+    async def reply_line(self, message, cache, source_channel):
+        """Quote line for a reply; history already embeds the referenced message, the cache covers the rest"""
+        reference = message.reference
+        if not reference or not reference.message_id:
+            return ""
+
+        if isinstance(reference.resolved, discord.Message):
+            replied_message = reference.resolved
+        elif isinstance(reference.resolved, discord.DeletedReferencedMessage):
+            replied_message = None
+        elif reference.message_id in cache:
+            replied_message = cache[reference.message_id]
+        else:
             try:
-                replied_message = await source_channel.fetch_message(message.reference.message_id)
-                embed.add_field(
-                    name="Replying to:",
-                    value=f"{replied_message.author.mention}: {replied_message.content[:100]}{'...' if len(replied_message.content) > 100 else ''}",
-                    inline=False
-                )
-            except discord.errors.NotFound:
-                embed.add_field(name="Replying to:", value="*Message not found*", inline=False)
-        
-        # Handle message attachments in embed
-        if message.attachments:
-            if len(message.attachments) == 1 and message.attachments[0].content_type and message.attachments[0].content_type.startswith('image/'):
-                # Single image - display in embed
-                embed.set_image(url=message.attachments[0].url)
-            else:
-                # Multiple attachments or non-image files
-                attachment_info = []
-                for i, attachment in enumerate(message.attachments, 1):
-                    attachment_info.append(f"{i}. [{attachment.filename}]({attachment.url})")
-                embed.add_field(
-                    name=f"Attachments ({len(message.attachments)})",
-                    value="\n".join(attachment_info),
-                    inline=False
-                )
-        
-        # Handle embeds in the original message
-        if message.embeds:
-            embed.add_field(
-                name="Original message contained embeds",
-                value=f"This message had {len(message.embeds)} embed(s)",
-                inline=False
+                replied_message = await source_channel.fetch_message(reference.message_id)
+            except discord.errors.HTTPException:
+                replied_message = None
+            cache[reference.message_id] = replied_message
+
+        if replied_message is None:
+            return "> ↪️ *Message not found*\n"
+        snippet = replied_message.content[:100] + ('...' if len(replied_message.content) > 100 else '')
+        return f"> ↪️ **{replied_message.author.display_name}**: {snippet}\n"
+
+    async def download_attachments(self, session, semaphore, message, size_limit):
+        """Stream a message's attachments to spooled temp files; oversized ones come back as links"""
+        files = []
+        links = []
+        async with semaphore:
+            for attachment in message.attachments:
+                if attachment.size > size_limit:
+                    links.append(f"📎 [{attachment.filename}]({attachment.url})")
+                    continue
+                spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+                try:
+                    async with session.get(attachment.url) as response:
+                        response.raise_for_status()
+                        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                            spool.write(chunk)
+                    spool.seek(0)
+                    files.append(discord.File(spool, filename=attachment.filename, spoiler=attachment.is_spoiler()))
+                except Exception as e:
+                    spool.close()
+                    logging.warning(f"Could not relocate attachment {attachment.filename}: {e}")
+                    links.append(f"⚠️ [{attachment.filename}]({attachment.url})")
+        return files, links
+
+    async def build_posts(self, messages, source_channel):
+        """Turn messages into webhook posts, packing consecutive text-only messages by one author"""
+        cache = {message.id: message for message in messages}
+        posts = []
+        for message in messages:
+            text = (await self.reply_line(message, cache, source_channel) + message.content)[:MAX_CONTENT]
+            embeds = [embed for embed in message.embeds if embed.type == 'rich'][:10]
+            packable = not message.attachments and not embeds and text
+            last = posts[-1] if posts else None
+            if (packable and last and last['packable'] and last['author'].id == message.author.id
+                    and len(last['content']) + 1 + len(text) <= MAX_CONTENT):
+                last['content'] += "\n" + text
+                last['messages'].append(message)
+                continue
+            posts.append({
+                'author': message.author,
+                'content': text,
+                'embeds': embeds,
+                'messages': [message],
+                'packable': packable
+            })
+        return posts
+
+    async def relocate_messages(self, messages, target_channel, source_channel, delete=True):
+        """Repost messages (oldest first) through a webhook, then remove the originals in bulk
+
+        Returns (relocated, deleted) counts.
+        """
+        messages = sorted(messages, key=lambda m: m.created_at)
+        webhook = await self.get_webhook(target_channel)
+        posts = await self.build_posts(messages, source_channel)
+        relocated = []
+
+        async with aiohttp.ClientSession() as session:
+            semaphore = asyncio.Semaphore(ATTACHMENT_CONCURRENCY)
+            size_limit = target_channel.guild.filesize_limit
+            # Downloads run ahead of posting; posting order stays the original order
+            downloads = {
+                message.id: asyncio.create_task(self.download_attachments(session, semaphore, message, size_limit))
+                for message in messages if message.attachments
+            }
+            try:
+                for post in posts:
+                    files = []
+                    content = post['content']
+                    for message in post['messages']:
+                        if message.id in downloads:
+                            message_files, links = await downloads.pop(message.id)
+                            files += message_files
+                            if links:
+                                content = "\n".join([content] + links) if content else "\n".join(links)
+                    try:
+                        await webhook.send(
+                            content=content[:MAX_CONTENT] or None,
+                            username=post['author'].display_name.replace('discord', 'disc0rd').replace('Discord', 'Disc0rd')[:80],
+                            avatar_url=post['author'].display_avatar.url,
+                            files=files,
+                            embeds=post['embeds'],
+                            allowed_mentions=discord.AllowedMentions.none(),
+                            wait=True
+                        )
+                        relocated += post['messages']
+                    except Exception as e:
+                        logging.error(f"Error relocating message {post['messages'][0].id}: {e}")
+                    finally:
+                        for file in files:
+                            file.close()
+            finally:
+                for task in downloads.values():
+                    task.cancel()
+
+        deleted = 0
+        if delete and relocated and source_channel.permissions_for(source_channel.guild.me).manage_messages:
+            deleted = await self.delete_originals(source_channel, relocated)
+        return len(relocated), deleted
+
+    async def delete_originals(self, channel, messages):
+        """Bulk delete messages younger than 14 days, delete the rest one by one through the scheduler"""
+        # Margin so a message doesn't cross the 14 day line between check and request
+        cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE + timedelta(hours=1)
+        recent = [message for message in messages if message.created_at > cutoff]
+        old = [message for message in messages if message.created_at <= cutoff]
+        deleted = 0
+
+        for i in range(0, len(recent), 100):
+            chunk = recent[i:i + 100]
+            try:
+                await channel.delete_messages(chunk)
+                deleted += len(chunk)
+            except discord.errors.HTTPException as e:
+                logging.error(f"Error bulk deleting {len(chunk)} messages: {e}")
+
+        if old:
+            job = get_scheduler().submit(
+                "relocate cleanup", old, lambda message: message.delete(),
+                route=lambda _: f"DELETE /channels/{channel.id}/messages/{{id}}"
             )
-        
-        return embed
+            await job.wait()
+            deleted += job.done
+        return deleted
 
     async def relocate_message(self, message, target_channel, source_channel=None):
-        """Relocate a single message with all its content"""
+        """Relocate a single message with all its content (the original is left in place)"""
         if source_channel is None:
             source_channel = message.channel
-            
-        embed = await self.create_embed_message(message, source_channel)
-        
-        # Send the embed
-        sent_message = await target_channel.send(embed=embed)
-        
-        # Send attachments separately if there are multiple or non-image files
-        if message.attachments:
-            if len(message.attachments) > 1 or not (message.attachments[0].content_type and message.attachments[0].content_type.startswith('image/')):
-                files = []
-                for attachment in message.attachments:
-                    try:
-                        file = await attachment.to_file()
-                        files.append(file)
-                    except discord.errors.HTTPException:
-                        # Handle files that are too large or can't be downloaded
-                        await target_channel.send(f"⚠️ Could not relocate attachment: {attachment.filename} (too large or inaccessible)")
-                
-                if files:
-                    # Send files in batches (Discord limit is 10 files per message)
-                    for i in range(0, len(files), 10):
-                        batch = files[i:i+10]
-                        await target_channel.send(files=batch)
-        
-        # Handle original embeds
-        for original_embed in message.embeds:
-            await target_channel.send(embed=original_embed)
-        
-        return sent_message
+        relocated, _ = await self.relocate_messages([message], target_channel, source_channel, delete=False)
+        if not relocated:
+            raise RuntimeError("The message could not be reposted")
 
     @app_commands.command(name="relocate", description="Relocate a message to a different channel")
     async def relocate(self, interaction: discord.Interaction, message_id: str, target_channel: discord.TextChannel):
@@ -162,8 +254,6 @@ class Relocate(commands.Cog):
                 await self.relocate_message(message, target_channel)
 
                 # Delete the original message with retry logic
-                await asyncio.sleep(1)  # Small delay to ensure the message is sent before deleting
-                
                 if not channel.permissions_for(interaction.guild.me).manage_messages:
                     logging.warning("Missing permission to manage messages in the source channel.")
                     await interaction.followup.send("Relocation was successful, but the bot lacks permissions to delete the original message.")
@@ -202,8 +292,8 @@ class Relocate(commands.Cog):
         if not await self.check_authorization(interaction):
             return
 
-        if count < 1 or count > 50:
-            await interaction.response.send_message("Please specify a count between 1 and 50.", ephemeral=True)
+        if count < 1 or count > 500:
+            await interaction.response.send_message("Please specify a count between 1 and 500.", ephemeral=True)
             return
 
         try:
@@ -223,23 +313,8 @@ class Relocate(commands.Cog):
                 await interaction.followup.send("No messages found to relocate.")
                 return
 
-            # Relocate messages in reverse order (oldest first)
-            messages.reverse()
-            relocated_count = 0
-
-            for message in messages:
-                try:
-                    await self.relocate_message(message, target_channel)
-                    
-                    # Delete original message if we have permission
-                    if interaction.channel.permissions_for(interaction.guild.me).manage_messages:
-                        await message.delete()
-                    
-                    relocated_count += 1
-                    await asyncio.sleep(0.5)  # Small delay between relocations
-                except Exception as e:
-                    logging.error(f"Error relocating message {message.id}: {e}")
-                    continue
+            # Relocate messages oldest first, then delete the originals in bulk
+            relocated_count, _ = await self.relocate_messages(messages, target_channel, interaction.channel)
 
             await interaction.followup.send(f"Successfully relocated {relocated_count} out of {len(messages)} messages.")
 
@@ -275,23 +350,8 @@ class Relocate(commands.Cog):
                 await interaction.followup.send(f"No recent messages found from {user.mention}.")
                 return
 
-            # Relocate messages in reverse order (oldest first)
-            messages.reverse()
-            relocated_count = 0
-
-            for message in messages:
-                try:
-                    await self.relocate_message(message, target_channel)
-                    
-                    # Delete original message if we have permission
-                    if interaction.channel.permissions_for(interaction.guild.me).manage_messages:
-                        await message.delete()
-                    
-                    relocated_count += 1
-                    await asyncio.sleep(0.5)  # Small delay between relocations
-                except Exception as e:
-                    logging.error(f"Error relocating message {message.id}: {e}")
-                    continue
+            # Relocate messages oldest first, then delete the originals in bulk
+            relocated_count, _ = await self.relocate_messages(messages, target_channel, interaction.channel)
 
             await interaction.followup.send(f"Successfully relocated {relocated_count} messages from {user.mention}.")
 
@@ -337,23 +397,8 @@ class Relocate(commands.Cog):
                 await interaction.followup.send("No messages found in the specified range.")
                 return
 
-            # Sort messages by timestamp (oldest first)
-            messages.sort(key=lambda m: m.created_at)
-            relocated_count = 0
-
-            for message in messages:
-                try:
-                    await self.relocate_message(message, target_channel)
-                    
-                    # Delete original message if we have permission
-                    if interaction.channel.permissions_for(interaction.guild.me).manage_messages:
-                        await message.delete()
-                    
-                    relocated_count += 1
-                    await asyncio.sleep(0.5)  # Small delay between relocations
-                except Exception as e:
-                    logging.error(f"Error relocating message {message.id}: {e}")
-                    continue
+            # Relocate messages oldest first, then delete the originals in bulk
+            relocated_count, _ = await self.relocate_messages(messages, target_channel, interaction.channel)
 
             await interaction.followup.send(f"Successfully relocated {relocated_count} messages from the specified range.")
 
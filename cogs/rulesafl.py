@@ -1,11 +1,58 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
+import asyncio
 import os
 import logging
 
+from panel_registry import get_panel_registry
+
 logger = logging.getLogger(__name__)
 
+RULES_PAGE_CHARS = 4000  # Embed descriptions are capped at 4096
+MESSAGE_EMBED_CHARS = 5800  # All embeds of one message share a 6000 character cap
+MAX_EMBEDS_PER_MESSAGE = 10
+RULES_RELOAD_SECONDS = 30  # How often the rules files are checked for edits
+RULES_COLOR = 0xff9900
+
+
+def split_rules(text, limit=RULES_PAGE_CHARS):
+    """Split text into chunks of at most ``limit`` characters, preferring paragraph then line breaks"""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind('\n\n', 0, limit)
+        if cut <= 0:
+            cut = text.rfind('\n', 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut].rstrip())
+        text = text[cut:].lstrip('\n')
+    if text.strip():
+        chunks.append(text)
+    return chunks
+
+
+def build_rules_messages(title, text):
+    """Prebuilt embeds for one language, grouped into as few messages as Discord's limits allow"""
+    chunks = split_rules(text)
+    messages = []
+    current, current_size = [], 0
+    for number, chunk in enumerate(chunks, start=1):
+        embed = discord.Embed(description=chunk, color=RULES_COLOR)
+        if number == 1:
+            embed.title = title
+        if len(chunks) > 1:
+            embed.set_footer(text=f"{number}/{len(chunks)}")
+        size = len(embed)
+        if current and (current_size + size > MESSAGE_EMBED_CHARS or len(current) == MAX_EMBEDS_PER_MESSAGE):
+            messages.append(current)
+            current, current_size = [], 0
+        current.append(embed)
+        current_size += size
+    if current:
+        messages.append(current)
+    return messages
+
 class RulesAFL(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -69,9 +116,27 @@ class RulesAFL(commands.Cog):
 
         # Register persistent views AFTER all attributes are initialized
         self.bot.add_view(PersistentLanguageSelectionView(self))
-        self.bot.add_view(PersistentRulesAgreementView(self, 'EN'))
-        self.bot.add_view(PersistentRulesAgreementView(self, 'ES'))
-        self.bot.add_view(PersistentRulesAgreementView(self, 'FR'))
+        self.agreement_views = {}
+        for language in self.rules_files:
+            self.agreement_views[language] = PersistentRulesAgreementView(self, language)
+            self.bot.add_view(self.agreement_views[language])
+
+        # language -> (mtime, prebuilt embeds grouped per message); clicks never touch the disk
+        self.rules_cache = {}
+        for language in self.rules_files:
+            self.load_rules(language)
+
+    async def cog_load(self):
+        self.reload_rules.start()
+
+    async def cog_unload(self):
+        self.reload_rules.cancel()
+
+    def rules_mtime(self, language):
+        try:
+            return os.stat(self.rules_files[language]).st_mtime
+        except OSError:
+            return None
 
     def read_rules_file(self, language):
         """Read rules from the specified language file"""
@@ -87,6 +152,27 @@ class RulesAFL(commands.Cog):
             logger.error(f"Error reading rules file for {language}: {e}")
             return None
 
+    def load_rules(self, language):
+        """Read, split and prebuild the rules embeds for one language"""
+        mtime = self.rules_mtime(language)
+        content = self.read_rules_file(language)
+        messages = build_rules_messages(self.language_texts[language]['rules_title'], content) if content else None
+        self.rules_cache[language] = (mtime, messages)
+        if messages:
+            pages = sum(len(group) for group in messages)
+            logger.info(f"Loaded {language} rules: {len(content)} characters, {pages} pages")
+
+    @tasks.loop(seconds=RULES_RELOAD_SECONDS)
+    async def reload_rules(self):
+        """Hot-reload rules files whose mtime changed"""
+        for language in self.rules_files:
+            cached_mtime = self.rules_cache.get(language, (None, None))[0]
+            if await asyncio.to_thread(self.rules_mtime, language) != cached_mtime:
+                await asyncio.to_thread(self.load_rules, language)
+
+    def get_rules_messages(self, language):
+        return self.rules_cache.get(language, (None, None))[1]
+
     @commands.hybrid_command(name="setup_verification", description="Setup language verification buttons")
     @app_commands.default_permissions(administrator=True)
     async def setup_verification(self, ctx):
@@ -104,8 +190,8 @@ class RulesAFL(commands.Cog):
                 color=0x00ff00
             )
             
-            # Send the persistent message in the channel
-            await ctx.send(embed=embed, view=view)
+            # Post the persistent message, or update this channel's existing one if it changed
+            await get_panel_registry().publish("rules_verification", ctx.channel, embed=embed, view=view, verify=True)
             
             if isinstance(ctx, discord.Interaction):
                 await ctx.response.send_message("Verification setup complete!", ephemeral=True)
@@ -141,26 +227,25 @@ class PersistentLanguageSelectionView(discord.ui.View):
     async def handle_language_selection(self, interaction: discord.Interaction, language):
         """Handle language selection and show rules"""
         try:
-            # Read rules file
-            rules_content = self.cog.read_rules_file(language)
+            # Prebuilt rules embeds from the cache
+            messages = self.cog.get_rules_messages(language)
             
-            if rules_content is None:
+            if not messages:
                 error_msg = self.cog.language_texts[language]['error_reading_rules']
                 await interaction.response.send_message(error_msg, ephemeral=True)
                 return
 
-            # Create rules embed
-            texts = self.cog.language_texts[language]
-            embed = discord.Embed(
-                title=texts['rules_title'],
-                description=rules_content,
-                color=0xff9900
-            )
-            
-            # Create persistent agreement view
-            agreement_view = PersistentRulesAgreementView(self.cog, language)
+            # The agreement button goes under the last page
+            agreement_view = self.cog.agreement_views[language]
+            last = len(messages) - 1
             
-            await interaction.response.send_message(embed=embed, view=agreement_view, ephemeral=True)
+            await interaction.response.send_message(
+                embeds=messages[0], view=agreement_view if last == 0 else discord.utils.MISSING, ephemeral=True
+            )
+            for index in range(1, len(messages)):
+                await interaction.followup.send(
+                    embeds=messages[index], view=agreement_view if index == last else discord.utils.MISSING, ephemeral=True
+                )
             
         except Exception as e:
             logger.error(f"Error in handle_language_selection: {e}")
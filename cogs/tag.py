@@ -1,15 +1,40 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
 import logging
+import time
+from bulk_scheduler import get_scheduler, member_route
 
 logger = logging.getLogger(__name__)
 
+# Bursts of role changes for one member within this window collapse into one sync
+SYNC_COALESCE_SECONDS = 2.0
+# Members synced in parallel by the event queue
+SYNC_WORKERS = 4
+
 class TagCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.first_server_id = 1213699457233985587  # First server ID
         self.second_server_id = 1363616633951748270  # Second server ID
+        # guild_id -> {role name: role}, kept fresh by the role listeners below
+        self.role_index = {}
+        # (guild_id, role name) -> task creating that role, so parallel syncs don't create duplicates
+        self.role_creations = {}
+        # Per-member coalescing queue of second-server member IDs waiting to be synced
+        self.sync_queue = asyncio.Queue()
+        self.queued_members = set()
+        self.sync_workers = []
+    
+    async def cog_load(self):
+        self.sync_workers = [self.bot.loop.create_task(self._sync_worker()) for _ in range(SYNC_WORKERS)]
+    
+    def cog_unload(self):
+        for worker in self.sync_workers:
+            worker.cancel()
+        for task in self.role_creations.values():
+            task.cancel()
         
     async def get_member_from_first_server(self, user_id):
         """Get member from the first server"""
@@ -25,13 +50,71 @@ class TagCog(commands.Cog):
             return second_guild.get_member(user_id)
         return None
     
+    def get_role_index(self, guild):
+        """Return the name -> role map for a guild, building it on first use"""
+        index = self.role_index.get(guild.id)
+        if index is None:
+            index = {}
+            # Same role as discord.utils.get(guild.roles, name=...) would return when names repeat
+            for role in guild.roles:
+                index.setdefault(role.name, role)
+            self.role_index[guild.id] = index
+        return index
+    
+    def _index_role_name(self, guild, name):
+        """Point a name back at whichever role still carries it, if any"""
+        index = self.role_index.get(guild.id)
+        if index is None:
+            return
+        role = discord.utils.get(guild.roles, name=name)
+        if role:
+            index[name] = role
+        else:
+            index.pop(name, None)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        index = self.role_index.get(role.guild.id)
+        if index is not None:
+            index.setdefault(role.name, role)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        index = self.role_index.get(after.guild.id)
+        if index is None:
+            return
+        if before.name != after.name:
+            if index.get(before.name) is not None and index[before.name].id == before.id:
+                self._index_role_name(after.guild, before.name)
+            index.setdefault(after.name, after)
+        elif index.get(after.name) is not None and index[after.name].id == after.id:
+            # Keep the cached object current (color, position)
+            index[after.name] = after
+    
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        index = self.role_index.get(role.guild.id)
+        if index is not None and index.get(role.name) is not None and index[role.name].id == role.id:
+            self._index_role_name(role.guild, role.name)
+    
     async def create_role_if_not_exists(self, guild, role_name, color=None):
         """Create a role if it doesn't exist, return the role"""
-        # Check if role already exists (case-insensitive)
-        existing_role = discord.utils.get(guild.roles, name=role_name)
+        # Check if role already exists
+        existing_role = self.get_role_index(guild).get(role_name)
         if existing_role:
             return existing_role
         
+        # Another sync may already be creating it
+        key = (guild.id, role_name)
+        creation = self.role_creations.get(key)
+        if creation is None:
+            creation = self.role_creations[key] = self.bot.loop.create_task(
+                self._create_role(guild, role_name, color)
+            )
+            creation.add_done_callback(lambda _: self.role_creations.pop(key, None))
+        return await asyncio.shield(creation)
+    
+    async def _create_role(self, guild, role_name, color):
         try:
             # Create new role without any permissions
             new_role = await guild.create_role(
@@ -41,6 +124,7 @@ class TagCog(commands.Cog):
                 reason="Auto-sync role from first server"
             )
             logger.info(f"Created role '{role_name}' in {guild.name}")
+            self.get_role_index(guild).setdefault(role_name, new_role)
             return new_role
         except discord.Forbidden:
             logger.error(f"No permission to create role '{role_name}' in {guild.name}")
@@ -65,10 +149,10 @@ class TagCog(commands.Cog):
             logger.info(f"Member {member} not found in first server")
             return
         
-        logger.info(f"Found member {first_server_member} in first server, starting sync...")
+        logger.info(f"Found member {first_server_member} in first server, queueing sync...")
         
         # Sync roles and nickname
-        await self.sync_member_data(member, first_server_member)
+        self.queue_sync(member.id)
     
     @commands.Cog.listener()
     async def on_member_update(self, before, after):
@@ -84,104 +168,118 @@ class TagCog(commands.Cog):
         if not (roles_changed or nickname_changed):
             return
         
-        # Get the same member from second server
-        second_server_member = await self.get_member_from_second_server(after.id)
-        
-        if not second_server_member:
-            logger.info(f"Member {after} not found in second server")
+        # Only members that are also in the second server need syncing
+        if not await self.get_member_from_second_server(after.id):
             return
         
-        logger.info(f"Member {after} updated in first server, syncing to second server...")
-        
-        # Sync the updated data
-        await self.sync_member_data(second_server_member, after)
+        # Sync the updated data once the burst settles
+        self.queue_sync(after.id)
     
-    async def sync_member_data(self, second_server_member, first_server_member):
-        """Sync both roles and nickname from first server to second server"""
-        await self.sync_member_roles(second_server_member, first_server_member)
-        await self.sync_member_nickname(second_server_member, first_server_member)
+    def queue_sync(self, member_id):
+        """Queue a member for syncing; a member already waiting is not queued twice"""
+        if member_id in self.queued_members:
+            return
+        self.queued_members.add(member_id)
+        self.sync_queue.put_nowait((time.monotonic() + SYNC_COALESCE_SECONDS, member_id))
     
-    async def sync_member_roles(self, second_server_member, first_server_member):
-        """Sync roles from first server to second server (avoiding duplicates)"""
-        second_guild = second_server_member.guild
+    async def _sync_worker(self):
+        """Take queued members and sync their latest state, after the coalescing window"""
+        while True:
+            due, member_id = await self.sync_queue.get()
+            try:
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Changes arriving from here on queue a fresh sync that reads the state again
+                self.queued_members.discard(member_id)
+                
+                second_server_member = await self.get_member_from_second_server(member_id)
+                first_server_member = await self.get_member_from_first_server(member_id)
+                if second_server_member and first_server_member:
+                    logger.info(f"Member {first_server_member} updated in first server, syncing to second server...")
+                    await self.sync_member_data(second_server_member, first_server_member)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Failed to sync member {member_id}: {e}")
+            finally:
+                self.sync_queue.task_done()
+    
+    async def sync_member_data(self, second_server_member, first_server_member):
+        """Sync both roles and nickname from first server to second server in a single edit"""
+        changes = {}
         
-        # Get target roles from first server (excluding @everyone and bot roles)
-        target_roles = []
-        first_server_roles = [role for role in first_server_member.roles 
-                            if role.name != "@everyone" and not role.managed]
+        roles = await self.plan_member_roles(second_server_member, first_server_member)
+        if roles is not None:
+            changes['roles'] = roles
         
-        for role in first_server_roles:
-            # Create or get the role in second server
-            new_role = await self.create_role_if_not_exists(
-                second_guild, 
-                role.name, 
-                role.color
-            )
-            
-            if new_role:
-                target_roles.append(new_role)
+        first_server_nickname = first_server_member.display_name
+        # Only change nickname if it's different
+        if first_server_nickname != second_server_member.display_name:
+            # If the display name is the same as username, set nick to None
+            changes['nick'] = None if first_server_nickname == first_server_member.name else first_server_nickname
         
-        # Get current roles in second server (excluding @everyone and bot roles)
-        current_roles = [role for role in second_server_member.roles 
-                        if role.name != "@everyone" and not role.managed]
+        if not changes:
+            return
         
-        # Find roles to add and remove
-        target_role_names = {role.name for role in target_roles}
-        current_role_names = {role.name for role in current_roles}
+        # Failures are logged and re-raised so bulk jobs count them
+        try:
+            await second_server_member.edit(**changes, reason="Auto-sync from first server")
+            logger.info(f"Synced {sorted(changes)} of {second_server_member}")
+        except discord.Forbidden:
+            logger.error(f"No permission to edit {second_server_member}")
+            raise
+        except Exception as e:
+            logger.error(f"Error syncing {second_server_member}: {e}")
+            raise
+    
+    async def plan_member_roles(self, second_server_member, first_server_member):
+        """Return the second server role list the member should have, or None if it already matches"""
+        second_guild = second_server_member.guild
         
-        roles_to_add = [role for role in target_roles 
-                       if role.name not in current_role_names]
-        roles_to_remove = [role for role in current_roles 
-                          if role.name not in target_role_names]
+        # Target role names from first server (excluding @everyone and bot roles)
+        target_names = {role.name: role for role in first_server_member.roles
+                        if not role.is_default() and not role.managed}
         
-        # Remove roles that shouldn't be there
-        if roles_to_remove:
-            try:
-                await second_server_member.remove_roles(
-                    *roles_to_remove,
-                    reason="Auto-sync: removing roles not in first server"
-                )
-                removed_names = [role.name for role in roles_to_remove]
-                logger.info(f"Removed roles {removed_names} from {second_server_member}")
-            except discord.Forbidden:
-                logger.error(f"No permission to remove roles from {second_server_member}")
-            except Exception as e:
-                logger.exception(f"Error removing roles from {second_server_member}: {e}")
+        # Current roles in second server (excluding @everyone and bot roles)
+        current_roles = [role for role in second_server_member.roles
+                         if not role.is_default() and not role.managed]
+        current_names = {role.name for role in current_roles}
         
-        # Add roles that should be there
-        if roles_to_add:
-            try:
-                await second_server_member.add_roles(
-                    *roles_to_add, 
-                    reason="Auto-sync: adding roles from first server"
-                )
-                added_names = [role.name for role in roles_to_add]
-                logger.info(f"Added roles {added_names} to {second_server_member}")
-            except discord.Forbidden:
-                logger.error(f"No permission to add roles to {second_server_member}")
-            except Exception as e:
-                logger.exception(f"Error adding roles to {second_server_member}: {e}")
-    
-    async def sync_member_nickname(self, second_server_member, first_server_member):
-        """Sync nickname from first server to second server"""
-        first_server_nickname = first_server_member.display_name
-        current_nickname = second_server_member.display_name
+        if current_names == target_names.keys():
+            return None
         
-        # Only change nickname if it's different
-        if first_server_nickname != current_nickname:
-            try:
-                # If the display name is the same as username, set nick to None
-                nick_to_set = None if first_server_nickname == first_server_member.name else first_server_nickname
-                
-                await second_server_member.edit(
-                    nick=nick_to_set,
-                    reason="Auto-sync nickname from first server"
-                )
-                logger.info(f"Changed nickname of {second_server_member} to '{first_server_nickname}'")
-            except discord.Forbidden:
-                logger.error(f"No permission to change nickname of {second_server_member}")
-            except Exception as e:
-                logger.exception(f"Error changing nickname of {second_server_member}: {e}")
+        # Keep roles that should stay, resolve the rest through the cached index
+        roles = [role for role in second_server_member.roles
+                 if not role.is_default() and (role.managed or role.name in target_names)]
+        for name in target_names.keys() - current_names:
+            # Create or get the role in second server
+            new_role = await self.create_role_if_not_exists(second_guild, name, target_names[name].color)
+            if new_role:
+                roles.append(new_role)
+        
+        added = target_names.keys() - current_names
+        removed = current_names - target_names.keys()
+        logger.info(f"Role diff for {second_server_member}: +{sorted(added)} -{sorted(removed)}")
+        return roles
+    
+    async def sync_pairs(self, name, pairs, interaction):
+        """Sync (second server member, first server member) pairs with bounded, bucket-aware concurrency"""
+        async def sync(pair):
+            await self.sync_member_data(*pair)
+        
+        async def report(job):
+            await interaction.edit_original_response(content=f"Syncing members...\n{job.progress_line()}")
+        
+        job = get_scheduler().submit(
+            name, pairs, sync,
+            route=lambda pair: member_route(pair[0]),
+            on_progress=report
+        )
+        await job.wait()
+        for (member, _), error in job.failed:
+            logger.error(f"Failed to sync {member}: {error}")
+        return job
     
     @app_commands.command(name="sync_member", description="Manually sync a specific member with their first server profile")
     @app_commands.describe(member="The member to sync (leave empty to sync yourself)")
@@ -204,7 +302,14 @@ class TagCog(commands.Cog):
         await interaction.response.send_message(f"Starting manual sync for {member.mention}...")
         
         # Sync roles and nickname
-        await self.sync_member_data(member, first_server_member)
+        try:
+            await self.sync_member_data(member, first_server_member)
+        except discord.Forbidden:
+            await interaction.followup.send(f"❌ I don't have permission to edit {member.mention}.")
+            return
+        except Exception as e:
+            await interaction.followup.send(f"❌ Failed to sync {member.mention}: {e}")
+            return
         
         await interaction.followup.send(f"✅ Successfully synced {member.mention} with their first server profile!")
     
@@ -218,8 +323,7 @@ class TagCog(commands.Cog):
         
         await interaction.response.send_message("Starting bulk sync... This may take a while.")
         
-        synced_count = 0
-        failed_count = 0
+        pairs = []
         not_found_count = 0
         
         for member in interaction.guild.members:
@@ -229,15 +333,14 @@ class TagCog(commands.Cog):
             first_server_member = await self.get_member_from_first_server(member.id)
             
             if first_server_member:
-                try:
-                    await self.sync_member_data(member, first_server_member)
-                    synced_count += 1
-                except Exception as e:
-                    logger.exception(f"Failed to sync {member}: {e}")
-                    failed_count += 1
+                pairs.append((member, first_server_member))
             else:
                 not_found_count += 1
         
+        job = await self.sync_pairs("sync_all", pairs, interaction)
+        synced_count = job.done
+        failed_count = len(job.failed)
+        
         await interaction.followup.send(f"✅ Bulk sync completed!\n"
                       f"Synced: {synced_count} members\n"
                       f"Failed: {failed_count} members\n"
@@ -258,8 +361,7 @@ class TagCog(commands.Cog):
         
         await interaction.response.send_message("Starting sync from first server... This may take a while.")
         
-        synced_count = 0
-        failed_count = 0
+        pairs = []
         not_found_count = 0
         
         for first_server_member in first_guild.members:
@@ -269,15 +371,14 @@ class TagCog(commands.Cog):
             second_server_member = await self.get_member_from_second_server(first_server_member.id)
             
             if second_server_member:
-                try:
-                    await self.sync_member_data(second_server_member, first_server_member)
-                    synced_count += 1
-                except Exception as e:
-                    logger.exception(f"Failed to sync {first_server_member}: {e}")
-                    failed_count += 1
+                pairs.append((second_server_member, first_server_member))
             else:
                 not_found_count += 1
         
+        job = await self.sync_pairs("sync_from_first", pairs, interaction)
+        synced_count = job.done
+        failed_count = len(job.failed)
+        
         await interaction.followup.send(f"✅ Sync from first server completed!\n"
                       f"Synced: {synced_count} members\n"
                       f"Failed: {failed_count} members\n"
@@ -1,13 +1,26 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
+import io
 import json
 import asyncio
 from datetime import datetime
 import logging
 
+from bulk_scheduler import get_scheduler
+from matchmaking import ANY_CLASS, CHARACTER_CLASSES, MatchQueue, form_teams
+from panel_registry import get_panel_registry
+from state_store import StateStore
+
 logger = logging.getLogger(__name__)
 
+DATA_CHANNEL_NAME = 'pvp-data-store'
+SNAPSHOT_HEADER = 'PVP data snapshot'
+SNAPSHOT_MINUTES = 60  # How often the local state is mirrored to the data channel
+MATCH_TICK_SECONDS = 3.0  # Signups within this window are matched in one pass
+DIGEST_LIMIT = 50  # Teams listed by name in one announcement
+PANEL_NAME = 'mass_attack'  # Panel registry name, one coordination message per channel
+
 class TeamsPVPView(discord.ui.View):
     def __init__(self, bot):
         super().__init__(timeout=None)
@@ -37,9 +50,28 @@ class TeamChoiceView(discord.ui.View):
 
     @discord.ui.button(label='Autofill Me Into a Team', style=discord.ButtonStyle.success)
     async def autofill_team(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = discord.Embed(
+            title="Choose Your Class",
+            description="Pick the class you'll play so teams can be balanced:",
+            color=0x00ff00
+        )
+        await interaction.response.send_message(embed=embed, view=ClassChoiceView(self.bot), ephemeral=True)
+
+class ClassChoiceView(discord.ui.View):
+    def __init__(self, bot):
+        super().__init__(timeout=300)
+        self.bot = bot
+        options = [discord.SelectOption(label=cls, value=cls) for cls in CHARACTER_CLASSES]
+        options.append(discord.SelectOption(label="Any class", value=ANY_CLASS))
+        self.class_select = discord.ui.Select(placeholder="Select your class", options=options)
+        self.class_select.callback = self.on_class_selected
+        self.add_item(self.class_select)
+
+    async def on_class_selected(self, interaction: discord.Interaction):
         cog = self.bot.get_cog('TeamsPVP')
         if cog:
-            await cog.add_to_autofill_queue(interaction)
+            choice = self.class_select.values[0]
+            await cog.add_to_autofill_queue(interaction, None if choice == ANY_CLASS else choice)
 
 class ReplaceConfirmView(discord.ui.View):
     def __init__(self, bot, channel):
@@ -64,29 +96,83 @@ class TeamsPVP(commands.Cog):
         self.category_id = 1390730436103245824
         self.signup_channel_id = 1390730750336434336
         self.announcement_channel_id = 1390730829482692650
-        self.data_channel_id = None  # Will be set when data channel is found/created
+        self.data_channel_id = None  # Snapshot mirror, set when data channel is found/created
         self.data_message_id = None
         self.next_team_id = 1
-        self.autofill_queue = []
+        self.autofill_queue = MatchQueue()
+        self.ratings = {}  # user id -> optional skill rating used for balancing
+        self.match_task = None
+        self.match_rerun = False  # Signups arrived while a pass was running
         self.max_team_size = 5
         self.team_threads = {}  # Store thread info
-        self.active_messages = {}  # Track active mass attack messages per channel
-        
+        self.registry = get_panel_registry()  # Tracks active mass attack messages per channel
+        self.store = StateStore('teamspvp', self.state_snapshot)
+        self.loaded_from_store = False
+        self.last_snapshot = None
+
     async def cog_load(self):
         """Called when the cog is loaded"""
-        await self.setup_data_channel()
-        await self.load_data()
+        self.load_data()
+        # The attend button keeps working on existing coordination messages after a restart
+        self.registry.attach(self.bot, PANEL_NAME, lambda: TeamsPVPView(self.bot))
+        self.snapshot_loop.start()
         # Remove the auto-setup of main message since we're using slash commands now
 
+    async def cog_unload(self):
+        self.snapshot_loop.cancel()
+        if self.match_task:
+            self.match_task.cancel()
+        self.store.close()
+
+    def state_snapshot(self):
+        return {
+            'next_team_id': self.next_team_id,
+            'autofill_queue': self.autofill_queue.to_list(),
+            'ratings': {str(user_id): rating for user_id, rating in self.ratings.items()},
+            'max_team_size': self.max_team_size,
+            'team_threads': self.team_threads,
+        }
+
+    def apply_state(self, data):
+        self.next_team_id = data.get('next_team_id', 1)
+        self.autofill_queue = MatchQueue.from_list(data.get('autofill_queue', []))
+        self.ratings = {int(user_id): rating for user_id, rating in data.get('ratings', {}).items()}
+        self.max_team_size = data.get('max_team_size', 5)
+        self.team_threads = data.get('team_threads', {})
+        # Coordination messages tracked here before the panel registry existed
+        for channel_id, message_id in data.get('active_messages', {}).items():
+            if self.registry.get(PANEL_NAME, int(channel_id)) is None:
+                self.registry.save(PANEL_NAME, self.server_id, int(channel_id), message_id, TeamsPVPView.__name__)
+
+    def load_data(self):
+        """Load persistent data from the local store"""
+        try:
+            data = self.store.load()
+        except Exception as e:
+            logger.exception("Error loading data")
+            return
+
+        if data:
+            self.apply_state(data)
+            self.loaded_from_store = True
+            if 'active_messages' in data:
+                # Rewrite without the key now held by the panel registry
+                self.store.mark_dirty()
+            logger.info(f"Loaded data: {len(self.autofill_queue)} in queue, next team ID: {self.next_team_id}")
+
+    async def save_data(self):
+        """Mark state changed; the store coalesces changes into one delayed write"""
+        self.store.mark_dirty()
+
     async def setup_data_channel(self):
-        """Find or create the data persistence channel"""
+        """Find or create the data snapshot channel"""
         guild = self.bot.get_guild(self.server_id)
         if not guild:
             logger.error(f"Guild {self.server_id} not found")
             return
 
         # Look for existing data channel
-        data_channel = discord.utils.get(guild.channels, name='pvp-data-store')
+        data_channel = discord.utils.get(guild.channels, name=DATA_CHANNEL_NAME)
         
         if not data_channel:
             # Create the data channel
@@ -101,90 +187,89 @@ class TeamsPVP(commands.Cog):
                     overwrites[role] = discord.PermissionOverwrite(read_messages=True)
             
             data_channel = await guild.create_text_channel(
-                'pvp-data-store',
+                DATA_CHANNEL_NAME,
                 category=category,
                 overwrites=overwrites,
-                topic="Data persistence for PVP teams - Do not delete messages here!"
+                topic="Snapshots of PVP team data - Do not delete messages here!"
             )
             logger.info(f"Created data channel: {data_channel.id}")
         
         self.data_channel_id = data_channel.id
 
-    async def load_data(self):
-        """Load persistent data from the data channel"""
-        if not self.data_channel_id:
-            return
-        
-        channel = self.bot.get_channel(self.data_channel_id)
-        if not channel:
-            return
-        
+    async def find_snapshot_message(self, channel):
+        """The bot's snapshot message: a file snapshot or the legacy ```json blob"""
+        async for message in channel.history(limit=10):
+            if message.author == self.bot.user and (
+                message.content.startswith(SNAPSHOT_HEADER) or message.content.startswith('```json')
+            ):
+                return message
+        return None
+
+    async def import_snapshot(self, message):
+        """Seed an empty store from the channel snapshot (migration or lost database)"""
         try:
-            messages = [message async for message in channel.history(limit=10)]
-            data_message = None
-            
-            for message in messages:
-                if message.author == self.bot.user and message.content.startswith('```json'):
-                    data_message = message
-                    break
-            
-            if data_message:
-                self.data_message_id = data_message.id
-                # Extract JSON from code block
-                content = data_message.content
+            if message.attachments:
+                data = json.loads(await message.attachments[0].read())
+            else:
+                content = message.content
                 json_start = content.find('```json\n') + 8
                 json_end = content.find('\n```')
-                if json_start > 7 and json_end > json_start:
-                    json_str = content[json_start:json_end]
-                    data = json.loads(json_str)
-                    
-                    self.next_team_id = data.get('next_team_id', 1)
-                    self.autofill_queue = data.get('autofill_queue', [])
-                    self.max_team_size = data.get('max_team_size', 5)
-                    self.team_threads = data.get('team_threads', {})
-                    self.active_messages = data.get('active_messages', {})
-                    
-                    logger.info(f"Loaded data: {len(self.autofill_queue)} in queue, next team ID: {self.next_team_id}")
-            else:
-                # Create initial data message
-                await self.save_data()
+                if json_start <= 7 or json_end <= json_start:
+                    return
+                data = json.loads(content[json_start:json_end])
         except Exception as e:
-            logger.exception("Error loading data")
-
-    async def save_data(self):
-        """Save persistent data to the data channel"""
-        if not self.data_channel_id:
+            logger.exception("Error importing data snapshot")
             return
-        
-        channel = self.bot.get_channel(self.data_channel_id)
+
+        self.apply_state(data)
+        self.store.mark_dirty()
+        await self.store.flush()
+        logger.info(f"Imported snapshot: {len(self.autofill_queue)} in queue, next team ID: {self.next_team_id}")
+
+    @tasks.loop(minutes=SNAPSHOT_MINUTES)
+    async def snapshot_loop(self):
+        """Mirror the state to the data channel as a file, only when it changed"""
+        await self.store.flush()
+        channel = self.bot.get_channel(self.data_channel_id) if self.data_channel_id else None
         if not channel:
             return
-        
-        data = {
-            'next_team_id': self.next_team_id,
-            'autofill_queue': self.autofill_queue,
-            'max_team_size': self.max_team_size,
-            'team_threads': self.team_threads,
-            'active_messages': self.active_messages,
-            'last_updated': datetime.now().isoformat()
-        }
-        
-        content = f"```json\n{json.dumps(data, indent=2)}\n```"
-        
+
+        state = json.dumps(self.state_snapshot(), indent=2)
+        if state == self.last_snapshot:
+            return
+
+        content = f"{SNAPSHOT_HEADER} (updated <t:{int(datetime.now().timestamp())}:R>)"
+        file = discord.File(io.BytesIO(state.encode('utf-8')), filename='pvp-data.json')
         try:
             if self.data_message_id:
                 try:
                     message = await channel.fetch_message(self.data_message_id)
-                    await message.edit(content=content)
+                    await message.edit(content=content, attachments=[file])
                 except discord.NotFound:
                     # Message was deleted, create new one
-                    message = await channel.send(content)
+                    message = await channel.send(content, file=file)
                     self.data_message_id = message.id
             else:
-                message = await channel.send(content)
+                message = await channel.send(content, file=file)
                 self.data_message_id = message.id
+            self.last_snapshot = state
         except Exception as e:
-            logger.exception("Error saving data")
+            logger.exception("Error saving data snapshot")
+
+    @snapshot_loop.before_loop
+    async def before_snapshot_loop(self):
+        await self.bot.wait_until_ready()
+        try:
+            await self.setup_data_channel()
+            channel = self.bot.get_channel(self.data_channel_id) if self.data_channel_id else None
+            if channel:
+                message = await self.find_snapshot_message(channel)
+                if message:
+                    self.data_message_id = message.id
+                    if not self.loaded_from_store:
+                        await self.import_snapshot(message)
+        except Exception as e:
+            logger.exception("Error setting up data channel")
 
     @app_commands.command(name="massattack", description="Post the Mass Attack team coordination message.")
     @app_commands.describe(
@@ -204,11 +289,11 @@ class TeamsPVP(commands.Cog):
         target_channel = channel or interaction.channel
         
         # Check if message already exists in this channel
-        channel_id = str(target_channel.id)
-        if channel_id in self.active_messages:
+        record = self.registry.get(PANEL_NAME, target_channel.id)
+        if record:
             # Check if the message still exists
             try:
-                message = await target_channel.fetch_message(self.active_messages[channel_id])
+                message = await target_channel.fetch_message(record['message_id'])
                 # Message exists, ask for confirmation
                 embed = discord.Embed(
                     title="Mass Attack Message Already Exists",
@@ -221,8 +306,7 @@ class TeamsPVP(commands.Cog):
                 return
             except discord.NotFound:
                 # Message was deleted, remove from tracking
-                del self.active_messages[channel_id]
-                await self.save_data()
+                self.registry.forget(PANEL_NAME, target_channel.id)
         
         # Post the message
         await self.post_mass_attack_message(interaction, target_channel)
@@ -243,20 +327,16 @@ Click the button below to begin."""
         try:
             # If replacing, delete the old message first
             if replace:
-                channel_id = str(channel.id)
-                if channel_id in self.active_messages:
+                record = self.registry.get(PANEL_NAME, channel.id)
+                if record:
                     try:
-                        old_message = await channel.fetch_message(self.active_messages[channel_id])
-                        await old_message.delete()
+                        await channel.get_partial_message(record['message_id']).delete()
                     except discord.NotFound:
                         pass  # Message was already deleted
+                    self.registry.forget(PANEL_NAME, channel.id)
             
-            # Post the new message
-            message = await channel.send(content, view=view)
-            
-            # Track the message
-            self.active_messages[str(channel.id)] = message.id
-            await self.save_data()
+            # Post the new message and track it
+            await self.registry.publish(PANEL_NAME, channel, content=content, view=view, verify=True)
             
             # Respond to the interaction
             action = "replaced" if replace else "posted"
@@ -289,6 +369,16 @@ Click the button below to begin."""
         
         # Create private thread
         thread_name = f"Team {self.next_team_id}"
+        embed = discord.Embed(
+            title=f"Welcome to {thread_name}!",
+            description=f"Hello {interaction.user.mention}! This is your private team coordination thread.\n\n"
+                       f"**Instructions:**\n"
+                       f"• Tag your teammates here (they'll be given access automatically)\n"
+                       f"• Coordinate your strategy and timing\n"
+                       f"• Type `!done` when your team is complete to lock the thread\n\n"
+                       f"**Current team size:** 1/{self.max_team_size}",
+            color=0x00ff00
+        )
         
         try:
             thread = await channel.create_thread(
@@ -297,8 +387,8 @@ Click the button below to begin."""
                 reason=f"PVP team created by {interaction.user}"
             )
             
-            # Add the user to the thread
-            await thread.add_user(interaction.user)
+            # Adding the user and posting the instructions don't depend on each other
+            await asyncio.gather(thread.add_user(interaction.user), thread.send(embed=embed))
             
             # Store thread info
             self.team_threads[str(thread.id)] = {
@@ -313,26 +403,13 @@ Click the button below to begin."""
             self.next_team_id += 1
             await self.save_data()
             
-            # Send instructions to the thread
-            embed = discord.Embed(
-                title=f"Welcome to {thread_name}!",
-                description=f"Hello {interaction.user.mention}! This is your private team coordination thread.\n\n"
-                           f"**Instructions:**\n"
-                           f"• Tag your teammates here (they'll be given access automatically)\n"
-                           f"• Coordinate your strategy and timing\n"
-                           f"• Type `!done` when your team is complete to lock the thread\n\n"
-                           f"**Current team size:** 1/{self.max_team_size}",
-                color=0x00ff00
-            )
-            await thread.send(embed=embed)
-            
             await interaction.response.send_message(f"✅ Created your team thread: {thread.mention}", ephemeral=True)
             
         except Exception as e:
             logger.exception("Error creating team thread")
             await interaction.response.send_message("❌ Failed to create team thread.", ephemeral=True)
 
-    async def add_to_autofill_queue(self, interaction: discord.Interaction):
+    async def add_to_autofill_queue(self, interaction: discord.Interaction, character_class=None):
         """Add user to autofill queue"""
         user_id = interaction.user.id
         
@@ -340,7 +417,7 @@ Click the button below to begin."""
             await interaction.response.send_message("❌ You're already in the autofill queue!", ephemeral=True)
             return
         
-        self.autofill_queue.append(user_id)
+        self.autofill_queue.add(user_id, character_class)
         await self.save_data()
         
         queue_position = len(self.autofill_queue)
@@ -348,7 +425,7 @@ Click the button below to begin."""
         
         embed = discord.Embed(
             title="Added to Autofill Queue",
-            description=f"You've been added to the autofill queue!\n\n"
+            description=f"You've been added to the autofill queue as **{character_class or 'any class'}**!\n\n"
                        f"**Queue position:** {queue_position}\n"
                        f"**Players needed for next team:** {needed_for_team}\n\n"
                        f"You'll be notified when a team is ready. Use `!leavequeue` to exit the queue.",
@@ -359,78 +436,145 @@ Click the button below to begin."""
         
         # Check if we can form a team
         if len(self.autofill_queue) >= self.max_team_size:
-            await self.create_autofill_team()
+            self.schedule_matchmaking()
 
-    async def create_autofill_team(self):
-        """Create an autofilled team when enough players are queued"""
+    def schedule_matchmaking(self):
+        """Match the whole signup wave in one pass once it settles"""
+        if self.match_task is None or self.match_task.done():
+            self.match_task = self.bot.loop.create_task(self.run_matchmaking())
+        else:
+            self.match_rerun = True
+
+    async def run_matchmaking(self):
+        while True:
+            self.match_rerun = False
+            await asyncio.sleep(MATCH_TICK_SECONDS)
+            try:
+                await self.create_autofill_teams()
+            except Exception as e:
+                logger.exception("Error running matchmaking")
+            # Signups that came in during the pass may have filled more teams
+            if not self.match_rerun or len(self.autofill_queue) < self.max_team_size:
+                return
+
+    def render_welcome(self, thread_name, entries):
+        """Welcome embed for an autofilled team"""
+        roster = "\n".join(
+            f"• <@{entry.user_id}> — {entry.character_class or 'any class'}" for entry in entries
+        )
+        return discord.Embed(
+            title=f"Welcome to {thread_name}!",
+            description=f"You've been automatically assigned to this team for the mass attack.\n\n"
+                       f"{roster}\n\n"
+                       f"**Team size:** {len(entries)}/{self.max_team_size}\n"
+                       f"**Coordinate your strategy and timing here!**",
+            color=0x00ff00
+        )
+
+    async def create_autofill_teams(self):
+        """Form every full team the queue allows and provision their threads together"""
         if len(self.autofill_queue) < self.max_team_size:
             return
         
         guild = self.bot.get_guild(self.server_id)
-        channel = guild.get_channel(self.signup_channel_id)
+        channel = guild.get_channel(self.signup_channel_id) if guild else None
         
         if not channel:
             logger.error("Signup channel not found for autofill team creation")
             return
         
-        # Get team members from queue
-        team_members = self.autofill_queue[:self.max_team_size]
-        self.autofill_queue = self.autofill_queue[self.max_team_size:]
-        
-        # Create private thread
-        thread_name = f"Team {self.next_team_id}"
+        teams = form_teams(self.autofill_queue, self.max_team_size, self.ratings)
+        await self.save_data()
+        logger.info(f"Matchmaking formed {len(teams)} teams, {len(self.autofill_queue)} left in queue")
+        if not teams:
+            return
         
-        try:
-            thread = await channel.create_thread(
-                name=thread_name,
-                type=discord.ChannelType.private_thread,
-                reason="Autofilled PVP team"
-            )
-            
-            # Add all members to the thread
-            members_added = []
-            for user_id in team_members:
-                try:
-                    user = guild.get_member(user_id)
-                    if user:
-                        await thread.add_user(user)
-                        members_added.append(user_id)
-                except Exception as e:
-                    logger.exception(f"Error adding user {user_id} to thread")
-            
-            # Store thread info
+        # Names and welcome embeds are settled before any request goes out
+        plans = []
+        for team in teams:
+            thread_name = f"Team {self.next_team_id}"
+            self.next_team_id += 1
+            plans.append((thread_name, team, self.render_welcome(thread_name, team)))
+        
+        scheduler = get_scheduler()
+        creation = await scheduler.submit(
+            'pvp team threads',
+            plans,
+            lambda plan: channel.create_thread(
+                name=plan[0], type=discord.ChannelType.private_thread, reason="Autofilled PVP team"
+            ),
+            route=lambda plan: f"POST /channels/{channel.id}/threads"
+        ).wait()
+        for plan, error in creation.failed:
+            logger.error(f"Error creating autofill team {plan[0]}: {error}")
+            # Add members back to queue if creation failed
+            self.autofill_queue.requeue_front(plan[1])
+        
+        # Member additions fan out across threads; each thread is its own rate-limit bucket
+        additions = []
+        for plan, thread in creation.results:
+            for entry in plan[1]:
+                member = guild.get_member(entry.user_id)
+                if member:
+                    additions.append((thread, entry, member))
+        added = await scheduler.submit(
+            'pvp thread members',
+            additions,
+            lambda item: item[0].add_user(item[2]),
+            route=lambda item: f"PUT /channels/{item[0].id}/thread-members/{{id}}"
+        ).wait()
+        for item, error in added.failed:
+            logger.error(f"Error adding user {item[1].user_id} to thread {item[0].id}: {error}")
+        added_ids = {(item[0].id, item[1].user_id) for item, _ in added.results}
+        
+        welcomes = []
+        formed = []
+        for (thread_name, team, embed), thread in creation.results:
+            members_added = [entry for entry in team if (thread.id, entry.user_id) in added_ids]
             self.team_threads[str(thread.id)] = {
                 'id': thread.id,
                 'name': thread_name,
                 'creator': None,  # Autofilled team
-                'members': members_added,
+                'members': [entry.user_id for entry in members_added],
+                'classes': {str(entry.user_id): entry.character_class for entry in members_added},
                 'locked': False,
                 'created_at': datetime.now().isoformat()
             }
-            
-            self.next_team_id += 1
-            await self.save_data()
-            
-            # Send welcome message to the thread
-            member_mentions = [f"<@{user_id}>" for user_id in members_added]
-            embed = discord.Embed(
-                title=f"Welcome to {thread_name}!",
-                description=f"Hello {', '.join(member_mentions)}!\n\n"
-                           f"You've been automatically assigned to this team for the mass attack.\n\n"
-                           f"**Team size:** {len(members_added)}/{self.max_team_size}\n"
-                           f"**Coordinate your strategy and timing here!**",
-                color=0x00ff00
-            )
-            await thread.send(embed=embed)
-            
-            # Announce in announcement channel
-            await self.announce_team_creation(thread_name, len(members_added), autofilled=True)
-            
-        except Exception as e:
-            logger.exception("Error creating autofill team")
-            # Add members back to queue if creation failed
-            self.autofill_queue = team_members + self.autofill_queue
-            await self.save_data()
+            if len(members_added) != len(team):
+                embed = self.render_welcome(thread_name, members_added)
+            welcomes.append(thread.send(embed=embed))
+            formed.append((thread_name, len(members_added)))
+        await self.save_data()
+        
+        # Welcome messages go to different threads, so they don't queue behind each other
+        for result in await asyncio.gather(*welcomes, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error(f"Error sending team welcome message: {result}")
+        
+        await self.announce_team_digest(formed)
+
+    async def announce_team_digest(self, formed):
+        """One announcement for every autofilled team formed in the same tick"""
+        if not formed:
+            return
+        if len(formed) == 1:
+            await self.announce_team_creation(formed[0][0], formed[0][1], autofilled=True)
+            return
+        
+        channel = self.bot.get_channel(self.announcement_channel_id)
+        if not channel:
+            return
+        
+        lines = [f"**{team_name}** — {member_count} players" for team_name, member_count in formed[:DIGEST_LIMIT]]
+        if len(formed) > DIGEST_LIMIT:
+            lines.append(f"...and {len(formed) - DIGEST_LIMIT} more")
+        embed = discord.Embed(
+            title=f"{len(formed)} New Autofilled Teams Created!",
+            description="\n".join(lines),
+            color=0x00ff00,
+            timestamp=datetime.now()
+        )
+        await channel.send(embed=embed)
 
     async def announce_team_creation(self, team_name, member_count, creator=None, autofilled=False):
         """Announce team creation in the announcement channel"""
@@ -499,11 +643,10 @@ Click the button below to begin."""
         """Leave the autofill queue"""
         user_id = ctx.author.id
         
-        if user_id not in self.autofill_queue:
+        if self.autofill_queue.remove(user_id) is None:
             await ctx.send("❌ You're not in the autofill queue.")
             return
         
-        self.autofill_queue.remove(user_id)
         await self.save_data()
         
         embed = discord.Embed(
@@ -523,6 +666,8 @@ Click the button below to begin."""
         
         self.max_team_size = size
         await self.save_data()
+        if len(self.autofill_queue) >= self.max_team_size:
+            self.schedule_matchmaking()
         
         embed = discord.Embed(
             title="Team Size Updated",
@@ -596,7 +741,7 @@ Click the button below to begin."""
         total_teams = len(self.team_threads)
         locked_teams = sum(1 for team in self.team_threads.values() if team['locked'])
         queue_size = len(self.autofill_queue)
-        active_messages = len(self.active_messages)
+        active_messages = len(self.registry.records(PANEL_NAME))
         
         embed = discord.Embed(
             title="Team Statistics",
@@ -608,9 +753,25 @@ Click the button below to begin."""
         embed.add_field(name="Max Team Size", value=self.max_team_size, inline=True)
         embed.add_field(name="Next Team ID", value=self.next_team_id, inline=True)
         embed.add_field(name="Active Messages", value=active_messages, inline=True)
+        class_counts = self.autofill_queue.class_counts()
+        if class_counts:
+            breakdown = ", ".join(f"{name}: {count}" for name, count in sorted(class_counts.items()))
+            embed.add_field(name="Queued Classes", value=breakdown, inline=False)
         
         await ctx.send(embed=embed)
 
+    @commands.command(name='setrating')
+    @commands.has_permissions(manage_guild=True)
+    async def set_rating(self, ctx, member: discord.Member, rating: float = None):
+        """Set (or clear, without a value) a player's rating used to balance autofilled teams"""
+        if rating is None:
+            self.ratings.pop(member.id, None)
+            await ctx.send(f"✅ Cleared the rating of {member.display_name}.")
+        else:
+            self.ratings[member.id] = rating
+            await ctx.send(f"✅ Set the rating of {member.display_name} to {rating:g}.")
+        await self.save_data()
+
     @commands.Cog.listener()
     async def on_message(self, message):
         """Handle mentions in team threads"""
@@ -628,22 +789,29 @@ Click the button below to begin."""
         if team_info['locked']:
             return
         
-        # Check for mentions and add mentioned users to the thread
-        for mention in message.mentions:
-            if mention.id not in team_info['members']:
-                try:
-                    await message.channel.add_user(mention)
-                    team_info['members'].append(mention.id)
-                    await self.save_data()
-                    
-                    embed = discord.Embed(
-                        description=f"✅ {mention.mention} has been added to the team!",
-                        color=0x00ff00
-                    )
-                    await message.channel.send(embed=embed)
-                    
-                except Exception as e:
-                    logger.exception(f"Error adding user {mention.id} to thread")
+        # Add every newly mentioned user at once, then confirm them in one message
+        new_members = [mention for mention in dict.fromkeys(message.mentions) if mention.id not in team_info['members']]
+        if not new_members:
+            return
+        
+        results = await asyncio.gather(
+            *(message.channel.add_user(mention) for mention in new_members), return_exceptions=True
+        )
+        added = []
+        for mention, result in zip(new_members, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error adding user {mention.id} to thread: {result}")
+            else:
+                team_info['members'].append(mention.id)
+                added.append(mention.mention)
+        
+        if added:
+            await self.save_data()
+            embed = discord.Embed(
+                description=f"✅ {', '.join(added)} {'has' if len(added) == 1 else 'have'} been added to the team!",
+                color=0x00ff00
+            )
+            await message.channel.send(embed=embed)
 
 async def setup(bot):
     await bot.add_cog(TeamsPVP(bot))
@@ -1,13 +1,14 @@
 import discord
 from discord.ext import commands
-from googletrans import Translator
 from gtts import gTTS
 import os
 import asyncio
 from collections import deque
 from typing import Dict, Optional, List
 import logging
-import re
+import time
+import language_id
+from translation_service import get_translation_service
 
 # Set up logging
 logging.basicConfig(
@@ -23,6 +24,14 @@ logging.basicConfig(
 ALLOWED_SERVER_ID = 1214430768143671377  # Replace with your server ID
 ALLOWED_CHANNEL_ID = 1351381443812655317  # Replace with your channel ID
 
+# Pipeline tuning
+MAX_PENDING_TRANSLATIONS = 20  # Bounded backlog of messages waiting per guild
+MAX_CONCURRENT_TRANSLATIONS = 4  # Messages allowed to translate/synthesize ahead of playback
+STALE_LAG_SECONDS = 15.0  # Past this lag, audio is skipped and bursts get merged
+
+LANGUAGE_CONFIDENCE = 0.6  # Below this the message is treated as English
+LANGUAGE_FLAGS = {'en': '🇺🇸', 'es': '🇪🇸', 'fr': '🇫🇷', 'pt': '🇵🇹', 'ar': '🇦🇪'}
+
 class AudioQueue:
     def __init__(self):
         self.queue = deque()
@@ -34,17 +43,67 @@ class AudioQueue:
     def get_next(self) -> Optional[tuple]:
         return self.queue.popleft() if self.queue else None
 
+class TranslationJob:
+    """A message moving through the translate -> synthesize -> play pipeline"""
+    __slots__ = ('message', 'content', 'source_lang', 'target_lang', 'audio_file', 'task', 'created_at')
+
+    def __init__(self, message: discord.Message, source_lang: str, target_lang: str, audio_file: str):
+        self.message = message
+        self.content = message.content
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.audio_file = audio_file
+        self.task: Optional[asyncio.Task] = None
+        self.created_at = time.monotonic()
+
+    @property
+    def lag(self) -> float:
+        return time.monotonic() - self.created_at
+
+class TranslationPipeline:
+    """Ordered per-guild backlog of translation jobs with lag metrics"""
+    def __init__(self, max_pending: int):
+        self.jobs = deque()
+        self.max_pending = max_pending
+        self.wakeup = asyncio.Event()
+        self.worker: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.dropped = 0
+        self.merged = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def current_lag(self) -> float:
+        """Age of the oldest message still waiting to be delivered"""
+        return self.jobs[0].lag if self.jobs else 0.0
+
+    def record_delivery(self, lag: float):
+        self.delivered += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+
 class TranslationVoice(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.translator = Translator()
+        self.translation_service = get_translation_service()
         self.audio_queues: Dict[int, AudioQueue] = {}
         self.active_vc: Dict[int, discord.VoiceClient] = {}
+        self.pipelines: Dict[int, TranslationPipeline] = {}
+        self.stage_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRANSLATIONS)
         self.audio_folder = 'temp_audio'
         
         # Create audio folder if it doesn't exist
         os.makedirs(self.audio_folder, exist_ok=True)
 
+    def cog_unload(self):
+        for pipeline in self.pipelines.values():
+            if pipeline.worker:
+                pipeline.worker.cancel()
+            for job in pipeline.jobs:
+                if job.task:
+                    job.task.cancel()
+
     def get_audio_file_path(self, message_id: int) -> str:
         return os.path.join(self.audio_folder, f'translated_{message_id}.mp3')
 
@@ -114,79 +173,9 @@ class TranslationVoice(commands.Cog):
             logging.error(f"Error generating audio: {e}")
             return False
 
-    def detect_language_improved(self, text: str) -> str:
-        """Improved language detection using enhanced word matching"""
-        try:
-            # Remove URLs, mentions, and special characters
-            clean_text = re.sub(r'http\S+|@\S+|<@\S+>|[^\w\s]', '', text.lower())
-            
-            if len(clean_text.strip()) < 3:
-                return 'en'  # Default to English for very short text
-            
-            # Use enhanced simple detection
-            return self.detect_language_simple(clean_text)
-        except:
-            # Fallback to basic detection
-            return 'en'
-
-    def detect_language_simple(self, text: str) -> str:
-        """Enhanced simple language detection"""
-        # Common Spanish words and phrases
-        es_words = {
-            'el', 'la', 'los', 'las', 'un', 'una', 'y', 'o', 'pero', 'porque', 'como', 
-            'qué', 'quién', 'cuándo', 'dónde', 'por qué', 'sí', 'no', 'muy', 'más', 
-            'aquí', 'allí', 'con', 'sin', 'para', 'por', 'en', 'de', 'del', 'al',
-            'que', 'es', 'está', 'son', 'están', 'tiene', 'tengo', 'hacer', 'hago',
-            'puede', 'puedo', 'quiero', 'quiere', 'mi', 'tu', 'su', 'nos', 'les',
-            'me', 'te', 'se', 'le', 'lo', 'ya', 'también', 'bien', 'mal', 'todo',
-            'nada', 'algo', 'casa', 'tiempo', 'año', 'día', 'vez', 'hombre', 'mujer',
-            'niño', 'niña', 'agua', 'comida', 'trabajo', 'escuela', 'familia'
-        }
-        
-        # Common English words
-        en_words = {
-            'the', 'and', 'or', 'but', 'because', 'how', 'what', 'who', 'when', 'where',
-            'why', 'yes', 'no', 'very', 'more', 'here', 'there', 'with', 'without',
-            'for', 'in', 'of', 'to', 'from', 'is', 'are', 'was', 'were', 'have',
-            'has', 'had', 'do', 'does', 'did', 'can', 'could', 'will', 'would',
-            'should', 'my', 'your', 'his', 'her', 'our', 'their', 'me', 'you',
-            'him', 'her', 'us', 'them', 'i', 'we', 'they', 'it', 'this', 'that',
-            'these', 'those', 'all', 'some', 'any', 'good', 'bad', 'big', 'small'
-        }
-        
-        clean_text = re.sub(r'[^\w\s]', '', text.lower())
-        words = clean_text.split()
-        
-        if not words:
-            return 'en'
-        
-        # Count matches for each language
-        spanish_count = sum(1 for word in words if word in es_words)
-        english_count = sum(1 for word in words if word in en_words)
-        
-        # Calculate percentages
-        total_words = len(words)
-        spanish_percentage = spanish_count / total_words
-        english_percentage = english_count / total_words
-        
-        # Decision logic
-        if spanish_percentage > english_percentage and spanish_percentage >= 0.15:
-            return 'es'
-        elif english_percentage > spanish_percentage and english_percentage >= 0.15:
-            return 'en'
-        else:
-            # If no clear winner, check for specific Spanish patterns
-            spanish_patterns = [
-                r'\b(está|están|tengo|tiene|quiero|quiere|hago|hace)\b',
-                r'\b(mi|tu|su|nos|les|del|al)\b',
-                r'\b(porque|también|año|día|niño|niña)\b'
-            ]
-            
-            for pattern in spanish_patterns:
-                if re.search(pattern, clean_text):
-                    return 'es'
-            
-            return 'en'  # Default to English
+    def detect_language(self, text: str) -> str:
+        """Detect the message language with the n-gram identifier, defaulting to English when unsure"""
+        return language_id.detect_language(text, default='en', threshold=LANGUAGE_CONFIDENCE)
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -207,79 +196,173 @@ class TranslationVoice(commands.Cog):
         if message.guild.id != ALLOWED_SERVER_ID or message.channel.id != ALLOWED_CHANNEL_ID:
             return
 
-        try:
-            # Detect language of the message
-            detected_lang = self.detect_language_improved(message.content)
-            
-            # Set target language based on detected language
-            target_lang = 'es' if detected_lang == 'en' else 'en'
-            
-            # Translate the message with retry logic
-            translated = None
-            max_retries = 3
-            
-            for attempt in range(max_retries):
-                try:
-                    translated = await self.bot.loop.run_in_executor(
-                        None,
-                        lambda: self.translator.translate(message.content, src=detected_lang, dest=target_lang)
-                    )
-                    break
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise e
-                    await asyncio.sleep(1)  # Wait before retry
-            
-            if not translated or not translated.text:
-                raise Exception("Translation returned empty result")
-            
-            # Generate audio file with appropriate voice
-            audio_file = self.get_audio_file_path(message.id)
+        # Detect language of the message
+        detected_lang = self.detect_language(message.content)
+        
+        # Set target language based on detected language
+        target_lang = 'es' if detected_lang == 'en' else 'en'
+
+        # Hand off to the pipeline; translation and synthesis run ahead while delivery keeps message order
+        self.submit_job(message, detected_lang, target_lang)
+
+    def get_pipeline(self, guild_id: int) -> TranslationPipeline:
+        pipeline = self.pipelines.get(guild_id)
+        if pipeline is None:
+            pipeline = self.pipelines[guild_id] = TranslationPipeline(MAX_PENDING_TRANSLATIONS)
+        if pipeline.worker is None or pipeline.worker.done():
+            pipeline.worker = self.bot.loop.create_task(self.run_pipeline(guild_id, pipeline))
+        return pipeline
+
+    def submit_job(self, message: discord.Message, source_lang: str, target_lang: str):
+        """Queue a message for translation, applying backpressure when the backlog is stale or full"""
+        pipeline = self.get_pipeline(message.guild.id)
+        job = TranslationJob(message, source_lang, target_lang, self.get_audio_file_path(message.id))
+
+        under_pressure = len(pipeline.jobs) >= pipeline.max_pending or pipeline.current_lag > STALE_LAG_SECONDS
+        if under_pressure and self.merge_into_tail(pipeline, job):
+            return
+
+        if len(pipeline.jobs) >= pipeline.max_pending:
+            stale = pipeline.jobs.popleft()
+            stale.task.cancel()
+            pipeline.dropped += 1
+            self.bot.loop.create_task(self.cleanup_audio_file(stale.audio_file))
+            logging.warning(f"Translation backlog full, dropped message {stale.message.id}")
+
+        job.task = self.bot.loop.create_task(self.prepare_job(job))
+        pipeline.jobs.append(job)
+        pipeline.wakeup.set()
+
+    def merge_into_tail(self, pipeline: TranslationPipeline, job: TranslationJob) -> bool:
+        """Fold a burst from the same author into the last pending job so it is translated once"""
+        if not pipeline.jobs:
+            return False
+
+        tail = pipeline.jobs[-1]
+        if tail.message.author.id != job.message.author.id or tail.source_lang != job.source_lang:
+            return False
+
+        tail.task.cancel()
+        self.bot.loop.create_task(self.cleanup_audio_file(tail.audio_file))
+        tail.content = f"{tail.content}\n{job.content}"
+        tail.audio_file = job.audio_file
+        tail.task = self.bot.loop.create_task(self.prepare_job(tail))
+        pipeline.merged += 1
+        return True
+
+    async def translate_text(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Translate text with retry logic"""
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                translated = await self.translation_service.translate(text, target_lang, src=source_lang)
+                break
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    raise e
+                await asyncio.sleep(0.25 * 2 ** attempt)  # Back off before retry
+
+        if not translated or not translated.text:
+            raise Exception("Translation returned empty result")
+        return translated.text
+
+    def wants_audio(self, message: discord.Message) -> bool:
+        return bool(message.author.voice and message.author.voice.channel)
+
+    async def prepare_job(self, job: TranslationJob):
+        """Translate and synthesize a job ahead of its turn, returning (text, audio_ready)"""
+        async with self.stage_semaphore:
+            translated_text = await self.translate_text(job.content, job.source_lang, job.target_lang)
+
+            # Skip synthesis for listeners who left or audio that would play too late anyway
+            if not self.wants_audio(job.message) or job.lag > STALE_LAG_SECONDS:
+                return translated_text, False
+
+            audio_file = job.audio_file
             audio_success = await self.bot.loop.run_in_executor(
                 None,
-                lambda: self.generate_audio(translated.text, audio_file, target_lang)
+                lambda: self.generate_audio(translated_text, audio_file, job.target_lang)
             )
+            return translated_text, audio_success
+
+    async def run_pipeline(self, guild_id: int, pipeline: TranslationPipeline):
+        """Deliver finished jobs strictly in message order"""
+        while True:
+            if not pipeline.jobs:
+                pipeline.wakeup.clear()
+                await pipeline.wakeup.wait()
+                continue
+
+            job = pipeline.jobs[0]
+            task = job.task
+            await asyncio.wait((task,))
+
+            # The job may have been merged (new task) or dropped while we waited
+            if not pipeline.jobs or pipeline.jobs[0] is not job or job.task is not task:
+                continue
+            pipeline.jobs.popleft()
 
-            # Handle voice channel connection
-            if message.author.voice and message.author.voice.channel and audio_success:
-                guild_id = message.guild.id
+            if task.cancelled():
+                # Nothing to deliver for a job whose preparation was cancelled
+                await self.cleanup_audio_file(job.audio_file)
+                continue
+
+            lag = job.lag
+            pipeline.record_delivery(lag)
+            try:
+                translated_text, audio_success = task.result()
+                if audio_success and lag > STALE_LAG_SECONDS:
+                    # Too far behind to be worth speaking; the text translation still goes out
+                    await self.cleanup_audio_file(job.audio_file)
+                    audio_success = False
+                await self.deliver(guild_id, job, translated_text, audio_success)
+            except Exception as e:
+                logging.error(f"Translation error: {e}")
+                await self.cleanup_audio_file(job.audio_file)
+                try:
+                    await job.message.channel.send("⚠️ Translation failed. Please try again later.")
+                except discord.HTTPException:
+                    pass
+
+    async def deliver(self, guild_id: int, job: TranslationJob, translated_text: str, audio_success: bool):
+        message = job.message
+        audio_file = job.audio_file
+
+        # Handle voice channel connection
+        if audio_success and self.wants_audio(message):
+            # Initialize queue if needed
+            if guild_id not in self.audio_queues:
+                self.audio_queues[guild_id] = AudioQueue()
+
+            # Connect to voice if not already connected
+            if guild_id not in self.active_vc or not self.active_vc[guild_id].is_connected():
+                try:
+                    vc = await message.author.voice.channel.connect()
+                    self.active_vc[guild_id] = vc
+                except Exception as e:
+                    logging.error(f"Error connecting to voice: {e}")
+                    await self.cleanup_audio_file(audio_file)
+                    # Don't return here, still send text translation
+
+            # Add to queue and start playing if not already playing
+            if guild_id in self.active_vc and self.active_vc[guild_id].is_connected():
+                queue = self.audio_queues[guild_id]
+                await queue.add_to_queue(audio_file, message)
                 
-                # Initialize queue if needed
-                if guild_id not in self.audio_queues:
-                    self.audio_queues[guild_id] = AudioQueue()
-
-                # Connect to voice if not already connected
-                if guild_id not in self.active_vc or not self.active_vc[guild_id].is_connected():
-                    try:
-                        vc = await message.author.voice.channel.connect()
-                        self.active_vc[guild_id] = vc
-                    except Exception as e:
-                        logging.error(f"Error connecting to voice: {e}")
-                        await self.cleanup_audio_file(audio_file)
-                        # Don't return here, still send text translation
-
-                # Add to queue and start playing if not already playing
-                if guild_id in self.active_vc and self.active_vc[guild_id].is_connected():
-                    queue = self.audio_queues[guild_id]
-                    await queue.add_to_queue(audio_file, message)
-                    
-                    if not queue.is_playing:
-                        queue.is_playing = True
-                        await self.play_next(guild_id)
-
-            # Send text translation with appropriate flag
-            flag = '🇪🇸' if target_lang == 'es' else '🇺🇸'
-            source_flag = '🇺🇸' if detected_lang == 'en' else '🇪🇸'
-            
-            await message.channel.send(
-                f"{source_flag} **Original:** {message.content}\n"
-                f"{flag} **Translated:** {translated.text}"
-            )
+                if not queue.is_playing:
+                    queue.is_playing = True
+                    await self.play_next(guild_id)
+        elif audio_success:
+            await self.cleanup_audio_file(audio_file)
 
-        except Exception as e:
-            logging.error(f"Translation error: {e}")
-            await message.channel.send("⚠️ Translation failed. Please try again later.")
-            await self.cleanup_audio_file(self.get_audio_file_path(message.id))
+        # Send text translation with appropriate flag
+        flag = LANGUAGE_FLAGS[job.target_lang]
+        source_flag = LANGUAGE_FLAGS.get(job.source_lang, '🌐')
+        
+        await message.channel.send(
+            f"{source_flag} **Original:** {job.content}\n"
+            f"{flag} **Translated:** {translated_text}"
+        )
 
     @commands.command()
     async def leave(self, ctx):
@@ -298,6 +381,23 @@ class TranslationVoice(commands.Cog):
             await ctx.send("👋 Left the voice channel.")
         else:
             await ctx.send("❌ Not connected to any voice channel.")
+
+    @commands.command(name='translator_stats')
+    async def translator_stats(self, ctx):
+        """Show translation pipeline backlog and lag"""
+        pipeline = self.pipelines.get(ctx.guild.id)
+        if not pipeline:
+            await ctx.send("ℹ️ No translations processed in this server yet.")
+            return
+
+        embed = discord.Embed(title="Translation Pipeline", color=discord.Color.blue())
+        embed.add_field(name="Pending", value=f"{len(pipeline.jobs)}/{pipeline.max_pending}", inline=True)
+        embed.add_field(name="Queue lag", value=f"{pipeline.current_lag:.1f}s", inline=True)
+        embed.add_field(name="Last / max lag", value=f"{pipeline.last_lag:.1f}s / {pipeline.max_lag:.1f}s", inline=True)
+        embed.add_field(name="Delivered", value=str(pipeline.delivered), inline=True)
+        embed.add_field(name="Merged", value=str(pipeline.merged), inline=True)
+        embed.add_field(name="Dropped", value=str(pipeline.dropped), inline=True)
+        await ctx.send(embed=embed)
             
     @commands.command(name='translator_help')
     async def translator_help(self, ctx):
@@ -317,6 +417,7 @@ class TranslationVoice(commands.Cog):
         embed.add_field(
             name="Commands",
             value="**/leave** - Make the bot leave the voice channel\n"
+                  "**/translator_stats** - Show translation backlog and lag\n"
                   "**/translator_help** - Show this help message",
             inline=False
         )
@@ -325,7 +426,8 @@ class TranslationVoice(commands.Cog):
             name="Requirements",
             value="• Join a voice channel before sending messages to hear translations\n"
                   "• Bot works only in designated channels\n"
-                  "• Supports English ↔ Spanish translation",
+                  "• Supports English ↔ Spanish translation\n"
+                  "• French, Portuguese and Arabic messages are translated to English",
             inline=False
         )
         
@@ -2,20 +2,14 @@
 
 import discord
 from discord.ext import commands
-from googletrans import Translator, LANGUAGES
 import asyncio
+from translation_service import get_translation_service
 
 class TranslatorCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.translator = Translator()
-        
-        # Initialize with test translation
-        try:
-            test_translation = self.translator.translate("Hello", dest="es")
-            print(f"Translator initialized successfully. Test translation: 'Hello' -> '{test_translation.text}'")
-        except Exception as e:
-            print(f"Error initializing Translator: {e}")
+        # Shared with translation_voice so repeated reactions hit the cache instead of googletrans
+        self.translation_service = get_translation_service()
 
         # Language map for reactions
         self.LANGUAGE_MAP = {
@@ -61,7 +55,7 @@ class TranslatorCog(commands.Cog):
 
         try:
             # Perform translation
-            translation = self.translator.translate(original_text, dest=language_code)
+            translation = await self.translation_service.translate(original_text, language_code)
             translated_text = translation.text
             
             # Send plain text translation
@@ -79,6 +73,17 @@ class TranslatorCog(commands.Cog):
         except Exception as e:
             print(f"Translation failed: {e}")
 
+    @commands.command(name='translation_cache')
+    async def translation_cache(self, ctx):
+        """Show translation cache statistics"""
+        stats = self.translation_service.stats()
+        lookups = stats['hits'] + stats['misses'] + stats['coalesced']
+        hit_rate = (stats['hits'] + stats['coalesced']) / lookups * 100 if lookups else 0
+        await ctx.send(
+            f"📊 Cached: {stats['cached']} | Hits: {stats['hits']} | Coalesced: {stats['coalesced']} | "
+            f"Misses: {stats['misses']} | Upstream calls: {stats['upstream_calls']} | Hit rate: {hit_rate:.1f}%"
+        )
+
     async def delete_after_delay(self, message, delay_seconds):
         """Delete a message after a specified delay"""
         await asyncio.sleep(delay_seconds)
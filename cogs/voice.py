@@ -4,8 +4,8 @@ import asyncio
 import logging
 import random
 import tempfile
-from datetime import datetime, timedelta
-from collections import defaultdict
+import time
+from collections import defaultdict, OrderedDict
 from pathlib import Path
 from typing import Optional, Set, Dict, List, Tuple
 from dataclasses import dataclass  # Import the dataclass decorator
@@ -29,42 +29,81 @@ class WelcomeConfig:
     language: str
     name_only_messages: List[str]  # Messages for frequent rejoins
 
-@dataclass
 class UserJoinInfo:
-    """Tracks user join patterns"""
-    last_welcome: datetime
-    join_count: int
-    last_join: datetime
+    """Tracks user join patterns (monotonic whole-second timestamps)"""
+    __slots__ = ('last_welcome', 'join_count', 'last_join')
+
+    def __init__(self, last_welcome: int, join_count: int, last_join: int):
+        self.last_welcome = last_welcome
+        self.join_count = join_count
+        self.last_join = last_join
 
 class RateLimiter:
-    """Handles rate limiting for welcome messages"""
+    """Handles rate limiting for welcome messages
+
+    Entries are kept in last-join order. Every entry shares the same time-to-live,
+    so that order is also expiry order: expired entries are popped from the front
+    as new joins arrive, and the oldest entry is evicted once max_entries is hit.
+    """
     def __init__(self, cooldown_minutes: int = 30, rejoin_threshold: int = 3,
-                 rejoin_window_minutes: int = 10):
-        self.cooldown = timedelta(minutes=cooldown_minutes)
+                 rejoin_window_minutes: int = 10, max_age_hours: int = 24,
+                 max_entries: int = 50000, clock=time.monotonic):
+        self.cooldown = cooldown_minutes * 60
         self.rejoin_threshold = rejoin_threshold
-        self.rejoin_window = timedelta(minutes=rejoin_window_minutes)
-        self.user_joins: Dict[Tuple[int, int], UserJoinInfo] = {}
+        self.rejoin_window = rejoin_window_minutes * 60
+        self.max_age = max_age_hours * 3600
+        self.max_entries = max_entries
+        self.clock = clock
+        self.user_joins: "OrderedDict[Tuple[int, int], UserJoinInfo]" = OrderedDict()
+        self.stats = defaultdict(int)
         logger.info(f"RateLimiter initialized with {cooldown_minutes}min cooldown, "
                    f"{rejoin_threshold} rejoin threshold")
 
+    @property
+    def ttl(self) -> int:
+        # An entry must outlive the cooldown and rejoin window it is tracking
+        return max(self.max_age, self.cooldown, self.rejoin_window)
+
+    def set_cooldown(self, minutes: int):
+        self.cooldown = minutes * 60
+
+    def _expire(self, now: int):
+        """Pop entries from the front until the oldest is still within its TTL"""
+        cutoff = now - self.ttl
+        user_joins = self.user_joins
+        while user_joins:
+            key, info = next(iter(user_joins.items()))
+            if info.last_join >= cutoff:
+                break
+            del user_joins[key]
+            self.stats['expired'] += 1
+
     def should_welcome(self, guild_id: int, user_id: int) -> Tuple[bool, bool]:
         """
         Returns (should_welcome, name_only)
         name_only is True if user should get name-only welcome due to frequent rejoins
         """
         key = (guild_id, user_id)
-        now = datetime.now()
+        now = int(self.clock())
+        self._expire(now)
         
-        if key not in self.user_joins:
+        user_info = self.user_joins.get(key)
+        if user_info is None:
+            self.stats['misses'] += 1
+            if len(self.user_joins) >= self.max_entries:
+                self.user_joins.popitem(last=False)
+                self.stats['evicted'] += 1
             self.user_joins[key] = UserJoinInfo(
                 last_welcome=now,
                 join_count=1,
                 last_join=now
             )
+            self.stats['welcomed'] += 1
             logger.debug(f"New user join tracked for Guild:{guild_id} User:{user_id}")
             return True, False
 
-        user_info = self.user_joins[key]
+        self.stats['hits'] += 1
+        self.user_joins.move_to_end(key)
         
         # Reset join count if outside rejoin window
         if now - user_info.last_join > self.rejoin_window:
@@ -77,25 +116,22 @@ class RateLimiter:
         # Check if we're still in cooldown period
         if now - user_info.last_welcome < self.cooldown:
             if user_info.join_count >= self.rejoin_threshold:
+                self.stats['name_only'] += 1
                 logger.info(f"Name-only welcome for frequent rejoin User:{user_id}")
                 return True, True
+            self.stats['suppressed'] += 1
             logger.debug(f"User:{user_id} in cooldown period")
             return False, False
 
         # Update last welcome time and reset join count
         user_info.last_welcome = now
+        self.stats['welcomed'] += 1
         return True, False
 
-    def cleanup_old_entries(self, max_age_hours: int = 24):
-        """Remove old entries to prevent memory leaks"""
-        now = datetime.now()
-        max_age = timedelta(hours=max_age_hours)
-        
+    def cleanup_old_entries(self):
+        """Remove expired entries; joins already do this incrementally, this catches quiet periods"""
         old_count = len(self.user_joins)
-        self.user_joins = {
-            key: info for key, info in self.user_joins.items()
-            if now - info.last_join < max_age
-        }
+        self._expire(int(self.clock()))
         removed = old_count - len(self.user_joins)
         if removed > 0:
             logger.info(f"Cleaned up {removed} old rate limit entries")
@@ -400,7 +436,7 @@ class Voice(commands.Cog):
             await ctx.send("Cooldown time must be at least 1 minute")
             return
         
-        self.rate_limiter.cooldown = timedelta(minutes=minutes)
+        self.rate_limiter.set_cooldown(minutes)
         await ctx.send(f"Welcome message cooldown set to {minutes} minutes")
         logger.info(f"Cooldown set to {minutes} minutes in guild {ctx.guild.id}")
 
@@ -410,13 +446,19 @@ class Voice(commands.Cog):
         """Shows current welcome message settings"""
         guild_id = ctx.guild.id
         blocked_count = len(self.blocked_users.get(guild_id, set()))
-        cooldown_mins = self.rate_limiter.cooldown.total_seconds() / 60
+        cooldown_mins = self.rate_limiter.cooldown / 60
+        limiter_stats = self.rate_limiter.stats
+        lookups = limiter_stats['hits'] + limiter_stats['misses']
+        hit_rate = limiter_stats['hits'] / lookups * 100 if lookups else 0
         
         status = (
             f"🔊 Welcome Status for {ctx.guild.name}:\n"
             f"• Cooldown: {cooldown_mins:.0f} minutes\n"
             f"• Blocked Users: {blocked_count}\n"
             f"• Active Voice Connection: {'Yes' if guild_id in self.active_connections else 'No'}\n"
+            f"• Tracked Joins: {len(self.rate_limiter.user_joins)}/{self.rate_limiter.max_entries} "
+            f"(hit rate {hit_rate:.0f}%, {limiter_stats['suppressed']} suppressed, "
+            f"{limiter_stats['expired'] + limiter_stats['evicted']} expired)\n"
             f"• Language: {self.welcome_configs.get(guild_id, self.welcome_configs[None]).language}"
         )
         await ctx.send(status)
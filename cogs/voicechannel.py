@@ -4,8 +4,12 @@ from discord import app_commands, ui
 import asyncio
 import logging
 
+from panel_registry import get_panel_registry
+
 logger = logging.getLogger(__name__)
 
+PANEL_NAME = "voicemaster"
+
 class VoiceMasterButtons(ui.View):
     def __init__(self, bot):
         super().__init__(timeout=None)  # Persistent view that doesn't timeout
@@ -269,7 +273,10 @@ class VoiceChannel(commands.Cog):
 
         view = VoiceMasterButtons(self.bot)
         
-        await interaction.response.send_message(embed=embed, view=view)
+        # One interface per channel: re-running the command updates it instead of posting a copy
+        await interaction.response.defer(ephemeral=True)
+        await get_panel_registry().publish(PANEL_NAME, interaction.channel, embed=embed, view=view, verify=True)
+        await interaction.followup.send("✅ VoiceMaster interface is ready.", ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(VoiceChannel(bot))
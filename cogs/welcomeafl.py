@@ -4,6 +4,8 @@ import asyncio
 import random
 from datetime import datetime
 
+from dm_dispatcher import get_dm_dispatcher
+
 class WelcomeAFL(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -88,11 +90,11 @@ class WelcomeAFL(commands.Cog):
                 dm_embed.set_thumbnail(url=member.guild.icon.url if member.guild.icon else None)
                 dm_embed.set_footer(text="AFL Alliance • We're stronger together!")
                 
-                await member.send(embed=dm_embed)
-                print(f"DM welcome message sent to {member.name}")
+                if get_dm_dispatcher().send(member, key=('welcome', member.guild.id), embed=dm_embed):
+                    print(f"DM welcome message queued for {member.name}")
+                else:
+                    print(f"Could not send DM to {member.name} - DMs disabled")
                 
-            except discord.Forbidden:
-                print(f"Could not send DM to {member.name} - DMs disabled")
             except Exception as e:
                 print(f"Error in on_member_join: {e}")
 
@@ -3,6 +3,8 @@ from discord.ext import commands
 from discord import app_commands
 import asyncio
 
+from dm_dispatcher import get_dm_dispatcher
+
 class WelcomeSparta(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -35,8 +37,10 @@ class WelcomeSparta(commands.Cog):
                 )
                 
                 view = WelcomeView(self.bot, member.guild.roles, member.guild)
-                await member.send(dm_message, view=view)
-                print("DM sent with WelcomeView successfully.")
+                if get_dm_dispatcher().send(member, key=('welcome', member.guild.id), content=dm_message, view=view):
+                    print("DM with WelcomeView queued successfully.")
+                else:
+                    print("Could not send DM - DMs disabled.")
             except Exception as e:
                 print(f"Error in on_member_join: {e}")
 
@@ -3,6 +3,22 @@ from datetime import datetime
 
 DATABASE_FILE = 'data.db'
 
+def connect_store(schema, path=DATABASE_FILE, **kwargs):
+    """Open a long-lived connection for a store module and create its tables.
+
+    data.db stays in the default rollback-journal mode: the deploy workflow
+    commits only data.db, so nothing may be left waiting in a -wal file.
+    """
+    conn = sqlite3.connect(path, **kwargs)
+    try:
+        # Earlier builds switched the file to WAL; this checkpoints and switches it back
+        conn.execute('PRAGMA journal_mode=DELETE')
+    except sqlite3.OperationalError as e:
+        print(f"Could not switch {path} to rollback journal mode: {e}")
+    conn.executescript(schema)
+    conn.commit()
+    return conn
+
 def initialize_database():
     """Initializes the database and ensures the required table exists."""
     conn = sqlite3.connect(DATABASE_FILE)
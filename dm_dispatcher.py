@@ -0,0 +1,154 @@
+"""Shared outbound queue for direct messages.
+
+DMs are the easiest way to trip Discord's anti-spam limits: every new
+recipient costs a channel create plus a send. Cogs hand their DMs to one
+dispatcher, which sends them at a steady global rate, collapses repeats for
+the same user and purpose, retries transient failures with backoff and
+remembers users whose DMs are closed so they aren't tried again for a while.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Optional
+
+import aiohttp
+import discord
+
+logger = logging.getLogger(__name__)
+
+DM_INTERVAL = 0.5  # Seconds between sends, i.e. at most 2 DMs per second overall
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 2.0  # Seconds before the first retry, doubled each attempt
+FORBIDDEN_TTL = 6 * 3600  # How long a closed-DM user is skipped
+RATE_WINDOW = 60.0  # Seconds of history behind the reported send rate
+
+
+class DMRequest:
+    __slots__ = ('user', 'kwargs', 'attempts')
+
+    def __init__(self, user: discord.abc.User, kwargs: Dict[str, Any]):
+        self.user = user
+        self.kwargs = kwargs
+        self.attempts = 0
+
+
+class DMDispatcher:
+    """Deduplicating, rate-shaped DM queue with retries and a closed-DM cache"""
+    def __init__(self, interval: float = DM_INTERVAL):
+        self.interval = interval
+        self.queue: "OrderedDict[Hashable, DMRequest]" = OrderedDict()
+        self.wakeup: Optional[asyncio.Event] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.forbidden: Dict[int, float] = {}
+        self.sent_times = deque()
+        self.stats = {'sent': 0, 'failed': 0, 'retried': 0, 'deduplicated': 0, 'skipped_closed': 0}
+
+    def send(self, user: discord.abc.User, *, key: Optional[Hashable] = None, **kwargs) -> bool:
+        """Queue ``user.send(**kwargs)``; returns False if the user's DMs are known to be closed.
+
+        Messages with the same ``key`` for the same user collapse into one, and
+        the newest content wins. Without a key every call is sent.
+        """
+        if self.is_closed(user.id):
+            self.stats['skipped_closed'] += 1
+            return False
+
+        queue_key = (user.id, key) if key is not None else (user.id, object())
+        if queue_key in self.queue:
+            self.queue[queue_key].kwargs = kwargs
+            self.stats['deduplicated'] += 1
+        else:
+            self.queue[queue_key] = DMRequest(user, kwargs)
+        self._ensure_worker()
+        self.wakeup.set()
+        return True
+
+    def is_closed(self, user_id: int) -> bool:
+        closed_at = self.forbidden.get(user_id)
+        if closed_at is None:
+            return False
+        if time.monotonic() - closed_at > FORBIDDEN_TTL:
+            del self.forbidden[user_id]
+            return False
+        return True
+
+    def _ensure_worker(self):
+        if self.worker is None or self.worker.done():
+            self.wakeup = asyncio.Event()
+            self.worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            if not self.queue:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            queue_key, request = self.queue.popitem(last=False)
+            if self.is_closed(request.user.id):
+                self.stats['skipped_closed'] += 1
+                continue
+            try:
+                await self._deliver(queue_key, request)
+            except Exception:
+                # One bad request must not stop the worker for everyone queued behind it
+                self.stats['failed'] += 1
+                logger.exception(f"Unexpected error sending DM to {request.user.id}")
+            await asyncio.sleep(self.interval)
+
+    async def _deliver(self, queue_key: Hashable, request: DMRequest):
+        request.attempts += 1
+        try:
+            await request.user.send(**request.kwargs)
+            self.stats['sent'] += 1
+            self.sent_times.append(time.monotonic())
+        except discord.Forbidden:
+            self.forbidden[request.user.id] = time.monotonic()
+            self.stats['skipped_closed'] += 1
+            logger.info(f"DMs closed for {request.user.id}, skipping them for a while")
+        except (discord.HTTPException, asyncio.TimeoutError, aiohttp.ClientError, OSError) as e:
+            # Connection errors and timeouts are transient; HTTP errors only when throttled or server-side
+            retryable = not isinstance(e, discord.HTTPException) or e.status == 429 or e.status >= 500
+            if retryable and request.attempts < MAX_ATTEMPTS:
+                delay = BACKOFF_BASE * 2 ** (request.attempts - 1)
+                self.stats['retried'] += 1
+                asyncio.get_running_loop().call_later(delay, self._requeue, queue_key, request)
+            else:
+                self.stats['failed'] += 1
+                logger.error(f"Giving up on DM to {request.user.id} after {request.attempts} attempts: {e}")
+
+    def _requeue(self, queue_key: Hashable, request: DMRequest):
+        # A newer message with the same key supersedes the retry
+        if queue_key not in self.queue:
+            self.queue[queue_key] = request
+            self.wakeup.set()
+
+    @property
+    def depth(self) -> int:
+        return len(self.queue)
+
+    def send_rate(self) -> float:
+        """DMs per minute over the last RATE_WINDOW seconds"""
+        cutoff = time.monotonic() - RATE_WINDOW
+        while self.sent_times and self.sent_times[0] < cutoff:
+            self.sent_times.popleft()
+        return len(self.sent_times) * 60.0 / RATE_WINDOW
+
+    def status_line(self) -> str:
+        return (
+            f"📨 Queued: {self.depth} | Rate: {self.send_rate():.1f}/min | Sent: {self.stats['sent']} | "
+            f"Retried: {self.stats['retried']} | Failed: {self.stats['failed']} | "
+            f"Deduplicated: {self.stats['deduplicated']} | Closed DMs: {self.stats['skipped_closed']} "
+            f"({len(self.forbidden)} cached)"
+        )
+
+
+_dm_dispatcher: Optional[DMDispatcher] = None
+
+
+def get_dm_dispatcher() -> DMDispatcher:
+    """Return the process-wide DM dispatcher, creating it on first use"""
+    global _dm_dispatcher
+    if _dm_dispatcher is None:
+        _dm_dispatcher = DMDispatcher()
+    return _dm_dispatcher
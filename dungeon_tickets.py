@@ -0,0 +1,149 @@
+"""SQLite index of Frigost dungeon help tickets.
+
+One row per help thread (requester, dungeon, class, status, timestamps) plus
+per-user cooldown rows with an expiry, so ticket lookups, dashboards and
+queue stats never have to read thread history and survive restarts.
+"""
+import logging
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from database import DATABASE_FILE, connect_store
+
+logger = logging.getLogger(__name__)
+
+STATUS_OPEN = 'open'
+STATUS_ARCHIVED = 'archived'  # Auto-archived by Discord, may be reopened
+STATUS_CLOSED = 'closed'
+STATS_WINDOW = 7 * 24 * 3600  # Closed tickets counted in per-dungeon stats
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS dungeon_tickets (
+        thread_id INTEGER PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        requester_id INTEGER NOT NULL,
+        dungeon_key TEXT NOT NULL,
+        character_class TEXT,
+        ingame_name TEXT,
+        status TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        closed_at REAL,
+        closed_by INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS idx_dungeon_tickets_status ON dungeon_tickets (guild_id, status, dungeon_key, created_at);
+
+    CREATE TABLE IF NOT EXISTS dungeon_cooldowns (
+        user_id INTEGER PRIMARY KEY,
+        until REAL NOT NULL
+    );
+'''
+
+
+class TicketIndex:
+    """Ticket rows keyed by thread id and TTL cooldowns keyed by user id"""
+    def __init__(self, path: str = DATABASE_FILE):
+        self.conn = connect_store(SCHEMA, path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('DELETE FROM dungeon_cooldowns WHERE until <= ?', (time.time(),))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # Tickets
+
+    def open_ticket(self, thread_id: int, guild_id: int, requester_id: int, dungeon_key: str,
+                    character_class: Optional[str] = None, ingame_name: Optional[str] = None,
+                    created_at: Optional[float] = None):
+        try:
+            with self.conn:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO dungeon_tickets (thread_id, guild_id, requester_id, dungeon_key, '
+                    'character_class, ingame_name, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (thread_id, guild_id, requester_id, dungeon_key, character_class, ingame_name,
+                     STATUS_OPEN, created_at or time.time())
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error indexing ticket {thread_id}: {e}")
+
+    def set_status(self, thread_id: int, status: str, closed_by: Optional[int] = None):
+        closed_at = time.time() if status == STATUS_CLOSED else None
+        try:
+            with self.conn:
+                self.conn.execute(
+                    'UPDATE dungeon_tickets SET status = ?, closed_at = ?, closed_by = ? WHERE thread_id = ?',
+                    (status, closed_at, closed_by, thread_id)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error updating ticket {thread_id}: {e}")
+
+    def get(self, thread_id: int) -> Optional[Dict]:
+        row = self.conn.execute('SELECT * FROM dungeon_tickets WHERE thread_id = ?', (thread_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def requesters(self) -> Dict[int, int]:
+        """thread id -> requester id for every ticket not closed, to warm the in-memory map"""
+        return dict(self.conn.execute(
+            'SELECT thread_id, requester_id FROM dungeon_tickets WHERE status != ?', (STATUS_CLOSED,)
+        ))
+
+    def unclosed_thread_ids(self, guild_id: int) -> List[int]:
+        rows = self.conn.execute(
+            'SELECT thread_id FROM dungeon_tickets WHERE guild_id = ? AND status != ?', (guild_id, STATUS_CLOSED)
+        )
+        return [row[0] for row in rows]
+
+    def open_tickets(self, guild_id: int, dungeon_key: Optional[str] = None, limit: int = 25) -> List[Dict]:
+        """Open tickets, longest waiting first"""
+        query = 'SELECT * FROM dungeon_tickets WHERE guild_id = ? AND status = ?'
+        params = [guild_id, STATUS_OPEN]
+        if dungeon_key:
+            query += ' AND dungeon_key = ?'
+            params.append(dungeon_key)
+        query += ' ORDER BY created_at LIMIT ?'
+        params.append(limit)
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def dungeon_stats(self, guild_id: int) -> Dict[str, Dict]:
+        """Per dungeon: open/archived counts, oldest open ticket, and recent closes with mean time to close"""
+        stats: Dict[str, Dict] = {}
+        for row in self.conn.execute(
+            'SELECT dungeon_key, status, COUNT(*) AS count, MIN(created_at) AS oldest FROM dungeon_tickets '
+            'WHERE guild_id = ? AND status != ? GROUP BY dungeon_key, status',
+            (guild_id, STATUS_CLOSED)
+        ):
+            entry = stats.setdefault(row['dungeon_key'], _empty_stats())
+            entry[row['status']] = row['count']
+            if row['status'] == STATUS_OPEN:
+                entry['oldest_open'] = row['oldest']
+        for row in self.conn.execute(
+            'SELECT dungeon_key, COUNT(*) AS count, AVG(closed_at - created_at) AS mean_close FROM dungeon_tickets '
+            'WHERE guild_id = ? AND status = ? AND closed_at >= ? GROUP BY dungeon_key',
+            (guild_id, STATUS_CLOSED, time.time() - STATS_WINDOW)
+        ):
+            entry = stats.setdefault(row['dungeon_key'], _empty_stats())
+            entry[STATUS_CLOSED] = row['count']
+            entry['mean_close'] = row['mean_close']
+        return stats
+
+    # Cooldowns
+
+    def cooldowns(self) -> Dict[int, float]:
+        """user id -> expiry (Unix time) for every cooldown still running"""
+        return dict(self.conn.execute('SELECT user_id, until FROM dungeon_cooldowns WHERE until > ?', (time.time(),)))
+
+    def set_cooldown(self, user_id: int, until: float):
+        try:
+            with self.conn:
+                self.conn.execute('INSERT OR REPLACE INTO dungeon_cooldowns VALUES (?, ?)', (user_id, until))
+        except sqlite3.Error as e:
+            logger.error(f"Error storing cooldown for {user_id}: {e}")
+
+    def clear_cooldown(self, user_id: int):
+        with self.conn:
+            self.conn.execute('DELETE FROM dungeon_cooldowns WHERE user_id = ?', (user_id,))
+
+
+def _empty_stats() -> Dict:
+    return {STATUS_OPEN: 0, STATUS_ARCHIVED: 0, STATUS_CLOSED: 0, 'oldest_open': None, 'mean_close': None}
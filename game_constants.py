@@ -0,0 +1,8 @@
+"""Game data shared by several cogs and helper modules."""
+
+# Playable character classes, in the order the dropdowns show them
+CHARACTER_CLASSES = [
+    "Iop", "Cra", "Eniripsa", "Enutrof", "Sram", "Xelor", "Ecaflip", "Sacrier",
+    "Sadida", "Osamodas", "Pandawa", "Feca",
+    "Masqueraider", "Rogue"
+]
@@ -0,0 +1,151 @@
+"""SQLite ledger of invite attributions.
+
+Every join is a row (who, inviter, code, source, joined/left timestamps), and
+per-inviter counters are updated in the same transaction, so lookups and
+leaderboards never re-aggregate the history.
+"""
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from database import DATABASE_FILE, connect_store
+
+logger = logging.getLogger(__name__)
+
+NO_INVITER = 0  # Counter row for vanity/unknown joins
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS invite_joins (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id INTEGER NOT NULL,
+        member_id INTEGER NOT NULL,
+        member_name TEXT NOT NULL,
+        inviter_id INTEGER NOT NULL,
+        inviter_name TEXT,
+        invite_code TEXT,
+        source TEXT NOT NULL,
+        joined_at TEXT NOT NULL,
+        left_at TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_invite_joins_member ON invite_joins (guild_id, member_id, id);
+    CREATE INDEX IF NOT EXISTS idx_invite_joins_inviter ON invite_joins (guild_id, inviter_id, id);
+
+    CREATE TABLE IF NOT EXISTS invite_counters (
+        guild_id INTEGER NOT NULL,
+        inviter_id INTEGER NOT NULL,
+        inviter_name TEXT,
+        joins INTEGER NOT NULL DEFAULT 0,
+        current INTEGER NOT NULL DEFAULT 0,
+        left INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guild_id, inviter_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_invite_counters_joins ON invite_counters (guild_id, joins DESC);
+'''
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class InviteLedger:
+    """Append-only join history plus incrementally maintained per-inviter counters"""
+    def __init__(self, path: str = DATABASE_FILE):
+        self.conn = connect_store(SCHEMA, path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _open_join(self, guild_id: int, member_id: int) -> Optional[sqlite3.Row]:
+        return self.conn.execute(
+            'SELECT * FROM invite_joins WHERE guild_id = ? AND member_id = ? ORDER BY id DESC LIMIT 1',
+            (guild_id, member_id)
+        ).fetchone()
+
+    def _close_join(self, row: sqlite3.Row, left_at: str):
+        self.conn.execute('UPDATE invite_joins SET left_at = ? WHERE id = ?', (left_at, row['id']))
+        self.conn.execute(
+            'UPDATE invite_counters SET current = current - 1, left = left + 1 WHERE guild_id = ? AND inviter_id = ?',
+            (row['guild_id'], row['inviter_id'])
+        )
+
+    def record_join(self, guild_id: int, member_id: int, member_name: str, source: str,
+                    inviter_id: Optional[int] = None, inviter_name: Optional[str] = None,
+                    invite_code: Optional[str] = None, joined_at: Optional[datetime] = None):
+        """Store a join; source is 'invite', 'vanity' or 'unknown'"""
+        inviter_id = inviter_id or NO_INVITER
+        joined = joined_at.isoformat() if joined_at else _now()
+        try:
+            with self.conn:
+                # A leave we never saw (bot offline) would otherwise keep the old join counted as current
+                previous = self._open_join(guild_id, member_id)
+                if previous is not None and previous['left_at'] is None:
+                    self._close_join(previous, joined)
+
+                self.conn.execute(
+                    'INSERT INTO invite_joins (guild_id, member_id, member_name, inviter_id, inviter_name, '
+                    'invite_code, source, joined_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (guild_id, member_id, member_name, inviter_id, inviter_name, invite_code, source, joined)
+                )
+                self.conn.execute(
+                    'INSERT INTO invite_counters (guild_id, inviter_id, inviter_name, joins, current) '
+                    'VALUES (?, ?, ?, 1, 1) ON CONFLICT (guild_id, inviter_id) DO UPDATE SET '
+                    'joins = joins + 1, current = current + 1, '
+                    'inviter_name = COALESCE(excluded.inviter_name, inviter_name)',
+                    (guild_id, inviter_id, inviter_name)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error recording join of {member_id} in {guild_id}: {e}")
+
+    def record_leave(self, guild_id: int, member_id: int) -> Optional[Dict]:
+        """Close the member's current join and return it, or None if we never saw them join"""
+        try:
+            with self.conn:
+                row = self._open_join(guild_id, member_id)
+                if row is None or row['left_at'] is not None:
+                    return None
+                self._close_join(row, _now())
+            return self._as_info(row)
+        except sqlite3.Error as e:
+            logger.error(f"Error recording leave of {member_id} in {guild_id}: {e}")
+            return None
+
+    def who_invited(self, guild_id: int, member_id: int) -> Optional[Dict]:
+        """Latest join of a member, as an info dict"""
+        row = self._open_join(guild_id, member_id)
+        return self._as_info(row) if row is not None else None
+
+    def inviter_counters(self, guild_id: int, inviter_id: int) -> Optional[Dict]:
+        row = self.conn.execute(
+            'SELECT * FROM invite_counters WHERE guild_id = ? AND inviter_id = ?', (guild_id, inviter_id)
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def top_inviters(self, guild_id: int, limit: int = 10) -> List[Dict]:
+        rows = self.conn.execute(
+            'SELECT * FROM invite_counters WHERE guild_id = ? AND inviter_id != ? ORDER BY joins DESC LIMIT ?',
+            (guild_id, NO_INVITER, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def guild_totals(self, guild_id: int) -> Dict:
+        """Summed counters for a guild; one row per inviter, so this stays small"""
+        row = self.conn.execute(
+            'SELECT COALESCE(SUM(joins), 0) AS joins, COALESCE(SUM(current), 0) AS current, '
+            'COALESCE(SUM(left), 0) AS left FROM invite_counters WHERE guild_id = ?',
+            (guild_id,)
+        ).fetchone()
+        return dict(row)
+
+    @staticmethod
+    def _as_info(row: sqlite3.Row) -> Dict:
+        return {
+            'inviter_id': row['inviter_id'] or None,
+            'inviter_name': row['inviter_name'] or 'Unknown',
+            'invite_code': row['invite_code'],
+            'source': row['source'],
+            'joined_at': datetime.fromisoformat(row['joined_at']),
+            'left_at': datetime.fromisoformat(row['left_at']) if row['left_at'] else None,
+        }
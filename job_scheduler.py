@@ -0,0 +1,133 @@
+"""Durable one-shot timers.
+
+Cogs register a handler per job kind and schedule jobs with an absolute due
+time. Jobs live in SQLite, so a restart neither loses them nor restarts their
+countdown: overdue jobs fire as soon as their handler is registered again.
+A single task sleeps until the earliest due job and is woken when an earlier
+one is added.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from database import DATABASE_FILE, connect_store
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS scheduled_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        due_at REAL NOT NULL,
+        payload TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_kind ON scheduled_jobs (kind);
+'''
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobScheduler:
+    """Persisted jobs ordered by due time in a heap"""
+    def __init__(self, path: str = DATABASE_FILE):
+        self.conn = connect_store(SCHEMA, path)
+        self.conn.commit()
+        self.handlers: Dict[str, Handler] = {}
+        self.jobs: Dict[int, Tuple[str, float, Dict[str, Any]]] = {}
+        self.heap: List[Tuple[float, int]] = []
+        self.parked: Dict[str, List[Tuple[float, int]]] = {}  # Due jobs whose kind has no handler yet
+        for job_id, kind, due_at, payload in self.conn.execute('SELECT id, kind, due_at, payload FROM scheduled_jobs'):
+            self.jobs[job_id] = (kind, due_at, json.loads(payload))
+            heapq.heappush(self.heap, (due_at, job_id))
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def register(self, kind: str, handler: Handler):
+        """Handle jobs of this kind, starting the timer task on first use"""
+        self.handlers[kind] = handler
+        for entry in self.parked.pop(kind, []):
+            heapq.heappush(self.heap, entry)
+        if self.task is None or self.task.done():
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.get_running_loop().create_task(self._run())
+        self.wakeup.set()
+
+    def unregister(self, kind: str):
+        self.handlers.pop(kind, None)
+
+    def schedule(self, kind: str, due_at: float, payload: Optional[Dict[str, Any]] = None) -> int:
+        """Persist a job due at the given Unix time and return its id"""
+        payload = payload or {}
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO scheduled_jobs (kind, due_at, payload) VALUES (?, ?, ?)',
+                (kind, due_at, json.dumps(payload))
+            )
+        self.jobs[cursor.lastrowid] = (kind, due_at, payload)
+        heapq.heappush(self.heap, (due_at, cursor.lastrowid))
+        if self.wakeup:
+            self.wakeup.set()
+        return cursor.lastrowid
+
+    def cancel(self, kind: str) -> int:
+        """Drop every pending job of a kind; returns how many there were"""
+        job_ids = [job_id for job_id, job in self.jobs.items() if job[0] == kind]
+        self._forget(job_ids)
+        return len(job_ids)
+
+    def pending(self, kind: str) -> List[Tuple[int, float, Dict[str, Any]]]:
+        return [(job_id, job[1], job[2]) for job_id, job in self.jobs.items() if job[0] == kind]
+
+    def _forget(self, job_ids: List[int]):
+        with self.conn:
+            self.conn.executemany('DELETE FROM scheduled_jobs WHERE id = ?', [(job_id,) for job_id in job_ids])
+        for job_id in job_ids:
+            self.jobs.pop(job_id, None)
+
+    def _next_due(self) -> Optional[float]:
+        # Cancelled jobs are dropped from the heap lazily
+        while self.heap and self.heap[0][1] not in self.jobs:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    async def _run(self):
+        while True:
+            self.wakeup.clear()
+            due = self._next_due()
+            timeout = None if due is None else max(0.0, due - time.time())
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            await self._fire_due()
+
+    async def _fire_due(self):
+        now = time.time()
+        while self._next_due() is not None and self.heap[0][0] <= now:
+            due_at, job_id = heapq.heappop(self.heap)
+            kind, _, payload = self.jobs[job_id]
+            handler = self.handlers.get(kind)
+            if handler is None:
+                # Keep it until the owning cog registers again
+                self.parked.setdefault(kind, []).append((due_at, job_id))
+                continue
+            try:
+                await handler(payload)
+            except Exception as e:
+                logger.exception(f"Error running scheduled job {job_id} ({kind})")
+            self._forget([job_id])
+
+
+_job_scheduler: Optional[JobScheduler] = None
+
+
+def get_job_scheduler() -> JobScheduler:
+    """Return the process-wide job scheduler, creating it on first use"""
+    global _job_scheduler
+    if _job_scheduler is None:
+        _job_scheduler = JobScheduler()
+    return _job_scheduler
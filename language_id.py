@@ -0,0 +1,196 @@
+"""Character n-gram language identifier.
+
+The model is a naive-Bayes table over character trigrams, built once at import
+from the short seed corpora below. Scoring a message is a dictionary lookup per
+n-gram followed by one vectorized sum over the log-probability table.
+"""
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+LANGUAGES = ('en', 'es', 'fr', 'pt', 'ar')
+NGRAM_SIZES = (3,)
+SMOOTHING = 0.5
+CONFIDENCE_SCALE = 6.0  # Sharpens per-n-gram averages into a usable posterior
+FULL_EVIDENCE_GRAMS = 12  # Shorter texts are scored as if padded with neutral grams, so confidence grows with length
+MIN_GRAMS = 4  # Fewer known n-grams than this ("no", "lol") is no evidence at all
+DEFAULT_THRESHOLD = 0.5
+
+SEED_CORPORA = {
+    'en': """
+        the quick brown fox jumps over the lazy dog. hello everyone, how are you doing today?
+        we are going to attack the enemy guild tonight so please be ready at nine. who wants to
+        join the dungeon run with me? i need a healer and a tank for this fight. thank you for
+        the help yesterday, that was a great game. what time is the event and where should we
+        meet? can someone explain the rules of the tournament to me please. i think we should
+        wait for the others before we start. this is my first time here and i have no idea what
+        to do. they said that the server will be down for maintenance this evening. would you
+        like to play together later? good morning, good night, see you tomorrow. it was really
+        fun, let's do it again next week. i don't know why the bot is not working right now.
+        our team has won the last three battles and we will keep going. the weather is nice and
+        i want to go outside with my friends. should i buy this item or save my money for later?
+        there is nothing more important than the people who stay with you when things are hard.
+    """,
+    'es': """
+        hola a todos, ¿cómo están hoy? vamos a atacar al gremio enemigo esta noche, así que por
+        favor estén listos a las nueve. ¿quién quiere venir conmigo a la mazmorra? necesito un
+        curandero y un tanque para esta pelea. gracias por la ayuda de ayer, fue una partida muy
+        buena. ¿a qué hora es el evento y dónde nos encontramos? alguien me puede explicar las
+        reglas del torneo por favor. creo que deberíamos esperar a los demás antes de empezar.
+        es mi primera vez aquí y no tengo ni idea de qué hacer. dijeron que el servidor estará
+        en mantenimiento esta tarde. ¿te gustaría jugar juntos más tarde? buenos días, buenas
+        noches, nos vemos mañana. fue muy divertido, hagámoslo otra vez la próxima semana. no sé
+        por qué el bot no funciona ahora mismo. nuestro equipo ganó las últimas tres batallas y
+        vamos a seguir. hace buen tiempo y quiero salir con mis amigos. ¿debo comprar este objeto
+        o guardar mi dinero para después? no hay nada más importante que la gente que se queda
+        contigo cuando las cosas son difíciles. también tengo que trabajar, pero está bien.
+    """,
+    'fr': """
+        bonjour à tous, comment allez-vous aujourd'hui ? nous allons attaquer la guilde ennemie
+        ce soir, alors soyez prêts à neuf heures s'il vous plaît. qui veut venir avec moi dans le
+        donjon ? j'ai besoin d'un soigneur et d'un tank pour ce combat. merci pour l'aide d'hier,
+        c'était une très bonne partie. à quelle heure est l'événement et où est-ce qu'on se
+        retrouve ? quelqu'un peut m'expliquer les règles du tournoi s'il vous plaît. je pense
+        qu'on devrait attendre les autres avant de commencer. c'est ma première fois ici et je
+        ne sais pas quoi faire. ils ont dit que le serveur sera en maintenance ce soir. tu veux
+        jouer ensemble plus tard ? bonne journée, bonne nuit, à demain. c'était vraiment drôle,
+        on le refait la semaine prochaine. je ne sais pas pourquoi le bot ne marche pas en ce
+        moment. notre équipe a gagné les trois dernières batailles et nous allons continuer. il
+        fait beau et je veux sortir avec mes amis. est-ce que je dois acheter cet objet ou garder
+        mon argent pour plus tard ? il n'y a rien de plus important que les gens qui restent avec
+        toi quand les choses sont difficiles. aussi je dois travailler mais ça va.
+    """,
+    'pt': """
+        olá a todos, como vocês estão hoje? vamos atacar a guilda inimiga esta noite, então por
+        favor estejam prontos às nove. quem quer ir comigo para a masmorra? eu preciso de um
+        curandeiro e de um tanque para esta luta. obrigado pela ajuda de ontem, foi uma partida
+        muito boa. que horas é o evento e onde a gente se encontra? alguém pode me explicar as
+        regras do torneio por favor. acho que devemos esperar os outros antes de começar. é a
+        minha primeira vez aqui e não faço ideia do que fazer. disseram que o servidor vai estar
+        em manutenção hoje à tarde. você quer jogar junto mais tarde? bom dia, boa noite, até
+        amanhã. foi muito divertido, vamos fazer de novo na próxima semana. não sei por que o
+        bot não está funcionando agora. nossa equipe ganhou as últimas três batalhas e vamos
+        continuar. o tempo está bom e eu quero sair com meus amigos. devo comprar este item ou
+        guardar meu dinheiro para depois? não há nada mais importante do que as pessoas que
+        ficam com você quando as coisas são difíceis. também tenho que trabalhar, mas tudo bem.
+    """,
+    'ar': """
+        مرحبا بالجميع، كيف حالكم اليوم؟ سنهاجم النقابة المعادية الليلة، لذلك كونوا مستعدين في
+        الساعة التاسعة من فضلكم. من يريد أن يأتي معي إلى الزنزانة؟ أحتاج إلى معالج ودبابة لهذه
+        المعركة. شكرا على المساعدة بالأمس، كانت مباراة رائعة جدا. في أي ساعة الحدث وأين نلتقي؟
+        هل يمكن لأحد أن يشرح لي قواعد البطولة من فضلك. أعتقد أنه يجب علينا انتظار الآخرين قبل
+        أن نبدأ. هذه أول مرة لي هنا وليس لدي أي فكرة عما يجب فعله. قالوا إن الخادم سيكون في
+        الصيانة هذا المساء. هل تريد أن نلعب معا لاحقا؟ صباح الخير، تصبح على خير، أراك غدا.
+        كان ممتعا حقا، لنفعلها مرة أخرى الأسبوع القادم. لا أعرف لماذا لا يعمل البوت الآن.
+        فريقنا فاز في المعارك الثلاث الأخيرة وسنستمر. الطقس جميل وأريد الخروج مع أصدقائي.
+    """,
+}
+
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+_CLEAN_PATTERN = re.compile(r'https?://\S+|<[@#:&!]\S*?>|@\S+')
+_ARABIC_PATTERN = re.compile(r'[؀-ۿ]')
+
+
+def _ngrams(text: str) -> List[str]:
+    # Words joined by single spaces, so every n-gram is sliced from one padded string
+    padded = f" {' '.join(_TOKEN_PATTERN.findall(text.lower()))} "
+    grams = []
+    for size in NGRAM_SIZES:
+        grams += [padded[i:i + size] for i in range(len(padded) - size + 1)]
+    return grams
+
+
+def _build_model() -> Tuple[Dict[str, int], np.ndarray]:
+    counts: Dict[str, List[int]] = {}
+    totals = [0] * len(LANGUAGES)
+    for lang_index, lang in enumerate(LANGUAGES):
+        for gram in _ngrams(SEED_CORPORA[lang]):
+            if gram == ' ':
+                continue
+            counts.setdefault(gram, [0] * len(LANGUAGES))[lang_index] += 1
+            totals[lang_index] += 1
+
+    index = {gram: row for row, gram in enumerate(counts)}
+    table = np.array(list(counts.values()), dtype=np.float64)
+    vocab = len(index)
+    denominators = np.array(totals, dtype=np.float64) + SMOOTHING * vocab
+    # Row-normalise so a gram's score is relative to its average, keeping unseen grams neutral
+    log_probs = np.log((table + SMOOTHING) / denominators)
+    log_probs -= log_probs.mean(axis=1, keepdims=True)
+    return index, log_probs.astype(np.float32)
+
+
+NGRAM_INDEX, LOG_PROBS = _build_model()
+
+
+def _gram_ids(text: str) -> List[int]:
+    return [gram_id for gram_id in map(NGRAM_INDEX.get, _ngrams(text)) if gram_id is not None]
+
+
+def _is_arabic(text: str) -> bool:
+    arabic = len(_ARABIC_PATTERN.findall(text))
+    return arabic > 0 and arabic * 2 > sum(1 for char in text if char.isalpha())
+
+
+def classify(text: str, threshold: float = DEFAULT_THRESHOLD) -> Tuple[Optional[str], float]:
+    """Return (language, confidence); language is None when confidence is below threshold"""
+    text = _CLEAN_PATTERN.sub(' ', text)
+
+    # Script check settles Arabic without scoring
+    if _is_arabic(text):
+        return 'ar', 1.0
+
+    ids = _gram_ids(text)
+    if len(ids) < MIN_GRAMS:
+        return None, 0.0
+
+    # Five scores are cheaper to normalise in plain Python than through numpy
+    scale = CONFIDENCE_SCALE / max(len(ids), FULL_EVIDENCE_GRAMS)
+    scores = [score * scale for score in LOG_PROBS.take(ids, axis=0).sum(axis=0).tolist()]
+    top = max(scores)
+    weights = [math.exp(score - top) for score in scores]
+    best = weights.index(1.0)
+    confidence = 1.0 / sum(weights)
+    return (LANGUAGES[best] if confidence >= threshold else None), confidence
+
+
+def classify_many(texts: Sequence[str], threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[Optional[str], float]]:
+    """Classify a batch of texts with a single gather and segmented sum over the table"""
+    results: List[Tuple[Optional[str], float]] = [(None, 0.0)] * len(texts)
+    rows: List[int] = []
+    flat: List[int] = []
+    lengths: List[int] = []
+    for text_index, text in enumerate(texts):
+        text = _CLEAN_PATTERN.sub(' ', text)
+        if _is_arabic(text):
+            results[text_index] = ('ar', 1.0)
+            continue
+        ids = _gram_ids(text)
+        if len(ids) >= MIN_GRAMS:
+            rows.append(text_index)
+            flat += ids
+            lengths.append(len(ids))
+
+    if not rows:
+        return results
+
+    counts = np.array(lengths)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    scores = np.add.reduceat(LOG_PROBS.take(flat, axis=0), offsets, axis=0)
+    scaled = scores / np.maximum(counts, FULL_EVIDENCE_GRAMS)[:, None] * CONFIDENCE_SCALE
+    scaled -= scaled.max(axis=1, keepdims=True)
+    weights = np.exp(scaled)
+    posterior = weights / weights.sum(axis=1, keepdims=True)
+    best = posterior.argmax(axis=1).tolist()
+    confidences = posterior.max(axis=1).tolist()
+    for text_index, lang_index, confidence in zip(rows, best, confidences):
+        results[text_index] = (LANGUAGES[lang_index] if confidence >= threshold else None), confidence
+    return results
+
+
+def detect_language(text: str, default: str = 'en', threshold: float = DEFAULT_THRESHOLD) -> str:
+    """Best-guess language code, falling back to default when unsure"""
+    lang, _ = classify(text, threshold)
+    return lang or default
@@ -6,6 +6,8 @@ import logging
 import asyncpg
 import sys
 import random
+from bulk_scheduler import rate_limit_trace
+from dm_dispatcher import get_dm_dispatcher
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -15,7 +17,8 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+# http_trace lets the bulk scheduler read X-RateLimit-* headers from every REST response
+bot = commands.Bot(command_prefix='!', intents=intents, http_trace=rate_limit_trace())
 
 OWNER_ID = 486652069831376943  # Replace with your Discord user ID
 TOKEN = os.getenv('DISCORD_BOT_TOKEN')
@@ -115,9 +118,15 @@ async def on_message(message: discord.Message):
     await bot.process_commands(message)
 
 async def forward_dm(message: discord.Message):
-    owner = await bot.fetch_user(OWNER_ID)
+    owner = bot.get_user(OWNER_ID) or await bot.fetch_user(OWNER_ID)
     if owner:
-        await owner.send(f"Message from {message.author}: {message.content}")
+        get_dm_dispatcher().send(owner, content=f"Message from {message.author}: {message.content}")
+
+@bot.command(name='dmstats')
+@commands.has_permissions(administrator=True)
+async def dm_stats(ctx):
+    """Show the outbound DM queue depth and send rate"""
+    await ctx.send(get_dm_dispatcher().status_line())
 
 @bot.event
 async def on_disconnect():
@@ -0,0 +1,126 @@
+"""Matchmaking for the PvP autofill queue.
+
+The queue is an insertion-ordered dict, so joining, leaving and membership
+checks are O(1) while players are still served first come, first served.
+``form_teams`` takes a whole signup wave at once: it pulls as many full teams
+as the queue allows and spreads character classes and ratings across them.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from game_constants import CHARACTER_CLASSES
+
+ANY_CLASS = "Any"
+
+
+class QueueEntry:
+    """One queued player"""
+    __slots__ = ('user_id', 'character_class', 'queued_at')
+
+    def __init__(self, user_id: int, character_class: Optional[str] = None, queued_at: Optional[float] = None):
+        self.user_id = user_id
+        self.character_class = character_class if character_class in CHARACTER_CLASSES else None
+        self.queued_at = queued_at or time.time()
+
+    def to_dict(self) -> Dict:
+        return {'user_id': self.user_id, 'character_class': self.character_class, 'queued_at': self.queued_at}
+
+
+class MatchQueue:
+    """FIFO queue of players with O(1) join, leave and lookup"""
+    def __init__(self, entries: Iterable[QueueEntry] = ()):
+        self.entries: "OrderedDict[int, QueueEntry]" = OrderedDict((entry.user_id, entry) for entry in entries)
+
+    @classmethod
+    def from_list(cls, data: List) -> "MatchQueue":
+        """Accepts the stored list of entry dicts as well as the older plain list of user ids"""
+        entries = []
+        for item in data or []:
+            if isinstance(item, dict):
+                entries.append(QueueEntry(item['user_id'], item.get('character_class'), item.get('queued_at')))
+            else:
+                entries.append(QueueEntry(int(item)))
+        return cls(entries)
+
+    def to_list(self) -> List[Dict]:
+        return [entry.to_dict() for entry in self.entries.values()]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.entries
+
+    def add(self, user_id: int, character_class: Optional[str] = None) -> QueueEntry:
+        entry = QueueEntry(user_id, character_class)
+        self.entries[user_id] = entry
+        return entry
+
+    def remove(self, user_id: int) -> Optional[QueueEntry]:
+        return self.entries.pop(user_id, None)
+
+    def take(self, count: int) -> List[QueueEntry]:
+        """Pop the ``count`` longest-waiting players"""
+        return [self.entries.popitem(last=False)[1] for _ in range(min(count, len(self.entries)))]
+
+    def requeue_front(self, entries: List[QueueEntry]):
+        """Put players back at the head of the queue in their original order (failed team creation)"""
+        for entry in reversed(entries):
+            self.entries[entry.user_id] = entry
+            self.entries.move_to_end(entry.user_id, last=False)
+
+    def class_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for entry in self.entries.values():
+            name = entry.character_class or ANY_CLASS
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+
+def form_teams(queue: MatchQueue, team_size: int, ratings: Optional[Dict[int, float]] = None) -> List[List[QueueEntry]]:
+    """Pull every full team the queue allows and balance them.
+
+    The longest-waiting players are taken first. Players of the most common
+    classes are placed first, each into the team with the fewest of their
+    class, then the lowest rating total. Unrated players count as the average
+    of the rated ones.
+    """
+    team_count = len(queue) // team_size
+    if team_count == 0:
+        return []
+
+    players = queue.take(team_count * team_size)
+    ratings = ratings or {}
+    known = [ratings[entry.user_id] for entry in players if entry.user_id in ratings]
+    default_rating = sum(known) / len(known) if known else 0.0
+
+    def rating_of(entry: QueueEntry) -> float:
+        return ratings.get(entry.user_id, default_rating)
+
+    class_sizes: Dict[Optional[str], int] = {}
+    for entry in players:
+        class_sizes[entry.character_class] = class_sizes.get(entry.character_class, 0) + 1
+
+    # Scarce classes last so they fill the gaps; "any class" players last of all
+    players.sort(key=lambda entry: (
+        entry.character_class is None, -class_sizes[entry.character_class],
+        entry.character_class or '', -rating_of(entry)
+    ))
+
+    teams: List[List[QueueEntry]] = [[] for _ in range(team_count)]
+    totals = [0.0] * team_count
+    class_counts: List[Dict[Optional[str], int]] = [{} for _ in range(team_count)]
+
+    for entry in players:
+        open_teams = [index for index in range(team_count) if len(teams[index]) < team_size]
+        index = min(open_teams, key=lambda i: (
+            class_counts[i].get(entry.character_class, 0) if entry.character_class else 0, totals[i], len(teams[i])
+        ))
+        teams[index].append(entry)
+        totals[index] += rating_of(entry)
+        class_counts[index][entry.character_class] = class_counts[index].get(entry.character_class, 0) + 1
+
+    for team in teams:
+        team.sort(key=lambda entry: entry.queued_at)
+    return teams
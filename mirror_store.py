@@ -0,0 +1,119 @@
+"""SQLite state for channel mirroring.
+
+Holds the source -> target channel mapping, the outbound queue (so messages
+survive a restart or a long rate limit) and the source -> target message map
+used to mirror edits and deletes.
+"""
+import json
+import logging
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from database import DATABASE_FILE, connect_store
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_MAP_TTL = 7 * 24 * 3600  # Edits/deletes older than a week are not mirrored
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS mirror_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        target_channel_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        source_message_id INTEGER NOT NULL,
+        payload TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_mirror_queue_target ON mirror_queue (target_channel_id, id);
+
+    CREATE TABLE IF NOT EXISTS mirror_messages (
+        source_message_id INTEGER PRIMARY KEY,
+        target_channel_id INTEGER NOT NULL,
+        target_message_id INTEGER NOT NULL,
+        content TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_mirror_messages_target ON mirror_messages (target_message_id, source_message_id);
+
+    CREATE TABLE IF NOT EXISTS mirror_channels (
+        source_channel_id INTEGER PRIMARY KEY,
+        target_channel_id INTEGER NOT NULL
+    );
+'''
+
+
+class MirrorStore:
+    """Channel mapping, durable mirror queue and the message-id map"""
+    def __init__(self, path: str = DATABASE_FILE):
+        self.conn = connect_store(SCHEMA, path)
+        self.conn.execute('DELETE FROM mirror_messages WHERE created_at < ?', (time.time() - MESSAGE_MAP_TTL,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # Channel mapping
+
+    def channel_mapping(self) -> Dict[int, int]:
+        return dict(self.conn.execute('SELECT source_channel_id, target_channel_id FROM mirror_channels'))
+
+    def save_channel_mapping(self, mapping: Dict[int, int]):
+        """Replace the stored mapping with this one"""
+        with self.conn:
+            self.conn.execute('DELETE FROM mirror_channels')
+            self.conn.executemany('INSERT INTO mirror_channels VALUES (?, ?)', list(mapping.items()))
+
+    # Queue
+
+    def enqueue(self, target_channel_id: int, kind: str, source_message_id: int, payload: Dict) -> int:
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO mirror_queue (target_channel_id, kind, source_message_id, payload) VALUES (?, ?, ?, ?)',
+                (target_channel_id, kind, source_message_id, json.dumps(payload))
+            )
+        return cursor.lastrowid
+
+    def ack(self, queue_ids: List[int]):
+        with self.conn:
+            self.conn.executemany('DELETE FROM mirror_queue WHERE id = ?', [(queue_id,) for queue_id in queue_ids])
+
+    def pending(self) -> List[Tuple[int, int, str, int, Dict]]:
+        """Everything not yet delivered, oldest first: (id, target, kind, source id, payload)"""
+        rows = self.conn.execute(
+            'SELECT id, target_channel_id, kind, source_message_id, payload FROM mirror_queue ORDER BY id'
+        ).fetchall()
+        return [(row[0], row[1], row[2], row[3], json.loads(row[4])) for row in rows]
+
+    # Message map
+
+    def map_messages(self, target_channel_id: int, target_message_id: int, parts: List[Tuple[int, str]]):
+        """Record that these (source id, content) parts were packed into one target message"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO mirror_messages VALUES (?, ?, ?, ?, ?)',
+                [(source_id, target_channel_id, target_message_id, content, now) for source_id, content in parts]
+            )
+
+    def target_of(self, source_message_id: int) -> Optional[Tuple[int, int]]:
+        row = self.conn.execute(
+            'SELECT target_channel_id, target_message_id FROM mirror_messages WHERE source_message_id = ?',
+            (source_message_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def parts_of(self, target_message_id: int) -> List[Tuple[int, str]]:
+        return self.conn.execute(
+            'SELECT source_message_id, content FROM mirror_messages WHERE target_message_id = ? ORDER BY source_message_id',
+            (target_message_id,)
+        ).fetchall()
+
+    def update_content(self, source_message_id: int, content: str):
+        with self.conn:
+            self.conn.execute(
+                'UPDATE mirror_messages SET content = ? WHERE source_message_id = ?', (content, source_message_id)
+            )
+
+    def forget(self, source_message_id: int):
+        with self.conn:
+            self.conn.execute('DELETE FROM mirror_messages WHERE source_message_id = ?', (source_message_id,))
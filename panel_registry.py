@@ -0,0 +1,154 @@
+"""Registry of the bot's long-lived control panels.
+
+Each panel is remembered as (name, guild, channel, message id, view class,
+content hash) in SQLite. At startup cogs re-attach their persistent views to
+the recorded messages instead of scanning channel history, and ``publish``
+only edits a panel when its rendered content actually changed.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from typing import Callable, Dict, List, Optional
+
+import discord
+
+from database import DATABASE_FILE, connect_store
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS panels (
+        name TEXT NOT NULL,
+        guild_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        message_id INTEGER NOT NULL,
+        view_class TEXT,
+        content_hash TEXT,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (name, channel_id)
+    );
+'''
+
+
+def payload_hash(content: Optional[str] = None, embed: Optional[discord.Embed] = None,
+                 view: Optional[discord.ui.View] = None) -> str:
+    """Stable hash of what a panel message shows; embed timestamps are ignored"""
+    embed_data = embed.to_dict() if embed else None
+    if embed_data:
+        embed_data.pop('timestamp', None)
+    payload = {
+        'content': content,
+        'embed': embed_data,
+        'components': view.to_components() if view else None,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class PanelRegistry:
+    """Panel locations keyed by (panel name, channel)"""
+    def __init__(self, path: str = DATABASE_FILE):
+        self.conn = connect_store(SCHEMA, path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.commit()
+
+    def get(self, name: str, channel_id: Optional[int] = None) -> Optional[Dict]:
+        """The panel in a channel, or the most recently updated one of that name"""
+        if channel_id is None:
+            row = self.conn.execute(
+                'SELECT * FROM panels WHERE name = ? ORDER BY updated_at DESC LIMIT 1', (name,)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                'SELECT * FROM panels WHERE name = ? AND channel_id = ?', (name, channel_id)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def records(self, name: str) -> List[Dict]:
+        return [dict(row) for row in self.conn.execute('SELECT * FROM panels WHERE name = ?', (name,))]
+
+    def save(self, name: str, guild_id: int, channel_id: int, message_id: int,
+             view_class: Optional[str] = None, content_hash: Optional[str] = None):
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO panels VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (name, guild_id, channel_id, message_id, view_class, content_hash, time.time())
+            )
+
+    def forget(self, name: str, channel_id: int):
+        with self.conn:
+            self.conn.execute('DELETE FROM panels WHERE name = ? AND channel_id = ?', (name, channel_id))
+
+    def attach(self, bot: discord.Client, name: str, view_factory: Callable[[], discord.ui.View]) -> int:
+        """Re-attach persistent views to every recorded panel of this name; returns how many"""
+        records = self.records(name)
+        for record in records:
+            bot.add_view(view_factory(), message_id=record['message_id'])
+        return len(records)
+
+    async def adopt_pinned(self, name: str, channel: discord.TextChannel, view: Optional[discord.ui.View] = None) -> bool:
+        """One-time migration: record the bot's pinned panel in a channel that has no registry entry yet"""
+        if self.get(name, channel.id) is not None:
+            return True
+        try:
+            pins = await channel.pins()
+        except discord.HTTPException as e:
+            logger.error(f"Could not read pins of {channel.id}: {e}")
+            return False
+        for message in pins:
+            if message.author == channel.guild.me:
+                # No hash yet, so the first publish refreshes it once
+                self.save(name, channel.guild.id, channel.id, message.id, type(view).__name__ if view else None)
+                return True
+        return False
+
+    async def publish(self, name: str, channel: discord.abc.Messageable, *, content: Optional[str] = None,
+                      embed: Optional[discord.Embed] = None, view: Optional[discord.ui.View] = None,
+                      pin: bool = False, force: bool = False, verify: bool = False,
+                      content_hash: Optional[str] = None) -> discord.PartialMessage:
+        """Create the panel in ``channel`` or bring it up to date.
+
+        An unchanged panel costs no request at all; a changed one is a single
+        edit; a missing one (never posted or deleted) is sent and recorded.
+        Panels with volatile decorations (clocks, latency) can pass their own
+        ``content_hash`` of the parts that matter. An unchanged panel is assumed
+        to still exist unless ``verify`` is set, which costs one fetch; use it
+        at startup so a panel deleted while the bot was away is re-posted.
+        """
+        content_hash = content_hash or payload_hash(content, embed, view)
+        view_class = type(view).__name__ if view else None
+        record = self.get(name, channel.id)
+
+        if record is not None:
+            message = channel.get_partial_message(record['message_id'])
+            try:
+                if record['content_hash'] == content_hash and not force:
+                    if verify:
+                        await message.fetch()
+                    return message
+                await message.edit(content=content, embed=embed, view=view)
+                self.save(name, channel.guild.id, channel.id, message.id, view_class, content_hash)
+                return message
+            except discord.NotFound:
+                logger.info(f"Panel '{name}' in {channel.id} was deleted, posting a new one")
+
+        sent = await channel.send(content=content, embed=embed, view=view)
+        if pin:
+            try:
+                await sent.pin(reason=f"{name} panel")
+            except discord.HTTPException as e:
+                logger.error(f"Could not pin panel '{name}' in {channel.id}: {e}")
+        self.save(name, channel.guild.id, channel.id, sent.id, view_class, content_hash)
+        return channel.get_partial_message(sent.id)
+
+
+_panel_registry: Optional[PanelRegistry] = None
+
+
+def get_panel_registry() -> PanelRegistry:
+    """Return the process-wide panel registry, creating it on first use"""
+    global _panel_registry
+    if _panel_registry is None:
+        _panel_registry = PanelRegistry()
+    return _panel_registry
@@ -0,0 +1,209 @@
+"""In-memory directory of crafting professions loaded from an Excel workbook.
+
+Each sheet of the workbook is one profession with the columns name, server,
+profession, profession level and class. The workbook is parsed once with
+openpyxl (in a worker thread) into plain indexes: profession -> players,
+player name -> entries and profession -> level range. ``refresh`` re-reads it
+only when its mtime changed, so lookups never touch the disk.
+"""
+import asyncio
+import difflib
+import logging
+import os
+import unicodedata
+from typing import Callable, Dict, List, Optional, Tuple
+
+import discord
+import openpyxl
+
+logger = logging.getLogger(__name__)
+
+SEARCH_LIMIT = 25
+FUZZY_CUTOFF = 0.6
+PAGE_LINES = 20
+PAGE_CHARS = 4000  # Embed descriptions are capped at 4096
+PAGER_TIMEOUT = 600
+
+
+def normalize(text: str) -> str:
+    """Case-, accent- and punctuation-insensitive key used for searching"""
+    text = unicodedata.normalize('NFKD', str(text).casefold())
+    return ''.join(char for char in text if char.isalnum())
+
+
+def _cell(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+class ProfessionEntry:
+    """One player row of a profession sheet"""
+    __slots__ = ('name', 'server', 'profession', 'level', 'character_class')
+
+    def __init__(self, name, server, profession, level, character_class):
+        self.name = name
+        self.server = server
+        self.profession = profession
+        self.level = level
+        self.character_class = character_class
+
+    def values(self) -> Tuple:
+        return (self.name, self.server, self.profession, self.level, self.character_class)
+
+
+class ProfessionDirectory:
+    """Indexed copy of a profession workbook"""
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime: Optional[float] = None
+        self.headers: Tuple[str, ...] = ()
+        self.professions: List[str] = []
+        self.by_profession: Dict[str, List[ProfessionEntry]] = {}
+        self.by_name: Dict[str, List[ProfessionEntry]] = {}
+        self.level_ranges: Dict[str, Tuple[int, int]] = {}
+        self.profession_keys: Dict[str, str] = {}
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def _read(self) -> Tuple[Tuple[str, ...], Dict[str, List[ProfessionEntry]]]:
+        workbook = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            headers: Tuple[str, ...] = ()
+            sheets: Dict[str, List[ProfessionEntry]] = {}
+            for sheet in workbook.worksheets:
+                rows = sheet.iter_rows(values_only=True)
+                header = next(rows, None)
+                if header and not headers:
+                    headers = tuple(str(_cell(value) or '') for value in header[:5])
+                entries = []
+                for row in rows:
+                    row = [_cell(value) for value in row[:5]] + [None] * (5 - len(row[:5]))
+                    if not row[0]:
+                        continue
+                    entries.append(ProfessionEntry(row[0], row[1], sheet.title, row[3], row[4]))
+                sheets[sheet.title] = entries
+            return headers, sheets
+        finally:
+            workbook.close()
+
+    def _index(self, headers: Tuple[str, ...], sheets: Dict[str, List[ProfessionEntry]], mtime: Optional[float]):
+        by_name: Dict[str, List[ProfessionEntry]] = {}
+        level_ranges: Dict[str, Tuple[int, int]] = {}
+        for profession, entries in sheets.items():
+            for entry in entries:
+                by_name.setdefault(normalize(entry.name), []).append(entry)
+            levels = [entry.level for entry in entries if isinstance(entry.level, (int, float))]
+            if levels:
+                level_ranges[profession] = (min(levels), max(levels))
+
+        # Swapped in one go so readers never see a half-built index
+        self.headers = headers
+        self.professions = list(sheets)
+        self.by_profession = sheets
+        self.by_name = by_name
+        self.level_ranges = level_ranges
+        self.profession_keys = {normalize(profession): profession for profession in sheets}
+        self.mtime = mtime
+
+    async def refresh(self) -> bool:
+        """Reload the workbook in a worker thread if it changed on disk; returns True if it did"""
+        mtime = await asyncio.to_thread(self._stat)
+        if mtime is None or mtime == self.mtime:
+            return False
+        try:
+            headers, sheets = await asyncio.to_thread(self._read)
+        except Exception as e:
+            logger.error(f"Error reloading profession workbook {self.path}: {e}")
+            return False
+        self._index(headers, sheets, mtime)
+        logger.info(f"Loaded {self.path}: {len(sheets)} professions, {len(self.by_name)} players")
+        return True
+
+    def players(self, profession: str) -> Optional[List[ProfessionEntry]]:
+        return self.by_profession.get(profession)
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> Tuple[List[str], List[ProfessionEntry]]:
+        """Professions and player entries matching ``query``.
+
+        Substring matches come first (prefix matches, then shortest); when
+        there are none, close spellings are used instead.
+        """
+        key = normalize(query)
+        if not key:
+            return [], []
+        professions = [self.profession_keys[match] for match in _matches(key, self.profession_keys, limit)]
+        entries = [entry for match in _matches(key, self.by_name, limit) for entry in self.by_name[match]]
+        return professions, entries[:limit]
+
+
+def _matches(key: str, keys, limit: int) -> List[str]:
+    found = [candidate for candidate in keys if key in candidate]
+    if found:
+        found.sort(key=lambda candidate: (not candidate.startswith(key), len(candidate), candidate))
+        return found[:limit]
+    return difflib.get_close_matches(key, list(keys), n=limit, cutoff=FUZZY_CUTOFF)
+
+
+def build_pages(title: str, lines: List[str], *, color: discord.Color, footer: Optional[str] = None,
+                wrap: Callable[[str], str] = lambda body: body) -> List[discord.Embed]:
+    """Split lines into embeds of at most PAGE_LINES lines and PAGE_CHARS characters"""
+    chunks: List[List[str]] = [[]]
+    size = 0
+    for line in lines:
+        if chunks[-1] and (len(chunks[-1]) >= PAGE_LINES or size + len(line) + 1 > PAGE_CHARS):
+            chunks.append([])
+            size = 0
+        chunks[-1].append(line)
+        size += len(line) + 1
+
+    pages = []
+    for number, chunk in enumerate(chunks, start=1):
+        embed = discord.Embed(title=title, description=wrap('\n'.join(chunk)), color=color)
+        parts = [footer] if footer else []
+        if len(chunks) > 1:
+            parts.append(f"{number}/{len(chunks)}")
+        if parts:
+            embed.set_footer(text=' • '.join(parts))
+        pages.append(embed)
+    return pages
+
+
+class PagedEmbedView(discord.ui.View):
+    """Previous/next buttons over a list of embeds"""
+    def __init__(self, pages: List[discord.Embed]):
+        super().__init__(timeout=PAGER_TIMEOUT)
+        self.pages = pages
+        self.index = 0
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = self.index >= len(self.pages) - 1
+
+    async def show(self, interaction: discord.Interaction, step: int):
+        self.index = max(0, min(len(self.pages) - 1, self.index + step))
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.pages[self.index], view=self)
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, -1)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, 1)
+
+
+async def send_pages(interaction: discord.Interaction, pages: List[discord.Embed], ephemeral: bool = False):
+    """Send the first page, with pager buttons only when there is more than one"""
+    if len(pages) > 1:
+        await interaction.response.send_message(embed=pages[0], view=PagedEmbedView(pages), ephemeral=ephemeral)
+    else:
+        await interaction.response.send_message(embed=pages[0], ephemeral=ephemeral)
@@ -0,0 +1,108 @@
+"""Debounced JSON state persistence in SQLite.
+
+A cog hands the store a snapshot function and calls ``mark_dirty()`` whenever
+its state changes. Marking is just a flag; a single flush runs after a short
+delay, serializes each top-level key and writes only the keys whose JSON
+changed, in one transaction off the event loop.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from database import DATABASE_FILE, connect_store
+
+logger = logging.getLogger(__name__)
+
+FLUSH_DELAY = 1.0  # Seconds of quiet before changes are written
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS state (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (namespace, key)
+    )
+'''
+
+
+class StateStore:
+    """Key -> JSON rows for one namespace, flushed in coalesced batches"""
+    def __init__(self, namespace: str, snapshot: Callable[[], Dict[str, Any]],
+                 path: str = DATABASE_FILE, delay: float = FLUSH_DELAY):
+        self.namespace = namespace
+        self.snapshot = snapshot
+        self.delay = delay
+        # Flushes run in a worker thread, one at a time
+        self.conn = connect_store(SCHEMA, path, check_same_thread=False)
+        self.conn.commit()
+        self.write_lock = threading.Lock()
+        self.written: Dict[str, str] = {}
+        self.flush_task: Optional[asyncio.Task] = None
+        self.dirty = False
+        self.requests = 0
+        self.flushes = 0
+
+    def load(self) -> Dict[str, Any]:
+        rows = self.conn.execute('SELECT key, value FROM state WHERE namespace = ?', (self.namespace,)).fetchall()
+        self.written = dict(rows)
+        return {key: json.loads(value) for key, value in rows}
+
+    def mark_dirty(self):
+        """Note a change; the write happens once the burst of changes settles"""
+        self.requests += 1
+        self.dirty = True
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Changes marked while a write was in progress are picked up by the next round
+        while self.dirty:
+            await asyncio.sleep(self.delay)
+            await self.flush()
+
+    async def flush(self):
+        """Write every key whose serialized value changed since the last flush"""
+        if not self.dirty:
+            return
+        self.dirty = False
+        # Serialize on the loop so the state can't change mid-dump
+        encoded = {key: json.dumps(value, separators=(',', ':')) for key, value in self.snapshot().items()}
+        changed = {key: value for key, value in encoded.items() if self.written.get(key) != value}
+        removed = [key for key in self.written if key not in encoded]
+        if not changed and not removed:
+            return
+        try:
+            await asyncio.to_thread(self._write, changed, removed)
+            self.written.update(changed)
+            for key in removed:
+                del self.written[key]
+            self.flushes += 1
+        except sqlite3.Error as e:
+            logger.error(f"Error flushing {self.namespace} state: {e}")
+            self.dirty = True
+
+    def _write(self, changed: Dict[str, str], removed: List[str] = ()):
+        with self.write_lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO state (namespace, key, value) VALUES (?, ?, ?)',
+                [(self.namespace, key, value) for key, value in changed.items()]
+            )
+            # Keys the snapshot no longer has (e.g. state moved elsewhere)
+            self.conn.executemany(
+                'DELETE FROM state WHERE namespace = ? AND key = ?', [(self.namespace, key) for key in removed]
+            )
+
+    def close(self):
+        """Write anything pending synchronously and close (for cog unload)"""
+        if self.flush_task and not self.flush_task.done():
+            self.flush_task.cancel()
+        if self.dirty:
+            encoded = {key: json.dumps(value, separators=(',', ':')) for key, value in self.snapshot().items()}
+            self._write(
+                {key: value for key, value in encoded.items() if self.written.get(key) != value},
+                [key for key in self.written if key not in encoded]
+            )
+        self.conn.close()
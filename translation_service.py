@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+CACHE_SIZE = 2048  # Max cached translations
+CACHE_TTL = 6 * 60 * 60  # Seconds a cached translation stays valid
+
+
+class TranslationResult:
+    """Translated text plus the source language the backend settled on"""
+    __slots__ = ('text', 'src', 'dest')
+
+    def __init__(self, text: str, src: str, dest: str):
+        self.text = text
+        self.src = src
+        self.dest = dest
+
+
+class GoogletransBackend:
+    """Default backend using googletrans; translate() is blocking and runs in an executor"""
+    def __init__(self):
+        from googletrans import Translator
+        self.translator = Translator()
+
+    def translate(self, text: str, src: str, dest: str) -> Tuple[str, str]:
+        translated = self.translator.translate(text, dest=dest, src=src)
+        return translated.text, translated.src
+
+
+class LocalBackend:
+    """Offline stand-in for tests and benchmarks: tags text instead of translating it"""
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def translate(self, text: str, src: str, dest: str) -> Tuple[str, str]:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return f"[{dest}] {text}", 'en' if src == 'auto' else src
+
+
+class TranslationService:
+    """Shared translator with an LRU+TTL cache and coalescing of identical requests"""
+    def __init__(self, backend=None, cache_size: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.backend = backend or GoogletransBackend()
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.cache: "OrderedDict[tuple, Tuple[float, TranslationResult]]" = OrderedDict()
+        self.inflight: Dict[tuple, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+
+    @staticmethod
+    def make_key(text: str, src: str, dest: str) -> tuple:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest(), src, dest
+
+    def get_cached(self, key: tuple) -> Optional[TranslationResult]:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return result
+
+    def store(self, key: tuple, result: TranslationResult):
+        self.cache[key] = (time.monotonic(), result)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def translate(self, text: str, dest: str, src: str = 'auto') -> TranslationResult:
+        """Translate text, serving repeats from cache and sharing identical in-flight requests"""
+        key = self.make_key(text, src, dest)
+        cached = self.get_cached(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        pending = self.inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        # The call runs in its own task, so a caller that gets cancelled doesn't cancel it for
+        # the callers that joined it; every caller only waits on it
+        task = asyncio.get_running_loop().create_task(self.fetch(key, text, src, dest))
+        # Mark retrieved so a failure nobody awaited doesn't log a warning
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self.inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def fetch(self, key: tuple, text: str, src: str, dest: str) -> TranslationResult:
+        try:
+            result = await self.call_backend(text, src, dest)
+            self.store(key, result)
+            return result
+        finally:
+            self.inflight.pop(key, None)
+
+    async def call_backend(self, text: str, src: str, dest: str) -> TranslationResult:
+        """One upstream request, run in the default executor"""
+        self.upstream_calls += 1
+        loop = asyncio.get_running_loop()
+        translated, detected = await loop.run_in_executor(None, lambda: self.backend.translate(text, src, dest))
+        return TranslationResult(translated, detected, dest)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'cached': len(self.cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'upstream_calls': self.upstream_calls,
+        }
+
+
+_service: Optional[TranslationService] = None
+
+
+def get_translation_service() -> TranslationService:
+    """Return the process-wide translation service, creating it on first use"""
+    global _service
+    if _service is None:
+        _service = TranslationService()
+    return _service
+
+
+def set_translation_backend(backend) -> TranslationService:
+    """Swap the shared service onto another backend (e.g. LocalBackend in tests)"""
+    global _service
+    _service = TranslationService(backend)
+    return _service